@@ -1,6 +1,7 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from api.views import CacheStatsAPIView, MetricsAPIView
 from quizes.views import (
     AssignedAPIView,
     AssignedQuizDeleteAPIView,
@@ -14,7 +15,13 @@ from quizes.views import (
     QuizVolumeViewSet,
     TagViewSet,
 )
-from user.views import AdminMeAPIView, DepartmentViewSet, UserAdminViewSet, UserViewSet
+from user.views import (
+    AdminMeAPIView,
+    DepartmentViewSet,
+    UserAdminViewSet,
+    UserImportAPIView,
+    UserViewSet,
+)
 
 router_v1 = DefaultRouter()
 router_v1.register("levels", QuizLevelViewSet, basename="quiz-levels")
@@ -47,6 +54,9 @@ urlpatterns = [
     path("quizes/assigned/update/", AssignedQuizUpdateAPIView.as_view()),
     path("quizes/assigned/delete/", AssignedQuizDeleteAPIView.as_view()),
     path("users/me/", AdminMeAPIView.as_view()),
+    path("users/import/", UserImportAPIView.as_view()),
+    path("cache/stats/", CacheStatsAPIView.as_view()),
+    path("metrics/", MetricsAPIView.as_view()),
     path("", include(router_v1.urls)),
 ]
 
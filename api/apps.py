@@ -6,3 +6,9 @@ class ApiConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        """Подключает замер времени сериализаторов и проверки настроек."""
+        from . import checks, metrics  # noqa: F401
+
+        metrics.install()
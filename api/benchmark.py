@@ -0,0 +1,223 @@
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.queries import detect_queries
+from api.seeding import seed_organization
+from quizes.models import Question, Quiz
+from ratings.models import Rating, UserLevel
+from user.models import Department, User
+
+API_PREFIX = "/api/v1/"
+
+# Эндпоинты для замера: роль пользователя, метод и адрес. В адресе
+# подставляются id начатого (quiz) и пройденного (passed) сотрудником
+# квизов и id самого сотрудника.
+ENDPOINTS = [
+    ("user", "get", "quizes/"),
+    ("user", "get", "quizes/{quiz}/"),
+    ("user", "get", "quizes/not_complited/"),
+    ("user", "get", "quizes/{passed}/statistic"),
+    ("user", "post", "quizes/{quiz}/answer/"),
+    ("user", "post", "quizes/{quiz}/answer/batch/"),
+    ("user", "get", "users/me/"),
+    ("user", "get", "users/avatar/"),
+    ("user", "get", "users/achivements/"),
+    ("user", "get", "users/achivements/short/"),
+    ("user", "get", "users/ratings/"),
+    ("user", "get", "users/ratings/short/"),
+    ("user", "get", "users/ratings/me/"),
+    ("user", "get", "users/ratings/around/"),
+    ("admin", "get", "admin/quizes/"),
+    ("admin", "get", "admin/quizes/{quiz}/"),
+    ("admin", "get", "admin/quizes/{quiz}/questions/"),
+    ("admin", "get", "admin/quizes/{quiz}/volumes/"),
+    ("admin", "get", "admin/quizes/export/?ids={quiz}"),
+    ("admin", "get", "admin/quizes/images/"),
+    ("admin", "get", "admin/quizes/assigned/"),
+    ("admin", "get", "admin/levels/"),
+    ("admin", "get", "admin/tags/"),
+    ("admin", "get", "admin/users/"),
+    ("admin", "get", "admin/users/{user}/"),
+    ("admin", "get", "admin/users/departments/"),
+    ("admin", "get", "admin/users/me/"),
+    ("admin", "get", "admin/cache/stats/"),
+]
+
+
+def prepare_scenario(size, params, seed=0):
+    """
+    Заполняет БД организацией размера size и готовит данные для замеров.
+
+    Замеры выполняются от имени отдельного сотрудника с одинаковой на всех
+    размерах историей: один квиз пройден, другой начат. Возвращает
+    словарь с клиентами API по ролям, сотрудником, квизами и ответом для
+    эндпоинтов сохранения ответов.
+    """
+    seed_organization(**params, seed=seed)
+    user, admin = _create_user(size), _create_user(size, admin=True)
+    clients = {"user": APIClient(), "admin": APIClient()}
+    clients["user"].force_authenticate(user)
+    clients["admin"].force_authenticate(admin)
+    passed, started = Quiz.objects.filter(directory=user.department).order_by("id")[:2]
+    questions = list(started.questions.order_by("id"))
+    _answer(clients["user"], passed, passed.questions.order_by("id"))
+    _answer(clients["user"], started, questions[:1])
+    return {
+        "clients": clients,
+        "user": user,
+        "quiz": started,
+        "passed": passed,
+        "answer": _answer_payload(questions[1]),
+    }
+
+
+def build_request(scenario, role, method, path):
+    """Возвращает клиент, адрес и данные запроса к эндпоинту из ENDPOINTS."""
+    url = API_PREFIX + path.format(
+        quiz=scenario["quiz"].id,
+        passed=scenario["passed"].id,
+        user=scenario["user"].id,
+    )
+    data = None
+    if method == "post":
+        answer = scenario["answer"]
+        data = [answer] if path.endswith("batch/") else answer
+    return scenario["clients"][role], url, data
+
+
+def send_request(client, method, url, data=None):
+    """Выполняет запрос и дочитывает потоковый ответ."""
+    if method == "get":
+        response = client.get(url)
+    else:
+        response = getattr(client, method)(url, data, format="json")
+    if response.streaming:
+        b"".join(response.streaming_content)
+    return response
+
+
+def run_benchmark(size, params, seed=0):
+    """
+    Заполняет БД организацией размера size и замеряет все эндпоинты.
+
+    Перед каждым запросом кэш очищается, чтобы замерялась работа с БД.
+    Возвращает список замеров: адрес, статус, количество запросов к БД,
+    повторяющиеся запросы, время в миллисекундах и пик выделенной памяти
+    в килобайтах.
+    """
+    scenario = prepare_scenario(size, params, seed)
+    results = []
+    for role, method, path in ENDPOINTS:
+        results.append(
+            {
+                "endpoint": f"{method.upper()} {API_PREFIX}{path}",
+                "size": size,
+                **_measure(method, *build_request(scenario, role, method, path)),
+            }
+        )
+    return results
+
+
+def find_regressions(results, tolerance=0):
+    """
+    Возвращает эндпоинты, у которых количество запросов растет с данными.
+
+    Количество запросов на каждом размере сравнивается с наименьшим
+    размером (первым в results), допустимый рост задается tolerance.
+    """
+    baseline, regressions = {}, []
+    for result in results:
+        base = baseline.setdefault(result["endpoint"], result)
+        if result["queries"] > base["queries"] + tolerance:
+            regressions.append(
+                {
+                    "endpoint": result["endpoint"],
+                    "size": result["size"],
+                    "queries": result["queries"],
+                    "baseline": base["queries"],
+                }
+            )
+    return regressions
+
+
+def _measure(method, client, url, data):
+    """Выполняет запрос и замеряет количество запросов, время и память."""
+    cache.clear()
+    # Журнал запросов ограничен, старые записи сбивают подсчет.
+    connection.queries_log.clear()
+    tracemalloc.start()
+    started = time.perf_counter()
+    with CaptureQueriesContext(connection) as queries, detect_queries(
+        raise_errors=False, label=f"{method.upper()} {url}"
+    ) as inspector:
+        response = send_request(client, method, url, data)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "status": response.status_code,
+        "queries": len(queries),
+        "repeated": [item["fingerprint"] for item in inspector.repeated()],
+        "time_ms": round(elapsed * 1000, 1),
+        "memory_kb": round(peak / 1024, 1),
+    }
+
+
+def _create_user(size, admin=False):
+    """Создает сотрудника первого отдела или администратора для замеров."""
+    role = "admin" if admin else "user"
+    user = User.objects.create_user(
+        email=f"benchmark-{role}-{size}@corpquiz.test",
+        password=None,
+        firstName="Бенчмарк",
+        lastName=role,
+        position=role,
+        role=User.UserRoleChoice.ADMIN if admin else User.UserRoleChoice.EMPLOYEE,
+        is_staff=admin,
+        department=Department.objects.order_by("id").first(),
+    )
+    Rating.objects.create(
+        user=user,
+        user_level_id=UserLevel.get_default(),
+        department_id=user.department_id,
+    )
+    return user
+
+
+def _answer(client, quiz, questions):
+    """Отправляет правильные ответы на вопросы квиза."""
+    response = client.post(
+        f"{API_PREFIX}quizes/{quiz.id}/answer/batch/",
+        [_answer_payload(question) for question in questions],
+        format="json",
+    )
+    assert response.status_code == 201, response.content
+
+
+def _answer_payload(question):
+    """Возвращает правильный ответ на вопрос в формате запроса."""
+    answers = list(question.answers.order_by("id").prefetch_related("answers_list"))
+    if question.question_type == Question.TypeChoices.MANY:
+        answers = [answer for answer in answers if answer.is_right]
+    elif question.question_type != Question.TypeChoices.LIST:
+        answers = answers[:1]
+    return {
+        "id": question.id,
+        "question_type": question.question_type,
+        "response_time": 10,
+        "answers": [
+            {
+                "answer": answer.id,
+                "answer_text": answer.text,
+                "answer_list": [
+                    {"answer_list": item.id} for item in answer.answers_list.all()
+                ],
+            }
+            for answer in answers
+        ],
+    }
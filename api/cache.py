@@ -0,0 +1,199 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+# Виды счетчиков кэша: ответ из кэша, вычисленный ответ и ответ 304.
+STATS_KINDS = ("hits", "misses", "not_modified")
+
+# Области кэша ответов API. Версия области сбрасывает все ее ответы,
+# версия части области (отдела или пользователя) - только ответы этой части.
+SCOPES = (
+    "quizes",
+    "levels",
+    "tags",
+    "departments",
+    "images",
+    "avatars",
+    "ratings",
+)
+
+
+def _version_key(scope, part=None):
+    """Возвращает ключ кэша с версией области или ее части."""
+    return f"api-cache-version:{scope}:{part}" if part else f"api-cache-version:{scope}"
+
+
+def _stats_key(scope, kind):
+    """Возвращает ключ счетчика попаданий или промахов области."""
+    return f"api-cache-stats:{scope}:{kind}"
+
+
+def get_versions(scope, parts=()):
+    """
+    Возвращает версии области и ее частей.
+
+    Версия - время последнего изменения данных. Отсутствующие версии
+    создаются с текущим временем.
+    """
+    keys = [_version_key(scope), *(_version_key(scope, part) for part in parts)]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        now = time.time()
+        for key in missing:
+            cache.add(key, now, None)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key, 0) for key in keys]
+
+
+def bump(scope, parts=None):
+    """
+    Сбрасывает закэшированные ответы области после фиксации транзакции.
+
+    Без parts сбрасывается вся область, иначе только переданные части,
+    например "department:1" или "user:5".
+    """
+    if parts is None:
+        keys = [_version_key(scope)]
+    else:
+        keys = [_version_key(scope, part) for part in parts]
+    if keys:
+        transaction.on_commit(
+            lambda: cache.set_many(dict.fromkeys(keys, time.time()), None)
+        )
+
+
+def record(scope, kind):
+    """Увеличивает счетчик области вида kind из STATS_KINDS."""
+    key = _stats_key(scope, kind)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Счетчик мог быть вытеснен из кэша между add и incr.
+        cache.add(key, 1, None)
+
+
+def get_stats():
+    """
+    Возвращает счетчики кэша по областям.
+
+    Ответы 304 считаются попаданиями: данные не вычислялись и не передавались.
+    """
+    counters = cache.get_many(
+        [_stats_key(scope, kind) for scope in SCOPES for kind in STATS_KINDS]
+    )
+    stats = {}
+    for scope in SCOPES:
+        stats[scope] = {
+            kind: counters.get(_stats_key(scope, kind), 0) for kind in STATS_KINDS
+        }
+        hits = stats[scope]["hits"] + stats[scope]["not_modified"]
+        total = hits + stats[scope]["misses"]
+        stats[scope]["hit_rate"] = round(hits / total, 3) if total else None
+    return stats
+
+
+def reset_stats():
+    """Обнуляет счетчики кэша."""
+    cache.delete_many(
+        [_stats_key(scope, kind) for scope in SCOPES for kind in STATS_KINDS]
+    )
+
+
+class CachedResponseMixin:
+    """
+    Миксин для кэширования ответов на GET-запросы.
+
+    cache_scope - область кэша из SCOPES, cache_vary_on - "user" или
+    "department", если ответ зависит от пользователя или его отдела,
+    cache_timeout - время жизни ответа (по умолчанию API_CACHE_TIMEOUT).
+    Кэшируется список, другие действия подключаются через cached_response.
+
+    Ответы содержат ETag и Last-Modified по версиям области, поэтому
+    на условный запрос с неизменившимися данными возвращается 304 без
+    обращения к БД и сериализаторам.
+    """
+
+    cache_scope = None
+    cache_vary_on = None
+    cache_timeout = None
+
+    def get_cache_parts(self):
+        """Возвращает части области, от которых зависит ответ."""
+        user = self.request.user
+        if self.cache_vary_on == "user":
+            return [f"user:{user.id}"]
+        if self.cache_vary_on == "department":
+            return [f"department:{user.department_id}"]
+        return []
+
+    def get_cache_validators(self, request):
+        """
+        Возвращает хэш ответа и время последнего изменения его данных.
+
+        Хэш зависит от адреса запроса, формата ответа и версий данных.
+        """
+        parts = self.get_cache_parts()
+        versions = get_versions(self.cache_scope, parts)
+        source = "|".join(
+            map(
+                str,
+                [
+                    request.build_absolute_uri(),
+                    request.accepted_media_type,
+                    *parts,
+                    *versions,
+                ],
+            )
+        )
+        return hashlib.md5(source.encode()).hexdigest(), int(max(versions))
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        """
+        Возвращает ответ handler из кэша или вычисляет и сохраняет его.
+
+        Сохраняются только данные успешных ответов.
+        """
+        digest, last_modified = self.get_cache_validators(request)
+        etag = quote_etag(digest)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            record(self.cache_scope, "not_modified")
+            return self.set_validators(response, etag, last_modified)
+        key = f"api-cache:{self.cache_scope}:{digest}"
+        data = cache.get(key)
+        record(self.cache_scope, "misses" if data is None else "hits")
+        if data is not None:
+            return self.set_validators(Response(data), etag, last_modified)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            timeout = self.cache_timeout or settings.API_CACHE_TIMEOUT
+            cache.set(key, response.data, timeout)
+            self.set_validators(response, etag, last_modified)
+        return response
+
+    def set_validators(self, response, etag, last_modified):
+        """
+        Добавляет в ответ заголовки для условных запросов.
+
+        Ответ зависит от пользователя, поэтому общие кэши его не хранят,
+        а клиент проверяет актуальность при каждом обращении.
+        """
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        """Возвращает список из кэша."""
+        return self.cached_response(request, super().list, *args, **kwargs)
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Предупреждает о кэше, который не общий для процессов.
+
+    Версии кэша ответов API и ключей ответов сбрасываются в процессе,
+    изменившем данные. С кэшем в памяти процесса другие процессы сервера
+    и команды управления этого не видят и отдают устаревшие данные до
+    истечения времени жизни кэша.
+    """
+    if settings.CACHES["default"]["BACKEND"] not in LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            "Кэш по умолчанию не общий для процессов.",
+            hint=(
+                "Сброс версий кэша не дойдет до других процессов сервера. "
+                "Задайте CACHE_BACKEND=file или CACHE_BACKEND=redis."
+            ),
+            id="api.W001",
+        )
+    ]
@@ -0,0 +1,47 @@
+from django.db.models import Count
+
+# Правила удаления дублей: модель, поля уникального ограничения и порядок,
+# в котором первой идет запись, остающаяся в группе дублей.
+DUPLICATE_RULES = [
+    # Остается статистика с наибольшим количеством ответов.
+    ("quizes.Statistic", ("user", "quiz"), ("-count_answered", "id")),
+    # Остается последний ответ на вопрос.
+    ("quizes.UserQuestion", ("statistic", "question"), ("-id",)),
+    ("quizes.AssignedQuiz", ("user", "quiz"), ("id",)),
+    # Остается достижение с наибольшим прогрессом.
+    (
+        "ratings.UserAchivement",
+        ("user", "achivement"),
+        ("-achived", "-points_now", "id"),
+    ),
+]
+
+
+def find_duplicates(model, fields):
+    """Возвращает группы записей модели с одинаковыми значениями fields."""
+    return list(
+        model.objects.values(*fields)
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+        .order_by()
+    )
+
+
+def remove_duplicates(model, fields, order_by):
+    """
+    Удаляет записи модели, повторяющиеся по значениям fields.
+
+    В каждой группе дублей остается первая запись по order_by, остальные
+    удаляются вместе со связанными объектами. Функция работает и с моделями
+    из миграций. Возвращает id оставленных записей.
+    """
+    kept = []
+    for group in find_duplicates(model, fields):
+        ids = list(
+            model.objects.filter(**{field: group[field] for field in fields})
+            .order_by(*order_by)
+            .values_list("id", flat=True)
+        )
+        kept.append(ids[0])
+        model.objects.filter(id__in=ids[1:]).delete()
+    return kept
@@ -0,0 +1,238 @@
+import json
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.core.servers.basehttp import ThreadedWSGIServer
+from django.test.testcases import QuietWSGIRequestHandler
+
+from quizes.models import Question
+
+API_PREFIX = "/api/v1/"
+
+# Процентили задержки в отчете.
+PERCENTILES = (50, 95, 99)
+
+# Время ожидания ответа сервера в секундах.
+TIMEOUT = 60
+
+
+class Recorder:
+    """Потокобезопасный журнал запросов нагрузочного теста."""
+
+    def __init__(self):
+        """Создает пустой журнал и фиксирует время начала теста."""
+        self.lock = threading.Lock()
+        self.records = []
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def add(self, endpoint, status, elapsed):
+        """Добавляет запрос: шаблон адреса, статус и время в секундах."""
+        with self.lock:
+            self.records.append((endpoint, status, elapsed))
+
+    def stop(self):
+        """Фиксирует время окончания теста."""
+        self.finished = time.perf_counter()
+
+    def summary(self):
+        """
+        Возвращает статистику по эндпоинтам и по всему тесту.
+
+        Ошибкой считается ответ со статусом 4xx/5xx или отсутствие ответа
+        (статус 0). Задержки указываются в миллисекундах.
+        """
+        duration = (self.finished or time.perf_counter()) - self.started
+        groups = {}
+        for endpoint, status, elapsed in self.records:
+            groups.setdefault(endpoint, []).append((status, elapsed))
+        endpoints = [
+            {"endpoint": endpoint, **_describe(items, duration)}
+            for endpoint, items in groups.items()
+        ]
+        total = [(status, elapsed) for _, status, elapsed in self.records]
+        return {
+            "duration_s": round(duration, 1),
+            "endpoints": endpoints,
+            "total": {"endpoint": "всего", **_describe(total, duration)},
+        }
+
+
+class Session:
+    """Клиент API одного виртуального сотрудника."""
+
+    def __init__(self, base_url, recorder):
+        """Создает клиент сервера base_url, пишущий запросы в recorder."""
+        self.base_url = base_url.rstrip("/")
+        self.recorder = recorder
+        self.token = None
+
+    def request(self, method, path, endpoint, data=None):
+        """
+        Выполняет запрос и записывает его в журнал под именем endpoint.
+
+        Возвращает статус и разобранный JSON ответа или None.
+        """
+        headers = {"Accept": "application/json"}
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers["Content-Type"] = "application/json"
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        request = Request(
+            self.base_url + API_PREFIX + path, body, headers, method=method.upper()
+        )
+        started = time.perf_counter()
+        try:
+            with urlopen(request, timeout=TIMEOUT) as response:
+                status, content = response.status, response.read()
+        except HTTPError as error:
+            status, content = error.code, error.read()
+        except (URLError, OSError):
+            status, content = 0, b""
+        self.recorder.add(
+            f"{method.upper()} {API_PREFIX}{endpoint}",
+            status,
+            time.perf_counter() - started,
+        )
+        try:
+            return status, json.loads(content) if content else None
+        except ValueError:
+            return status, None
+
+
+def exam_day(session, credentials, rng, think_time=0):
+    """
+    Сценарий дня обязательного квиза для одного сотрудника.
+
+    Сотрудник получает токен, открывает список квизов, выбирает
+    непройденный, отвечает на все его вопросы по одному и смотрит
+    статистику. Между шагами выдерживается случайная пауза со средним
+    think_time секунд. Возвращает False, если сценарий прерван ошибкой.
+    """
+    status, data = session.request("post", "users/token/", "users/token/", credentials)
+    if status != 200:
+        return False
+    session.token = data["access"]
+    _think(rng, think_time)
+    status, quizes = session.request("get", "quizes/", "quizes/")
+    if status != 200:
+        return False
+    quizes = [quiz for quiz in quizes if not quiz["isPassed"] and quiz["questions"]]
+    if not quizes:
+        return True
+    quiz = rng.choice(quizes)
+    for question in quiz["questions"]:
+        _think(rng, think_time)
+        session.request(
+            "post",
+            f"quizes/{quiz['id']}/answer/",
+            "quizes/{quiz}/answer/",
+            _answer_payload(question, rng),
+        )
+    _think(rng, think_time)
+    session.request("get", f"quizes/{quiz['id']}/statistic", "quizes/{quiz}/statistic")
+    return True
+
+
+def run_load(base_url, credentials, concurrency=10, ramp_up=0, think_time=0, seed=0):
+    """
+    Прогоняет сценарий exam_day для каждого сотрудника из credentials.
+
+    Одновременно работают не более concurrency сотрудников, их запуск
+    равномерно распределяется на ramp_up секунд. Случайные решения
+    каждого сотрудника зависят только от seed и его номера, поэтому
+    прогоны воспроизводимы. Возвращает Recorder с журналом запросов.
+    """
+    recorder = Recorder()
+    step = ramp_up / len(credentials) if credentials else 0
+
+    def run(number):
+        delay = recorder.started + number * step - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        rng = random.Random(f"{seed}:{number}")
+        exam_day(Session(base_url, recorder), credentials[number], rng, think_time)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(run, range(len(credentials))))
+    recorder.stop()
+    return recorder
+
+
+def serve(host="127.0.0.1", port=0):
+    """
+    Запускает приложение corpquiz.wsgi в фоновом потоке.
+
+    Возвращает сервер и его адрес, остановка - server.shutdown().
+    """
+    from corpquiz.wsgi import application
+
+    server = ThreadedWSGIServer((host, port), QuietWSGIRequestHandler)
+    server.set_app(application)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def _describe(items, duration):
+    """Возвращает количество, ошибки по статусам, RPS и процентили задержки."""
+    latencies = sorted(elapsed for _, elapsed in items)
+    errors = sum(1 for status, _ in items if not 200 <= status < 400)
+    result = {
+        "requests": len(items),
+        "errors": errors,
+        "error_rate": round(errors / len(items), 4) if items else 0,
+        "statuses": dict(Counter(str(status) for status, _ in items)),
+        "rps": round(len(items) / duration, 1) if duration else 0,
+    }
+    for percentile in PERCENTILES:
+        result[f"p{percentile}_ms"] = round(
+            _percentile(latencies, percentile) * 1000, 1
+        )
+    return result
+
+
+def _percentile(values, percentile):
+    """Возвращает процентиль отсортированного списка методом ближайшего ранга."""
+    if not values:
+        return 0
+    rank = max(1, -(-len(values) * percentile // 100))
+    return values[rank - 1]
+
+
+def _think(rng, think_time):
+    """Выдерживает паузу сотрудника перед следующим действием."""
+    if think_time:
+        time.sleep(rng.expovariate(1 / think_time))
+
+
+def _answer_payload(question, rng):
+    """Возвращает случайный ответ на вопрос из списка квизов."""
+    answers = question["answers"]
+    if question["question_type"] == Question.TypeChoices.MANY:
+        answers = rng.sample(answers, rng.randint(1, len(answers)))
+    elif question["question_type"] != Question.TypeChoices.LIST:
+        answers = [rng.choice(answers)]
+    payload = []
+    for answer in answers:
+        answers_list = [{"answer_list": item["id"]} for item in answer["answers_list"]]
+        rng.shuffle(answers_list)
+        payload.append(
+            {
+                "answer": answer["id"],
+                "answer_text": answer["text"],
+                "answer_list": answers_list,
+            }
+        )
+    return {
+        "id": question["id"],
+        "question_type": question["question_type"],
+        "response_time": rng.randint(5, 60),
+        "answers": payload,
+    }
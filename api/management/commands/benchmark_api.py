@@ -0,0 +1,114 @@
+import json
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from api.benchmark import find_regressions, run_benchmark
+from api.seeding import SIZES
+
+
+class Command(BaseCommand):
+    """Команда для замера количества запросов к БД на эндпоинтах API."""
+
+    help = (
+        "Заполняет тестовую БД организациями нескольких размеров, замеряет "
+        "запросы к БД, время и память каждого эндпоинта и завершается с "
+        "ошибкой, если количество запросов растет с объемом данных или "
+        "найдены повторяющиеся запросы (N+1)."
+    )
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы команды."""
+        parser.add_argument(
+            "--sizes",
+            default="small,medium",
+            help=f"Размеры организаций через запятую из {', '.join(SIZES)}.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=int,
+            default=0,
+            help="Допустимый рост количества запросов.",
+        )
+        parser.add_argument("--output", help="Путь к файлу для замеров в JSON.")
+        parser.add_argument(
+            "--no-check",
+            action="store_true",
+            help="Только вывести замеры, не проверяя рост запросов.",
+        )
+
+    def handle(self, *args, **options):
+        """Выполняет замеры в отдельной тестовой БД."""
+        sizes = options["sizes"].split(",")
+        unknown = [size for size in sizes if size not in SIZES]
+        if unknown:
+            raise CommandError(f"Неизвестные размеры: {', '.join(unknown)}.")
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        results = []
+        try:
+            # Замеры не должны затрагивать общий кэш приложения, N+1
+            # проверяются в замерах, а не в middleware.
+            with override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+                    }
+                },
+                QUERY_INSPECTION="off",
+            ):
+                for size in sizes:
+                    call_command("flush", interactive=False, verbosity=0)
+                    results.extend(run_benchmark(size, SIZES[size]))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.write_results(results)
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, ensure_ascii=False, indent=2)
+        errors = [result for result in results if result["status"] >= 500]
+        for error in errors:
+            self.stderr.write(
+                f"{error['endpoint']} ({error['size']}): статус {error['status']}"
+            )
+        regressions, repeated = [], []
+        if not options["no_check"]:
+            regressions = find_regressions(results, options["tolerance"])
+            repeated = [result for result in results if result["repeated"]]
+        for regression in regressions:
+            self.stderr.write(
+                f"{regression['endpoint']} ({regression['size']}): "
+                f"{regression['queries']} запросов вместо {regression['baseline']}"
+            )
+        for result in repeated:
+            for shape in result["repeated"]:
+                self.stderr.write(
+                    f"{result['endpoint']} ({result['size']}): N+1 {shape}"
+                )
+        if errors or regressions or repeated:
+            raise CommandError("Обнаружены ошибки, рост количества запросов или N+1.")
+        self.stdout.write(
+            self.style.SUCCESS("Количество запросов не зависит от данных.")
+        )
+
+    def write_results(self, results):
+        """Выводит таблицу замеров."""
+        self.stdout.write(
+            f"{'эндпоинт':<50}{'размер':>8}{'статус':>8}{'запросы':>9}"
+            f"{'мс':>9}{'КБ':>10}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['endpoint']:<50}{result['size']:>8}{result['status']:>8}"
+                f"{result['queries']:>9}{result['time_ms']:>9}{result['memory_kb']:>10}"
+            )
@@ -0,0 +1,53 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.dedup import DUPLICATE_RULES, find_duplicates, remove_duplicates
+from quizes.models import Statistic, UserQuestion
+
+
+class Command(BaseCommand):
+    """Команда для удаления дублей перед добавлением уникальных ограничений."""
+
+    help = (
+        "Удаляет повторяющиеся статистики, ответы на вопросы, назначения "
+        "и достижения и пересчитывает затронутую статистику."
+    )
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы команды."""
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только показать количество лишних записей.",
+        )
+
+    def handle(self, *args, **options):
+        """Удаляет дубли по правилам DUPLICATE_RULES."""
+        statistic_ids = set()
+        for label, fields, order_by in DUPLICATE_RULES:
+            model = apps.get_model(label)
+            groups = find_duplicates(model, fields)
+            extra = sum(group["count"] - 1 for group in groups)
+            self.stdout.write(f"{label}: лишних записей {extra}")
+            if options["dry_run"] or not groups:
+                continue
+            with transaction.atomic():
+                kept = remove_duplicates(model, fields, order_by)
+            if model is Statistic:
+                statistic_ids.update(kept)
+            elif model is UserQuestion:
+                statistic_ids.update(
+                    UserQuestion.objects.filter(id__in=kept).values_list(
+                        "statistic_id", flat=True
+                    )
+                )
+        statistics = Statistic.objects.filter(id__in=statistic_ids).select_related(
+            "quiz", "user"
+        )
+        for statistic in statistics:
+            statistic.set_statistic
+        if statistic_ids:
+            self.stdout.write(
+                self.style.SUCCESS(f"Пересчитано статистик: {len(statistic_ids)}")
+            )
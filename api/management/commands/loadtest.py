@@ -0,0 +1,132 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.loadtest import PERCENTILES, run_load, serve
+from api.seeding import PASSWORD
+from user.models import User
+
+
+class Command(BaseCommand):
+    """Команда для нагрузочного тестирования сценарием дня обязательного квиза."""
+
+    help = (
+        "Прогоняет сценарий дня обязательного квиза от имени сотрудников из БД: "
+        "вход, список квизов, ответы на вопросы и статистика. Выводит "
+        "процентили задержки и долю ошибок по эндпоинтам. Без --url запускает "
+        "corpquiz.wsgi в том же процессе."
+    )
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы команды."""
+        parser.add_argument(
+            "--users", type=int, default=100, help="Количество сотрудников."
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=20,
+            help="Количество одновременно работающих сотрудников.",
+        )
+        parser.add_argument(
+            "--ramp-up",
+            type=float,
+            default=0,
+            help="За сколько секунд запускаются все сотрудники.",
+        )
+        parser.add_argument(
+            "--think-time",
+            type=float,
+            default=0,
+            help="Средняя пауза сотрудника между действиями в секундах.",
+        )
+        parser.add_argument(
+            "--url",
+            help="Адрес запущенного сервера, например http://127.0.0.1:8000.",
+        )
+        parser.add_argument(
+            "--password",
+            default=PASSWORD,
+            help="Пароль сотрудников (по умолчанию пароль seed_corpquiz).",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Путь к файлу для отчета в JSON.")
+        parser.add_argument(
+            "--max-error-rate",
+            type=float,
+            help="Завершиться с ошибкой, если доля ошибок больше.",
+        )
+
+    def handle(self, *args, **options):
+        """Выполняет нагрузочный тест и выводит отчет."""
+        if options["users"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--users и --concurrency должны быть больше нуля.")
+        emails = list(
+            User.objects.filter(
+                role=User.UserRoleChoice.EMPLOYEE,
+                is_active=True,
+                department__isnull=False,
+            )
+            .order_by("id")
+            .values_list("email", flat=True)[: options["users"]]
+        )
+        if not emails:
+            raise CommandError("В БД нет сотрудников, запустите seed_corpquiz.")
+        credentials = [
+            {
+                "email": email,
+                "password": options["password"],
+                "role": User.UserRoleChoice.EMPLOYEE,
+            }
+            for email in emails
+        ]
+        server = None
+        url = options["url"]
+        if not url:
+            server, url = serve()
+        self.stdout.write(
+            f"Сотрудников: {len(credentials)}, одновременно: "
+            f"{options['concurrency']}, сервер: {url}"
+        )
+        try:
+            recorder = run_load(
+                url,
+                credentials,
+                concurrency=options["concurrency"],
+                ramp_up=options["ramp_up"],
+                think_time=options["think_time"],
+                seed=options["seed"],
+            )
+        finally:
+            if server:
+                server.shutdown()
+                server.server_close()
+
+        summary = recorder.summary()
+        self.write_summary(summary)
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(summary, output, ensure_ascii=False, indent=2)
+        max_error_rate = options["max_error_rate"]
+        if (
+            max_error_rate is not None
+            and summary["total"]["error_rate"] > max_error_rate
+        ):
+            raise CommandError(
+                f"Доля ошибок {summary['total']['error_rate']} больше "
+                f"{max_error_rate}."
+            )
+
+    def write_summary(self, summary):
+        """Выводит таблицу процентилей и ошибок по эндпоинтам."""
+        percentiles = "".join(f"{f'p{value}, мс':>11}" for value in PERCENTILES)
+        self.stdout.write(
+            f"{'эндпоинт':<40}{'запросы':>9}{'ошибки':>8}{'RPS':>8}{percentiles}"
+        )
+        for row in [*summary["endpoints"], summary["total"]]:
+            values = "".join(f"{row[f'p{value}_ms']:>11}" for value in PERCENTILES)
+            self.stdout.write(
+                f"{row['endpoint']:<40}{row['requests']:>9}"
+                f"{row['error_rate']:>8.1%}{row['rps']:>8}{values}"
+            )
+        self.stdout.write(f"Длительность: {summary['duration_s']} с")
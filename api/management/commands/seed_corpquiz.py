@@ -0,0 +1,123 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.seeding import ACTIVITIES, seed_organization
+from quizes.models import UserAnswer
+from user.models import User
+
+
+def questions_range(value):
+    """Разбирает количество вопросов в квизе: число или диапазон 5:20."""
+    try:
+        bounds = [int(bound) for bound in value.split(":")]
+    except ValueError:
+        raise CommandError(f"Некорректное количество вопросов: {value}.")
+    if len(bounds) not in (1, 2) or min(bounds) < 1 or bounds != sorted(bounds):
+        raise CommandError(f"Некорректное количество вопросов: {value}.")
+    return (bounds[0], bounds[-1])
+
+
+class Command(BaseCommand):
+    """Команда для генерации синтетических данных для нагрузочных тестов."""
+
+    help = (
+        "Создает отделы, сотрудников, квизы с вопросами и ответами, назначения, "
+        "статистику прохождений и рейтинги через bulk_create."
+    )
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы команды."""
+        parser.add_argument("--departments", type=int, default=10)
+        parser.add_argument("--users", type=int, default=1000, help="Всего.")
+        parser.add_argument("--quizes", type=int, default=100, help="Всего.")
+        parser.add_argument(
+            "--questions",
+            type=questions_range,
+            default=(5, 20),
+            help="Вопросов в квизе: число или диапазон, например 5:20.",
+        )
+        parser.add_argument(
+            "--attempts",
+            type=float,
+            default=0.3,
+            help="Средняя доля квизов отдела, пройденных сотрудником.",
+        )
+        parser.add_argument(
+            "--assigned",
+            type=float,
+            default=0.2,
+            help="Доля квизов отдела, назначенных сотруднику.",
+        )
+        parser.add_argument(
+            "--right",
+            type=float,
+            default=0.7,
+            help="Вероятность правильного ответа.",
+        )
+        parser.add_argument(
+            "--incomplete",
+            type=float,
+            default=0.1,
+            help="Доля незавершенных прохождений.",
+        )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.0,
+            help="Неравномерность размеров отделов (0 - одинаковые).",
+        )
+        parser.add_argument(
+            "--activity",
+            choices=ACTIVITIES,
+            default="exponential",
+            help="Распределение активности сотрудников.",
+        )
+        parser.add_argument(
+            "--hash-passwords",
+            action="store_true",
+            help="Хэшировать пароль каждого сотрудника отдельно (медленно).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Количество процессов (только для PostgreSQL).",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Генерирует данные и выводит количество созданных строк."""
+        for name in ("attempts", "assigned", "right", "incomplete"):
+            if not 0 <= options[name] <= 1:
+                raise CommandError(f"--{name} должен быть от 0 до 1.")
+        started = time.monotonic()
+        counts = seed_organization(
+            departments=options["departments"],
+            users=options["users"],
+            quizes=options["quizes"],
+            questions=options["questions"],
+            attempts=options["attempts"],
+            assigned=options["assigned"],
+            right=options["right"],
+            incomplete=options["incomplete"],
+            skew=options["skew"],
+            activity=options["activity"],
+            hash_passwords=options["hash_passwords"],
+            workers=options["workers"],
+            seed=options["seed"],
+            progress=self.write_progress,
+        )
+        for label, count in counts.items():
+            self.stdout.write(f"{label}: {count}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Данные созданы за {time.monotonic() - started:.1f} с.")
+        )
+
+    def write_progress(self, report):
+        """Выводит отчет по заполненному отделу."""
+        self.stdout.write(
+            f"{report['department']}: сотрудников "
+            f"{report.get(User._meta.label, 0)}, ответов "
+            f"{report.get(UserAnswer._meta.label, 0)}"
+        )
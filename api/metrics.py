@@ -0,0 +1,213 @@
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from rest_framework.serializers import BaseSerializer
+
+# Границы корзин гистограммы длительности запросов в секундах.
+DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Замеры текущего запроса, None вне запроса.
+_current = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    """Замеры одного запроса: запросы к БД, время БД и сериализаторов."""
+
+    def __init__(self):
+        """Создает пустые замеры."""
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def server_timing(self, total):
+        """Возвращает значение заголовка Server-Timing в миллисекундах."""
+        return ", ".join(
+            [
+                f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+                f"serializer;dur={self.serializer_time * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            ]
+        )
+
+
+class Registry:
+    """
+    Накопленные метрики запросов по представлениям.
+
+    Метрики хранятся в памяти процесса: при нескольких процессах сервера
+    каждый отдает свои счетчики.
+    """
+
+    def __init__(self):
+        """Создает пустой реестр."""
+        self.lock = threading.Lock()
+        self.views = {}
+        self.statuses = {}
+
+    def observe(self, view, method, status, metrics, duration, size):
+        """Добавляет замеры завершенного запроса."""
+        key = (view, method)
+        with self.lock:
+            self.statuses[(view, method, status)] = (
+                self.statuses.get((view, method, status), 0) + 1
+            )
+            values = self.views.setdefault(
+                key,
+                {
+                    "buckets": [0] * len(DURATION_BUCKETS),
+                    "count": 0,
+                    "duration": 0.0,
+                    "queries": 0,
+                    "db_time": 0.0,
+                    "serializer_time": 0.0,
+                    "size": 0,
+                },
+            )
+            for number, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    values["buckets"][number] += 1
+                    break
+            values["count"] += 1
+            values["duration"] += duration
+            values["queries"] += metrics.queries
+            values["db_time"] += metrics.db_time
+            values["serializer_time"] += metrics.serializer_time
+            values["size"] += size
+
+    def reset(self):
+        """Обнуляет метрики."""
+        with self.lock:
+            self.views.clear()
+            self.statuses.clear()
+
+    def export(self):
+        """Возвращает метрики в текстовом формате Prometheus."""
+        with self.lock:
+            views = {key: dict(values) for key, values in self.views.items()}
+            statuses = dict(self.statuses)
+        lines = [
+            "# HELP corpquiz_requests_total Количество запросов.",
+            "# TYPE corpquiz_requests_total counter",
+        ]
+        for (view, method, status), count in sorted(statuses.items()):
+            labels = _labels(view=view, method=method, status=status)
+            lines.append(f"corpquiz_requests_total{{{labels}}} {count}")
+        lines += [
+            "# HELP corpquiz_request_duration_seconds Длительность запросов.",
+            "# TYPE corpquiz_request_duration_seconds histogram",
+        ]
+        for (view, method), values in sorted(views.items()):
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS, values["buckets"]):
+                cumulative += count
+                labels = _labels(view=view, method=method, le=bound)
+                lines.append(
+                    f"corpquiz_request_duration_seconds_bucket{{{labels}}} "
+                    f"{cumulative}"
+                )
+            labels = _labels(view=view, method=method, le="+Inf")
+            lines.append(
+                f"corpquiz_request_duration_seconds_bucket{{{labels}}} "
+                f"{values['count']}"
+            )
+            labels = _labels(view=view, method=method)
+            lines.append(
+                f"corpquiz_request_duration_seconds_sum{{{labels}}} "
+                f"{values['duration']:.6f}"
+            )
+            lines.append(
+                f"corpquiz_request_duration_seconds_count{{{labels}}} "
+                f"{values['count']}"
+            )
+        for name, field, description in (
+            ("db_queries_total", "queries", "Количество запросов к БД."),
+            ("db_duration_seconds_total", "db_time", "Время запросов к БД."),
+            (
+                "serializer_duration_seconds_total",
+                "serializer_time",
+                "Время работы сериализаторов.",
+            ),
+            ("response_bytes_total", "size", "Размер ответов."),
+        ):
+            lines += [
+                f"# HELP corpquiz_{name} {description}",
+                f"# TYPE corpquiz_{name} counter",
+            ]
+            for (view, method), values in sorted(views.items()):
+                labels = _labels(view=view, method=method)
+                lines.append(f"corpquiz_{name}{{{labels}}} {values[field]}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def start_request():
+    """Начинает замеры запроса и возвращает их вместе с токеном контекста."""
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish_request(token):
+    """Завершает замеры запроса."""
+    _current.reset(token)
+
+
+def db_wrapper(execute, sql, params, many, context):
+    """Обертка connection.execute_wrapper, считающая запросы к БД и их время."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += time.perf_counter() - started
+        metrics.queries += 1
+
+
+def timed_serializer(method):
+    """
+    Оборачивает метод сериализатора замером времени.
+
+    Учитывается только внешний вызов, вложенные сериализаторы входят в его
+    время. Время включает запросы к БД, сделанные сериализатором.
+    """
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        metrics = _current.get()
+        if metrics is None:
+            return method(*args, **kwargs)
+        metrics.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            metrics.serializer_depth -= 1
+            if not metrics.serializer_depth:
+                metrics.serializer_time += time.perf_counter() - started
+
+    return wrapper
+
+
+def install():
+    """Подключает замер времени к валидации и выводу данных сериализаторов."""
+    if getattr(BaseSerializer.is_valid, "__wrapped__", None):
+        return
+    BaseSerializer.is_valid = timed_serializer(BaseSerializer.is_valid)
+    BaseSerializer.data = property(timed_serializer(BaseSerializer.data.fget))
+
+
+def _labels(**labels):
+    """Возвращает метки Prometheus с экранированными значениями."""
+    return ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in labels.items()
+    )
@@ -0,0 +1,76 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from api.metrics import db_wrapper, finish_request, registry, start_request
+from api.queries import QueryInspector
+
+
+class PerformanceMiddleware:
+    """
+    Middleware для замера производительности запросов.
+
+    Для каждого запроса считает запросы к БД и их время, время работы
+    сериализаторов, общее время и размер ответа. Замеры добавляются
+    в заголовок Server-Timing (если включен SERVER_TIMING) и накапливаются
+    по представлениям для эндпоинта метрик Prometheus.
+    """
+
+    def __init__(self, get_response):
+        """Сохраняет следующий обработчик цепочки."""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Выполняет запрос с замерами."""
+        metrics, token = start_request()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(db_wrapper))
+                response = self.get_response(request)
+        finally:
+            finish_request(token)
+        duration = time.perf_counter() - started
+        if settings.SERVER_TIMING:
+            response["Server-Timing"] = metrics.server_timing(duration)
+        match = request.resolver_match
+        registry.observe(
+            match.view_name if match else "unresolved",
+            request.method,
+            response.status_code,
+            metrics,
+            duration,
+            0 if response.streaming else len(response.content),
+        )
+        return response
+
+
+class QueryInspectionMiddleware:
+    """
+    Middleware для поиска N+1 и медленных запросов при разработке.
+
+    Включается настройкой QUERY_INSPECTION: "log" записывает найденные
+    повторы в лог, "raise" вызывает NPlusOneError, поэтому в тестах
+    такой запрос к API сразу завершается ошибкой.
+    """
+
+    def __init__(self, get_response):
+        """Отключает middleware, если проверка запросов выключена."""
+        if settings.QUERY_INSPECTION not in ("log", "raise"):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Выполняет запрос и проверяет его запросы к БД."""
+        inspector = QueryInspector()
+        with inspector.wrap():
+            response = self.get_response(request)
+        inspector.report(
+            f"{request.method} {request.path}",
+            raise_errors=settings.QUERY_INSPECTION == "raise",
+        )
+        return response
@@ -0,0 +1,189 @@
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Служебные запросы транзакций не считаются повторами.
+IGNORED_PREFIXES = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+# Файлы инструментирования, которые не указываются источником запроса.
+INTERNAL_FILES = ("api/queries.py", "api/middleware.py", "api/metrics.py")
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMS = re.compile(r"%s|\?")
+_LISTS = re.compile(r"\(\?(?:, \?)*\)(?:, \(\?(?:, \?)*\))*")
+_SPACES = re.compile(r"\s+")
+
+
+class NPlusOneError(Exception):
+    """Исключение при повторяющихся в одном запросе к API запросах к БД."""
+
+
+def fingerprint(sql):
+    """
+    Возвращает форму SQL-запроса без значений.
+
+    Литералы и параметры заменяются на "?", списки значений в IN и VALUES
+    сворачиваются, поэтому запросы, отличающиеся только значениями или
+    их количеством, получают одну форму.
+    """
+    sql = _STRINGS.sub("?", sql)
+    sql = _NUMBERS.sub("?", sql)
+    sql = _PARAMS.sub("?", sql)
+    sql = _SPACES.sub(" ", sql).strip()
+    return _LISTS.sub("(...)", sql)
+
+
+class QueryInspector:
+    """
+    Сборщик запросов к БД для поиска N+1 и медленных запросов.
+
+    Запросы группируются по форме SQL, для каждого запоминается источник:
+    цепочка полей сериализаторов, при выводе которых он выполнен, или
+    первая строка кода проекта (например, свойство модели). Формы,
+    встретившиеся не меньше threshold раз, считаются N+1. Запросы дольше
+    slow миллисекунд записываются в лог сразу.
+    """
+
+    def __init__(self, threshold=None, slow=None):
+        """Создает сборщик с порогами из настроек по умолчанию."""
+        self.threshold = threshold or settings.QUERY_REPEAT_THRESHOLD
+        self.slow = slow if slow is not None else settings.SLOW_QUERY_THRESHOLD
+        self.queries = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обертка connection.execute_wrapper, записывающая запрос."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            origin = get_origin(sys._getframe(1))
+            if elapsed >= self.slow:
+                logger.warning(
+                    "Медленный запрос %.1f мс (%s): %s", elapsed, origin, sql
+                )
+            shape = fingerprint(sql)
+            if not shape.startswith(IGNORED_PREFIXES):
+                entry = self.queries.setdefault(
+                    shape, {"sql": sql, "count": 0, "time": 0.0, "origins": Counter()}
+                )
+                entry["count"] += 1
+                entry["time"] += elapsed
+                entry["origins"][origin] += 1
+
+    @contextmanager
+    def wrap(self):
+        """Записывает запросы всех подключений к БД внутри блока."""
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def repeated(self):
+        """Возвращает формы запросов, повторившиеся не меньше threshold раз."""
+        return [
+            {
+                "fingerprint": shape,
+                "sql": entry["sql"],
+                "count": entry["count"],
+                "time_ms": round(entry["time"], 1),
+                "origins": entry["origins"].most_common(3),
+            }
+            for shape, entry in self.queries.items()
+            if entry["count"] >= self.threshold
+        ]
+
+    def report(self, label, raise_errors=False):
+        """
+        Записывает найденные N+1 в лог или вызывает NPlusOneError.
+
+        label - описание проверяемого кода, например метод и адрес запроса.
+        Возвращает список повторившихся запросов.
+        """
+        repeated = self.repeated()
+        if not repeated:
+            return repeated
+        message = "\n".join(
+            [f"{label}: повторяющиеся запросы к БД"]
+            + [
+                f"  {item['count']} раз, {item['time_ms']} мс: {item['fingerprint']}"
+                + "".join(
+                    f"\n    из {origin} ({count})" for origin, count in item["origins"]
+                )
+                for item in repeated
+            ]
+        )
+        if raise_errors:
+            raise NPlusOneError(message)
+        logger.warning(message)
+        return repeated
+
+
+def get_origin(frame):
+    """
+    Возвращает источник запроса к БД по стеку вызовов.
+
+    Если запрос выполнен при выводе данных сериализатором, источник -
+    цепочка полей, например "QuizSerializer.questions >
+    QuestionSerializer.answers". К ней, а если сериализатора нет - вместо
+    нее, добавляется первая строка кода проекта с классом и функцией,
+    например "ratings/models.py:120 Rating.set_level".
+    """
+    base_dir = str(settings.BASE_DIR)
+    fields, location = [], None
+    while frame is not None:
+        code = frame.f_code
+        filename = code.co_filename
+        if (
+            code.co_name == "to_representation"
+            and filename.endswith("rest_framework/serializers.py")
+            and "field" in frame.f_locals
+        ):
+            serializer = type(frame.f_locals["self"]).__name__
+            fields.append(f"{serializer}.{frame.f_locals['field'].field_name}")
+        elif (
+            location is None
+            and filename.startswith(base_dir)
+            and "site-packages" not in filename
+            and not filename.endswith(INTERNAL_FILES)
+        ):
+            owner = frame.f_locals.get("self")
+            function = code.co_name
+            if owner is not None:
+                function = f"{type(owner).__name__}.{function}"
+            path = os.path.relpath(filename, base_dir)
+            location = f"{path}:{frame.f_lineno} {function}"
+        frame = frame.f_back
+    if fields:
+        chain = " > ".join(reversed(fields))
+        return f"{chain} ({location})" if location else chain
+    return location or "неизвестно"
+
+
+@contextmanager
+def detect_queries(threshold=None, slow=None, raise_errors=True, label="блок кода"):
+    """
+    Проверяет блок кода на N+1.
+
+    Используется в тестах и замерах:
+
+        with detect_queries():
+            client.get("/api/v1/quizes/")
+
+    При raise_errors повторяющиеся запросы вызывают NPlusOneError
+    при выходе из блока, иначе записываются в лог.
+    """
+    inspector = QueryInspector(threshold, slow)
+    with inspector.wrap():
+        yield inspector
+    inspector.report(label, raise_errors)
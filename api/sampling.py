@@ -0,0 +1,50 @@
+import threading
+import time
+
+
+class AdaptiveSampler:
+    """
+    Адаптивный traces_sampler для Sentry.
+
+    Доля отбираемых трассировок подстраивается под поток запросов так,
+    чтобы в среднем отбиралось не больше traces_per_second трассировок
+    в секунду на процесс, и не превышает max_rate. Поток оценивается
+    по количеству запросов в текущем и предыдущем окне длиной window
+    секунд. Решение родительской трассировки сохраняется, запросы
+    к ignored_paths не трассируются.
+    """
+
+    def __init__(self, traces_per_second=1, max_rate=1.0, window=10, ignored_paths=()):
+        """Создает сэмплер с пустой статистикой запросов."""
+        self.traces_per_second = traces_per_second
+        self.max_rate = max_rate
+        self.window = window
+        self.ignored_paths = tuple(ignored_paths)
+        self.lock = threading.Lock()
+        self.window_started = time.monotonic()
+        self.current = 0
+        self.previous = 0
+
+    def __call__(self, sampling_context):
+        """Возвращает вероятность отбора трассировки."""
+        environ = sampling_context.get("wsgi_environ") or {}
+        if environ.get("PATH_INFO", "").startswith(self.ignored_paths):
+            return 0
+        parent_sampled = sampling_context.get("parent_sampled")
+        if parent_sampled is not None:
+            return float(parent_sampled)
+        return self.rate()
+
+    def rate(self):
+        """Учитывает запрос и возвращает текущую долю отбора."""
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_started >= self.window:
+                # Окно, в котором запросов не было, обнуляет оценку потока.
+                skipped = now - self.window_started >= 2 * self.window
+                self.previous = 0 if skipped else self.current
+                self.current = 0
+                self.window_started = now
+            self.current += 1
+            requests = max(self.current, self.previous)
+        return min(self.max_rate, self.traces_per_second * self.window / requests)
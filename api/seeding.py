@@ -0,0 +1,460 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+
+from api.cache import SCOPES, bump
+from quizes.answer_keys import invalidate_answer_keys
+from quizes.models import (
+    Answer,
+    AnswerList,
+    AssignedQuiz,
+    Question,
+    Quiz,
+    QuizImage,
+    QuizLevel,
+    Statistic,
+    Tag,
+    UserAnswer,
+    UserQuestion,
+    Volume,
+)
+from ratings.models import Achivement, Rating, UserAchivement, UserLevel
+from user.models import DefaultAvatar, Department, User
+
+# Размеры синтетических организаций для бенчмарков: количество отделов,
+# пользователей и квизов всего, вопросов в квизе и доля квизов отдела,
+# пройденных каждым пользователем.
+SIZES = {
+    "small": {
+        "departments": 2,
+        "users": 10,
+        "quizes": 6,
+        "questions": 4,
+        "attempts": 0.5,
+    },
+    "medium": {
+        "departments": 4,
+        "users": 60,
+        "quizes": 24,
+        "questions": 8,
+        "attempts": 0.5,
+    },
+    "large": {
+        "departments": 8,
+        "users": 320,
+        "quizes": 96,
+        "questions": 16,
+        "attempts": 0.5,
+    },
+}
+# Пароль всех сгенерированных пользователей.
+PASSWORD = "corpquiz"
+BATCH_SIZE = 1000
+# Количество пользователей, прохождения которых создаются одной пачкой.
+USERS_CHUNK_SIZE = 500
+# Количество ответов на вопрос каждого типа.
+ANSWERS_COUNT = 3
+# Распределения доли пройденных пользователем квизов: одинаковая для всех
+# или экспоненциальная с тем же средним (мало активных, много пассивных).
+ACTIVITIES = ("fixed", "exponential")
+
+
+def seed_organization(
+    departments,
+    users,
+    quizes,
+    questions,
+    attempts=0.5,
+    assigned=0.3,
+    right=0.7,
+    incomplete=0.1,
+    skew=0.0,
+    activity="fixed",
+    hash_passwords=False,
+    workers=1,
+    seed=0,
+    progress=None,
+):
+    """
+    Создает синтетическую организацию через bulk_create.
+
+    users и quizes распределяются по отделам пропорционально 1 / n ** skew
+    (при skew=0 - поровну). questions - количество вопросов в квизе или
+    пара (минимум, максимум). attempts и assigned - средние доли квизов
+    отдела, пройденных и назначенных пользователю, right - вероятность
+    правильного ответа, incomplete - доля незавершенных прохождений.
+
+    Пароль PASSWORD хэшируется один раз для всех пользователей, если не
+    передан hash_passwords. Отделы заполняются независимо, в workers
+    процессах (для PostgreSQL). Одинаковый seed дает одинаковые данные
+    при любом количестве процессов. progress вызывается с отчетом по
+    каждому заполненному отделу. Возвращает количество созданных строк
+    по моделям.
+    """
+    if activity not in ACTIVITIES:
+        raise ValueError(f"Неизвестное распределение активности: {activity}.")
+    if isinstance(questions, int):
+        questions = (questions, questions)
+    counts = {}
+    with transaction.atomic():
+        references = _seed_references(departments, hash_passwords, counts)
+        tasks = _plan_departments(departments, users, quizes, skew, counts)
+    options = {
+        "questions": questions,
+        "attempts": attempts,
+        "assigned": assigned,
+        "right": right,
+        "incomplete": incomplete,
+        "activity": activity,
+        "seed": seed,
+        "references": references,
+    }
+    tasks = [{**task, **options} for task in tasks]
+    if workers <= 1:
+        _collect(map(seed_department, tasks), counts, progress)
+    else:
+        # Дочерние процессы должны открыть свои соединения с БД.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            _collect(pool.map(seed_department, tasks), counts, progress)
+    # Данные созданы без сигналов моделей, поэтому кэши сбрасываются явно.
+    for scope in SCOPES:
+        bump(scope)
+    invalidate_answer_keys()
+    return counts
+
+
+def seed_department(task):
+    """
+    Заполняет отдел пользователями, квизами и их прохождениями.
+
+    task - описание отдела из _plan_departments с параметрами генерации.
+    Возвращает название отдела и количество созданных строк по моделям.
+    """
+    rng = random.Random(f"{task['seed']}:{task['number']}")
+    counts = {"department": task["name"]}
+    with transaction.atomic():
+        users = _seed_users(task, counts)
+        quizes = _seed_quizes(task, rng, counts)
+    for start in range(0, len(users), USERS_CHUNK_SIZE):
+        end = start + USERS_CHUNK_SIZE
+        with transaction.atomic():
+            _seed_attempts(users[start:end], quizes, task, rng, counts)
+    return counts
+
+
+def _collect(reports, counts, progress):
+    """Суммирует отчеты по отделам."""
+    for report in reports:
+        for label, count in report.items():
+            if label != "department":
+                counts[label] = counts.get(label, 0) + count
+        if progress:
+            progress(report)
+
+
+def _seed_references(departments, hash_passwords, counts):
+    """
+    Создает справочники: уровни, теги, достижения, аватары и изображения.
+
+    Возвращает id созданных объектов для заполнения отделов.
+    """
+    tags_count = Tag.objects.count()
+    quiz_levels = QuizLevel.objects.bulk_create(
+        QuizLevel(name=name, description=name) for name in ("Легкий", "Сложный")
+    )
+    tags = Tag.objects.bulk_create(
+        Tag(name=f"Тег {tags_count + number}", color="#000000")
+        for number in range(departments)
+    )
+    achivements = Achivement.objects.bulk_create(
+        Achivement(name=name, description=name, **{field: 1})
+        for name, field in (
+            ("Первый квиз", "num_of_completed"),
+            ("Отличник", "num_of_passed"),
+            ("Эрудит", "num_of_right_questions"),
+        )
+    )
+    avatars = DefaultAvatar.objects.bulk_create(
+        DefaultAvatar(avatar=f"predefined_avatars/{number}.png", description="")
+        for number in range(departments)
+    )
+    images = QuizImage.objects.bulk_create(
+        QuizImage(image=f"quizes/image/default/{number}.png", description="")
+        for number in range(departments)
+    )
+    for model, created in (
+        (QuizLevel, quiz_levels),
+        (Tag, tags),
+        (Achivement, achivements),
+        (DefaultAvatar, avatars),
+        (QuizImage, images),
+    ):
+        _add(counts, model, len(created))
+    return {
+        "user_level": UserLevel.get_default(),
+        "quiz_levels": [level.id for level in quiz_levels],
+        "tags": [tag.id for tag in tags],
+        "achivements": [achivement.id for achivement in achivements],
+        "password": None if hash_passwords else make_password(PASSWORD),
+    }
+
+
+def _plan_departments(departments, users, quizes, skew, counts):
+    """
+    Создает отделы и распределяет между ними пользователей и квизы.
+
+    Возвращает описания отделов с количеством пользователей и квизов
+    и номером первого пользователя для уникальных email.
+    """
+    offset = User.objects.count()
+    departments_count = Department.objects.count()
+    weights = [1 / (number + 1) ** skew for number in range(departments)]
+    created = Department.objects.bulk_create(
+        Department(name=f"Отдел {departments_count + number + 1}")
+        for number in range(departments)
+    )
+    _add(counts, Department, len(created))
+    tasks = []
+    for number, (department, users_count, quizes_count) in enumerate(
+        zip(created, _split(users, weights), _split(quizes, weights))
+    ):
+        tasks.append(
+            {
+                "number": number,
+                "department": department.id,
+                "name": department.name,
+                "users": users_count,
+                "quizes": quizes_count,
+                "offset": offset,
+            }
+        )
+        offset += users_count
+    return tasks
+
+
+def _split(total, weights):
+    """Делит total на целые части пропорционально weights."""
+    shares = [total * weight / sum(weights) for weight in weights]
+    parts = [int(share) for share in shares]
+    remainders = sorted(
+        range(len(shares)), key=lambda index: parts[index] - shares[index]
+    )
+    for index in remainders[: total - sum(parts)]:
+        parts[index] += 1
+    return parts
+
+
+def _seed_users(task, counts):
+    """Создает пользователей отдела с достижениями."""
+    references = task["references"]
+    numbers = range(task["offset"], task["offset"] + task["users"])
+    users = User.objects.bulk_create(
+        [
+            User(
+                email=f"user{number}@corpquiz.test",
+                password=references["password"] or make_password(PASSWORD),
+                firstName=f"Имя{number}",
+                lastName=f"Фамилия{number}",
+                position="Сотрудник",
+                department_id=task["department"],
+            )
+            for number in numbers
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    UserAchivement.objects.bulk_create(
+        [
+            UserAchivement(user=user, achivement_id=achivement, points_to_get=1)
+            for user in users
+            for achivement in references["achivements"]
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    _add(counts, User, len(users))
+    _add(counts, UserAchivement, len(users) * len(references["achivements"]))
+    return users
+
+
+def _seed_quizes(task, rng, counts):
+    """Создает квизы отдела с вопросами, ответами и учебными материалами."""
+    references = task["references"]
+    quizes = Quiz.objects.bulk_create(
+        Quiz(
+            name=f"Квиз {task['number'] + 1}-{number + 1}",
+            description="Описание квиза",
+            directory_id=task["department"],
+            level_id=rng.choice(references["quiz_levels"]),
+            duration=rng.randint(5, 30),
+        )
+        for number in range(task["quizes"])
+    )
+    Quiz.tags.through.objects.bulk_create(
+        Quiz.tags.through(quiz=quiz, tag_id=rng.choice(references["tags"]))
+        for quiz in quizes
+    )
+    Volume.objects.bulk_create(
+        Volume(quiz=quiz, name="Учебный материал", description="Описание")
+        for quiz in quizes
+    )
+    questions = Question.objects.bulk_create(
+        [
+            Question(
+                quiz=quiz,
+                text=f"Вопрос {number + 1}",
+                question_type=rng.choice(Question.TypeChoices.values),
+            )
+            for quiz in quizes
+            for number in range(rng.randint(*task["questions"]))
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    answers = Answer.objects.bulk_create(
+        [
+            Answer(
+                question=question,
+                text=f"Ответ {number + 1}",
+                is_right=number == 0
+                or (number == 1 and question.question_type == "MNY"),
+            )
+            for question in questions
+            for number in range(ANSWERS_COUNT)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    answers_lists = AnswerList.objects.bulk_create(
+        [
+            AnswerList(answer=answer, text=f"Элемент {answer.text}")
+            for answer in answers
+            if answer.question.question_type == Question.TypeChoices.LIST
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    for quiz in quizes:
+        quiz.seeded_questions = []
+    for question in questions:
+        question.seeded_answers = []
+        question.quiz.seeded_questions.append(question)
+    for answer in answers:
+        answer.question.seeded_answers.append(answer)
+    _add(counts, Quiz, len(quizes))
+    _add(counts, Quiz.tags.through, len(quizes))
+    _add(counts, Volume, len(quizes))
+    _add(counts, Question, len(questions))
+    _add(counts, Answer, len(answers))
+    _add(counts, AnswerList, len(answers_lists))
+    return quizes
+
+
+def _seed_attempts(users, quizes, task, rng, counts):
+    """
+    Создает назначения, прохождения квизов и рейтинги пачки пользователей.
+
+    Завершенное прохождение содержит ответы на все вопросы квиза,
+    незавершенное - на часть вопросов. Рейтинги создаются сразу
+    со счетчиками по созданной статистике.
+    """
+    assignments, statistics, user_questions = [], [], []
+    for user in users:
+        assigned = {quiz.id for quiz in _sample(rng, quizes, task["assigned"])}
+        assignments.extend(AssignedQuiz(user=user, quiz_id=quiz) for quiz in assigned)
+        share = task["attempts"]
+        if task["activity"] == "exponential" and share:
+            share = min(rng.expovariate(1 / share), 1)
+        for quiz in _sample(rng, quizes, share):
+            statistic = Statistic(user=user, quiz=quiz)
+            questions = quiz.seeded_questions
+            if questions and rng.random() < task["incomplete"]:
+                questions = questions[: rng.randrange(len(questions))]
+            statistic.seeded_questions = [
+                _user_question(statistic, question, task, rng) for question in questions
+            ]
+            _set_counters(statistic, quiz, quiz.id in assigned)
+            statistics.append(statistic)
+    AssignedQuiz.objects.bulk_create(assignments, batch_size=BATCH_SIZE)
+    Statistic.objects.bulk_create(statistics, batch_size=BATCH_SIZE)
+    for statistic in statistics:
+        for user_question in statistic.seeded_questions:
+            user_question.statistic = statistic
+            user_questions.append(user_question)
+    UserQuestion.objects.bulk_create(user_questions, batch_size=BATCH_SIZE)
+    UserAnswer.objects.bulk_create(
+        [
+            UserAnswer(
+                user_question=user_question,
+                answer=user_question.seeded_answer,
+                answer_text=user_question.seeded_answer.text,
+            )
+            for user_question in user_questions
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    Rating.objects.bulk_create(
+        _build_ratings(users, statistics, task), batch_size=BATCH_SIZE
+    )
+    _add(counts, Rating, len(users))
+    _add(counts, AssignedQuiz, len(assignments))
+    _add(counts, Statistic, len(statistics))
+    _add(counts, UserQuestion, len(user_questions))
+    _add(counts, UserAnswer, len(user_questions))
+
+
+def _user_question(statistic, question, task, rng):
+    """Возвращает ответ пользователя на вопрос, верный с вероятностью right."""
+    is_right = rng.random() < task["right"]
+    user_question = UserQuestion(
+        statistic=statistic,
+        question=question,
+        response_time=rng.randint(3, 60),
+        is_right=is_right,
+    )
+    user_question.seeded_answer = question.seeded_answers[0 if is_right else -1]
+    return user_question
+
+
+def _set_counters(statistic, quiz, is_assigned):
+    """Заполняет счетчики и статусы статистики по ответам."""
+    user_questions = statistic.seeded_questions
+    statistic.count_questions = len(quiz.seeded_questions)
+    statistic.count_answered = len(user_questions)
+    statistic.count_right = sum(item.is_right for item in user_questions)
+    statistic.count_wrong = statistic.count_answered - statistic.count_right
+    statistic.quiz_time = sum(item.response_time for item in user_questions)
+    to_passed = int(statistic.count_questions / 100 * quiz.threshold)
+    statistic.is_completed = statistic.count_answered == statistic.count_questions
+    statistic.is_passed = statistic.is_completed and statistic.count_right >= to_passed
+    statistic.is_failed = statistic.is_completed and not statistic.is_passed
+    statistic.is_assigned = is_assigned
+
+
+def _build_ratings(users, statistics, task):
+    """Возвращает рейтинги пользователей, посчитанные по их статистике."""
+    ratings = {
+        user.id: Rating(
+            user=user,
+            user_level_id=task["references"]["user_level"],
+            department_id=task["department"],
+        )
+        for user in users
+    }
+    for statistic in statistics:
+        rating = ratings[statistic.user_id]
+        for field, value in statistic.rating_contribution().items():
+            setattr(rating, field, getattr(rating, field) + value)
+    for rating in ratings.values():
+        rating.user_rating = max(rating.right_questions - rating.wrong_questions, 0)
+    return ratings.values()
+
+
+def _sample(rng, items, share):
+    """Возвращает случайную долю share элементов items."""
+    return rng.sample(items, round(len(items) * share))
+
+
+def _add(counts, model, count):
+    """Прибавляет количество созданных строк модели к отчету."""
+    label = model._meta.label
+    counts[label] = counts.get(label, 0) + count
@@ -0,0 +1,86 @@
+import pytest
+
+from api.cache import get_versions
+from api.checks import check_shared_cache
+from quizes.models import Question
+
+CATALOG_URL = "/api/v1/quizes/"
+
+
+def _question_amount(response, quiz):
+    """Возвращает количество вопросов квиза из ответа каталога."""
+    return next(item for item in response.data if item["id"] == quiz.id)[
+        "question_amount"
+    ]
+
+
+@pytest.mark.django_db
+def test_unchanged_catalog_returns_not_modified(employee, api_client):
+    """Повторный условный запрос к неизменившемуся каталогу получает 304."""
+    client = api_client(employee)
+    response = client.get(CATALOG_URL)
+
+    assert response.status_code == 200
+    response = client.get(CATALOG_URL, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 304
+
+
+@pytest.mark.django_db
+def test_questions_list_resets_catalog(
+    employee, admin, quiz, api_client, django_capture_on_commit_callbacks
+):
+    """Вопросы, созданные пачкой через админку, сразу видны в каталоге."""
+    client = api_client(employee)
+    response = client.get(CATALOG_URL)
+    etag, amount = response["ETag"], _question_amount(response, quiz)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        created = api_client(admin).post(
+            f"/api/v1/admin/quizes/{quiz.id}/questions_list/",
+            [
+                {
+                    "question_type": Question.TypeChoices.ONE,
+                    "text": "Новый вопрос",
+                    "answers": [{"text": "Ответ"}],
+                }
+            ],
+            format="json",
+        )
+    assert created.status_code == 201
+
+    response = client.get(CATALOG_URL, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert _question_amount(response, quiz) == amount + 1
+
+
+@pytest.mark.django_db
+def test_update_answers_resets_catalog(quiz, django_capture_on_commit_callbacks):
+    """Изменение ответов вопроса через bulk_update сбрасывает версию каталога."""
+    question = quiz.questions.order_by("id").first()
+    answers = [
+        {"id": answer.id, "text": f"{answer.text} (изменен)"}
+        for answer in question.answers.all()
+    ]
+    before = get_versions("quizes")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        question.update_answers(answers)
+
+    assert get_versions("quizes") != before
+    assert set(question.answers.values_list("text", flat=True)) == {
+        answer["text"] for answer in answers
+    }
+
+
+@pytest.mark.parametrize(
+    "backend, warnings",
+    [
+        ("django.core.cache.backends.locmem.LocMemCache", ["api.W001"]),
+        ("django.core.cache.backends.filebased.FileBasedCache", []),
+    ],
+)
+def test_shared_cache_check(settings, tmp_path, backend, warnings):
+    """Кэш в памяти процесса вызывает предупреждение проверки настроек."""
+    settings.CACHES = {"default": {"BACKEND": backend, "LOCATION": str(tmp_path)}}
+    assert [warning.id for warning in check_shared_cache(None)] == warnings
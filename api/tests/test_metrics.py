@@ -0,0 +1,135 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.serializers import BaseSerializer
+
+from api.metrics import (
+    DURATION_BUCKETS,
+    Registry,
+    RequestMetrics,
+    finish_request,
+    install,
+    registry,
+    start_request,
+)
+from user.serializers import UserSerializer
+
+# Строка значения в текстовом формате Prometheus: имя{метки} значение.
+SAMPLE = re.compile(r'^corpquiz_\w+\{(\w+="(?:[^"\\]|\\.)*",?)+\} [\d.]+$')
+
+
+def _metrics(queries=0, db_time=0.0, serializer_time=0.0):
+    """Возвращает замеры запроса с заданными значениями."""
+    metrics = RequestMetrics()
+    metrics.queries = queries
+    metrics.db_time = db_time
+    metrics.serializer_time = serializer_time
+    return metrics
+
+
+def _samples(text):
+    """Возвращает значения метрик по строкам без комментариев."""
+    return dict(
+        line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#")
+    )
+
+
+def _bucket(samples, labels, bound):
+    """Возвращает значение корзины гистограммы длительности."""
+    name = "corpquiz_request_duration_seconds_bucket"
+    return samples[f'{name}{{{labels},le="{bound}"}}']
+
+
+def test_export_prometheus_format():
+    """Выгрузка соответствует текстовому формату Prometheus."""
+    metrics = Registry()
+    metrics.observe("quizes", "GET", 200, _metrics(3, 0.002, 0.001), 0.02, 100)
+    metrics.observe("quizes", "GET", 200, _metrics(1), 0.3, 50)
+    metrics.observe('view "\\name"', "POST", 400, _metrics(), 20, 0)
+
+    text = metrics.export()
+
+    assert text.endswith("\n")
+    for line in text.splitlines():
+        assert line.startswith(("# HELP ", "# TYPE ")) or SAMPLE.match(line), line
+    samples = _samples(text)
+    labels = 'view="quizes",method="GET"'
+    assert samples[f'corpquiz_requests_total{{{labels},status="200"}}'] == "2"
+    buckets = [_bucket(samples, labels, bound) for bound in DURATION_BUCKETS]
+    # Корзины гистограммы накопительные.
+    assert buckets == ["0", "1", "1", "1", "1", "2", "2", "2", "2", "2"]
+    assert _bucket(samples, labels, "+Inf") == "2"
+    assert samples[f"corpquiz_request_duration_seconds_count{{{labels}}}"] == "2"
+    assert samples[f"corpquiz_request_duration_seconds_sum{{{labels}}}"] == "0.320000"
+    assert samples[f"corpquiz_db_queries_total{{{labels}}}"] == "4"
+    assert samples[f"corpquiz_response_bytes_total{{{labels}}}"] == "150"
+    # Кавычки и обратная косая черта в метках экранируются, а запрос длиннее
+    # последней границы попадает только в +Inf.
+    escaped = 'view="view \\"\\\\name\\"",method="POST"'
+    assert _bucket(samples, escaped, 10) == "0"
+    assert _bucket(samples, escaped, "+Inf") == "1"
+
+
+@pytest.mark.django_db
+def test_install_twice_wraps_once(employee):
+    """Повторный install не оборачивает методы сериализаторов дважды."""
+    is_valid, data = BaseSerializer.is_valid, BaseSerializer.data
+
+    install()
+
+    assert BaseSerializer.is_valid is is_valid
+    assert BaseSerializer.data is data
+    assert not hasattr(BaseSerializer.is_valid.__wrapped__, "__wrapped__")
+    assert not hasattr(BaseSerializer.data.fget.__wrapped__, "__wrapped__")
+    metrics, token = start_request()
+    try:
+        UserSerializer(employee).data
+    finally:
+        finish_request(token)
+    assert metrics.serializer_time > 0
+    assert metrics.serializer_depth == 0
+
+
+@pytest.fixture
+def clean_registry():
+    """Обнуляет накопленные метрики до и после теста."""
+    registry.reset()
+    yield registry
+    registry.reset()
+
+
+@pytest.mark.django_db
+def test_performance_middleware(employee, api_client, settings, clean_registry):
+    """Middleware добавляет Server-Timing и учитывает запрос в метриках."""
+    settings.SERVER_TIMING = True
+    client = api_client(employee)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/api/v1/users/me/")
+
+    assert response.status_code == 200
+    timing = response["Server-Timing"]
+    assert f'desc="{len(queries)} queries"' in timing
+    assert re.fullmatch(
+        r'db;dur=[\d.]+;desc="\d+ queries", serializer;dur=[\d.]+, total;dur=[\d.]+',
+        timing,
+    )
+    view = response.resolver_match.view_name
+    samples = _samples(clean_registry.export())
+    labels = f'view="{view}",method="GET"'
+    assert samples[f'corpquiz_requests_total{{{labels},status="200"}}'] == "1"
+    assert samples[f"corpquiz_db_queries_total{{{labels}}}"] == str(len(queries))
+    assert samples[f"corpquiz_response_bytes_total{{{labels}}}"] == str(
+        len(response.content)
+    )
+
+
+@pytest.mark.django_db
+def test_server_timing_disabled(employee, api_client, clean_registry):
+    """Без SERVER_TIMING заголовок не добавляется, но метрики собираются."""
+    response = api_client(employee).get("/api/v1/users/me/")
+
+    assert "Server-Timing" not in response
+    assert "corpquiz_requests_total{" in clean_registry.export()
@@ -0,0 +1,56 @@
+import pytest
+
+from api.queries import NPlusOneError, detect_queries, fingerprint
+from quizes.models import Quiz
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        (
+            "SELECT * FROM quiz WHERE id = 1 AND name = 'Первый'",
+            "SELECT * FROM quiz WHERE id = 25 AND name = 'It''s'",
+        ),
+        (
+            "SELECT * FROM quiz WHERE id IN (1, 2, 3)",
+            "SELECT * FROM quiz WHERE id IN (%s)",
+        ),
+        (
+            "INSERT INTO tag (name, color) VALUES (%s, %s), (%s, %s)",
+            "INSERT INTO tag (name, color) VALUES ('a', '#fff')",
+        ),
+        (
+            "SELECT *\n  FROM quiz\n WHERE threshold > 0.5",
+            "SELECT * FROM quiz WHERE threshold > ?",
+        ),
+    ],
+)
+def test_fingerprint_ignores_values(first, second):
+    """Запросы, отличающиеся только значениями, получают одну форму."""
+    assert fingerprint(first) == fingerprint(second)
+
+
+def test_fingerprint_keeps_structure():
+    """Запросы к разным таблицам и полям различаются."""
+    assert fingerprint("SELECT * FROM quiz WHERE id = 1") != fingerprint(
+        "SELECT * FROM tag WHERE id = 1"
+    )
+
+
+@pytest.mark.django_db
+def test_repeated_queries_raise():
+    """Одинаковые запросы в цикле считаются N+1."""
+    with pytest.raises(NPlusOneError, match="test_queries.py"):
+        with detect_queries(threshold=5):
+            for pk in range(5):
+                list(Quiz.objects.filter(pk=pk))
+
+
+@pytest.mark.django_db
+def test_queries_below_threshold_pass():
+    """Повторы меньше порога не считаются N+1."""
+    with detect_queries(threshold=5) as inspector:
+        for pk in range(4):
+            list(Quiz.objects.filter(pk=pk))
+
+    assert inspector.repeated() == []
@@ -0,0 +1,57 @@
+import pytest
+
+from api.benchmark import ENDPOINTS, build_request, prepare_scenario, send_request
+from api.queries import detect_queries
+from api.seeding import SIZES
+
+# Допустимое количество запросов к БД для каждого эндпоинта из ENDPOINTS.
+# Количество не должно зависеть от объема данных.
+QUERY_BUDGETS = {
+    "quizes/": 6,
+    "quizes/{quiz}/": 6,
+    "quizes/not_complited/": 6,
+    "quizes/{passed}/statistic": 5,
+    "quizes/{quiz}/answer/": 25,
+    "quizes/{quiz}/answer/batch/": 26,
+    "users/me/": 1,
+    "users/avatar/": 1,
+    "users/achivements/": 4,
+    "users/achivements/short/": 4,
+    "users/ratings/": 1,
+    "users/ratings/short/": 1,
+    "users/ratings/me/": 2,
+    "users/ratings/around/": 4,
+    "admin/quizes/": 6,
+    "admin/quizes/{quiz}/": 6,
+    "admin/quizes/{quiz}/questions/": 3,
+    "admin/quizes/{quiz}/volumes/": 1,
+    "admin/quizes/export/?ids={quiz}": 6,
+    "admin/quizes/images/": 1,
+    "admin/quizes/assigned/": 1,
+    "admin/levels/": 1,
+    "admin/tags/": 1,
+    "admin/users/": 1,
+    "admin/users/{user}/": 1,
+    "admin/users/departments/": 1,
+    "admin/users/me/": 0,
+    "admin/cache/stats/": 0,
+}
+
+
+def test_every_endpoint_has_budget():
+    """Каждый замеряемый эндпоинт имеет допустимое количество запросов."""
+    assert {path for _, _, path in ENDPOINTS} == QUERY_BUDGETS.keys()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", ["small", "medium"])
+def test_query_counts(size, django_assert_max_num_queries):
+    """Эндпоинты укладываются в бюджет запросов на любом объеме и не содержат N+1."""
+    scenario = prepare_scenario(size, SIZES[size])
+    for role, method, path in ENDPOINTS:
+        client, url, data = build_request(scenario, role, method, path)
+        label = f"{method.upper()} {url} ({size})"
+        with django_assert_max_num_queries(QUERY_BUDGETS[path], info=label):
+            with detect_queries(label=label):
+                response = send_request(client, method, url, data)
+        assert response.status_code < 400, url
@@ -0,0 +1,68 @@
+from unittest.mock import patch
+
+import pytest
+
+from api.sampling import AdaptiveSampler
+
+
+@pytest.fixture
+def clock():
+    """Подменяет часы сэмплера, время задается через clock.now."""
+
+    class Clock:
+        now = 1000.0
+
+        def __call__(self):
+            return self.now
+
+    clock = Clock()
+    with patch("api.sampling.time.monotonic", clock):
+        yield clock
+
+
+def _rates(sampler, count):
+    """Возвращает доли отбора для count запросов подряд."""
+    return [sampler({}) for _ in range(count)]
+
+
+def test_rate_follows_request_flow(clock):
+    """Доля отбора ограничивает количество трассировок в окне."""
+    sampler = AdaptiveSampler(traces_per_second=1, window=10)
+
+    rates = _rates(sampler, 20)
+
+    # В окне отбирается около traces_per_second * window трассировок.
+    assert rates[:10] == [1.0] * 10
+    assert rates[-1] == 0.5
+    assert 9 < sum(rates) < 17
+
+    # Следующее окно начинается с оценки по предыдущему.
+    clock.now += 10
+    assert _rates(sampler, 1) == [0.5]
+
+
+def test_rate_recovers_after_idle_window(clock):
+    """Окно без запросов сбрасывает оценку потока."""
+    sampler = AdaptiveSampler(traces_per_second=1, window=10)
+    _rates(sampler, 100)
+
+    clock.now += 20
+
+    assert _rates(sampler, 1) == [1.0]
+
+
+def test_rate_is_capped(clock):
+    """Доля отбора не превышает max_rate."""
+    sampler = AdaptiveSampler(traces_per_second=1, max_rate=0.2, window=10)
+
+    assert set(_rates(sampler, 10)) == {0.2}
+
+
+def test_parent_decision_and_ignored_paths(clock):
+    """Решение родительской трассировки сохраняется, пути из списка не отбираются."""
+    sampler = AdaptiveSampler(ignored_paths=["/api/v1/admin/metrics/"])
+
+    assert sampler({"parent_sampled": False}) == 0.0
+    assert sampler({"parent_sampled": True}) == 1.0
+    assert sampler({"wsgi_environ": {"PATH_INFO": "/api/v1/admin/metrics/"}}) == 0
+    assert sampler({"wsgi_environ": {"PATH_INFO": "/api/v1/quizes/"}}) == 1.0
@@ -1,3 +1,39 @@
-from django.shortcuts import render
+from django.http import HttpResponse
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from api.cache import get_stats, reset_stats
+from api.metrics import registry
+
+
+class CacheStatsAPIView(APIView):
+    """Представление для просмотра счетчиков кэша ответов API."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """Возвращает попадания и промахи кэша по областям."""
+        return Response(data=get_stats(), status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        """Обнуляет счетчики кэша."""
+        reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class MetricsAPIView(APIView):
+    """Представление для выгрузки метрик производительности в Prometheus."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """Возвращает метрики запросов по представлениям."""
+        return HttpResponse(
+            registry.export(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+    def delete(self, request):
+        """Обнуляет метрики."""
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
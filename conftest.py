@@ -0,0 +1,94 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from api.seeding import SIZES, seed_organization
+from quizes.models import Quiz
+from ratings.models import Rating
+from user.models import Department, User
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(settings):
+    """
+    Подключает кэш в памяти и очищает его.
+
+    Тесты выполняются в одном процессе, а ответы и ключи ответов
+    не переходят между тестами.
+    """
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def fast_password_hasher(settings):
+    """Ускоряет тесты, создающие пользователей с паролями."""
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+@pytest.fixture(autouse=True)
+def raise_on_repeated_queries(settings):
+    """Завершает ошибкой запросы к API с N+1 (см. QueryInspectionMiddleware)."""
+    settings.QUERY_INSPECTION = "raise"
+
+
+@pytest.fixture
+def organization(db, request):
+    """
+    Заполняет БД организацией через api.seeding.
+
+    Размер из SIZES передается параметром фикстуры (по умолчанию small).
+    """
+    size = getattr(request, "param", "small")
+    seed_organization(**SIZES[size])
+    return size
+
+
+@pytest.fixture
+def employee(organization):
+    """Возвращает нового сотрудника первого отдела без истории прохождений."""
+    return _create_user("employee@corpquiz.test", User.UserRoleChoice.EMPLOYEE)
+
+
+@pytest.fixture
+def admin(organization):
+    """Возвращает администратора."""
+    return _create_user("admin@corpquiz.test", User.UserRoleChoice.ADMIN)
+
+
+@pytest.fixture
+def quiz(employee):
+    """Возвращает первый квиз отдела сотрудника."""
+    return Quiz.objects.filter(directory=employee.department).order_by("id").first()
+
+
+@pytest.fixture
+def api_client():
+    """Возвращает фабрику клиентов API, авторизованных как user."""
+
+    def make(user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    return make
+
+
+def _create_user(email, role):
+    """Создает пользователя первого отдела с рейтингом."""
+    user = User.objects.create_user(
+        email=email,
+        password=None,
+        firstName="Тест",
+        lastName=role,
+        position=role,
+        role=role,
+        is_staff=role == User.UserRoleChoice.ADMIN,
+        department=Department.objects.order_by("id").first(),
+    )
+    Rating.objects.get_or_create(user=user)
+    return user
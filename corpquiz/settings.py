@@ -16,6 +16,8 @@ from pathlib import Path
 import sentry_sdk
 from sentry_sdk.integrations.django import DjangoIntegration
 
+from api.sampling import AdaptiveSampler
+
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -73,6 +75,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    "api.middleware.PerformanceMiddleware",
+    "api.middleware.QueryInspectionMiddleware",
 ]
 
 ROOT_URLCONF = 'corpquiz.urls'
@@ -111,6 +115,29 @@ DATABASES = {
     }
 }
 
+# Кэш: file (по умолчанию), redis (нужен пакет redis) или locmem.
+# Версии кэша (api.cache, ключи ответов) должны быть общими для всех
+# процессов сервера и команд управления, поэтому locmem подходит только
+# для одного процесса.
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "file")
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": os.getenv(
+            "CACHE_LOCATION",
+            {"file": str(BASE_DIR / "cache"), "redis": "redis://127.0.0.1:6379"}.get(
+                CACHE_BACKEND, ""
+            ),
+        ),
+        "KEY_PREFIX": os.getenv("CACHE_KEY_PREFIX", "corpquiz"),
+    }
+}
 
 
 # Password validation
@@ -170,6 +197,19 @@ SIMPLE_JWT = {
 
 AUTH_USER_MODEL = 'user.CustomUser'
 
+# Количество процессов для хэширования паролей при импорте сотрудников.
+USER_IMPORT_WORKERS = int(os.getenv("USER_IMPORT_WORKERS", os.cpu_count() or 1))
+
+# Время жизни кэша профиля пользователя (/users/me/) в секундах.
+PROFILE_CACHE_TIMEOUT = int(os.getenv("PROFILE_CACHE_TIMEOUT", 300))
+
+# Время жизни закэшированных ответов API (каталог, справочники, рейтинг)
+# в секундах. Устаревшие ответы сбрасываются сигналами моделей раньше.
+API_CACHE_TIMEOUT = int(os.getenv("API_CACHE_TIMEOUT", 300))
+
+# Время жизни скомпилированного ключа ответов квиза в общем кэше в секундах.
+ANSWER_KEY_CACHE_TIMEOUT = int(os.getenv("ANSWER_KEY_CACHE_TIMEOUT", 60 * 60))
+
 EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.filebased.EmailBackend')
 EMAIL_HOST = os.getenv('EMAIL_HOST')
 EMAIL_PORT = os.getenv('EMAIL_PORT')
@@ -183,16 +223,46 @@ EMAIL_SERVER = EMAIL_HOST_USER
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 EMAIL_ADMIN = EMAIL_HOST_USER
 
+# Очередь исходящих писем (команда send_mail_queue)
+MAIL_QUEUE_BATCH_SIZE = int(os.getenv("MAIL_QUEUE_BATCH_SIZE", 100))
+MAIL_QUEUE_MAX_ATTEMPTS = int(os.getenv("MAIL_QUEUE_MAX_ATTEMPTS", 5))
+# Задержка перед первой повторной попыткой в секундах, далее удваивается.
+MAIL_QUEUE_RETRY_DELAY = int(os.getenv("MAIL_QUEUE_RETRY_DELAY", 60))
+# Через сколько секунд захваченное, но не отправленное письмо захватывается снова.
+MAIL_QUEUE_SENDING_TIMEOUT = int(os.getenv("MAIL_QUEUE_SENDING_TIMEOUT", 600))
+
 CORS_ORIGIN_ALLOW_ALL = True
 CORS_URLS_REGEX = r'^/api/.*$'
 CORS_ALLOW_CREDENTIALS = True
+# ETag нужен клиентам для условных запросов к каталогу и справочникам,
+# Server-Timing - для просмотра замеров запроса в браузере.
+CORS_EXPOSE_HEADERS = ["ETag", "Server-Timing"]
+
+# Добавлять ли в ответы заголовок Server-Timing с замерами запроса.
+# Заголовок раскрывает время работы сервера, поэтому включается явно.
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+# Поиск N+1 в запросах к API: "off", "log" или "raise". Одинаковые
+# по форме запросы к БД, повторившиеся QUERY_REPEAT_THRESHOLD раз,
+# считаются N+1, запросы дольше SLOW_QUERY_THRESHOLD мс - медленными.
+# DEBUG включен и на сервере, поэтому проверка включается только явно.
+QUERY_INSPECTION = os.getenv("QUERY_INSPECTION", "off")
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", 5))
+SLOW_QUERY_THRESHOLD = int(os.getenv("SLOW_QUERY_THRESHOLD", 100))
 
 # Sentry
 
+# Трассировки отбираются адаптивно: не больше SENTRY_TRACES_PER_SECOND
+# в секунду на процесс и не чаще SENTRY_TRACES_SAMPLE_RATE. Профили
+# снимаются для доли SENTRY_PROFILES_SAMPLE_RATE отобранных трассировок.
 sentry_sdk.init(
     dsn=os.getenv('SENTRY_DSN'),
     integrations=[DjangoIntegration()],
     send_default_pii=True,
-    traces_sample_rate=1.0,
-    profiles_sample_rate=1.0,
+    traces_sampler=AdaptiveSampler(
+        traces_per_second=float(os.getenv("SENTRY_TRACES_PER_SECOND", 1)),
+        max_rate=float(os.getenv("SENTRY_TRACES_SAMPLE_RATE", 1.0)),
+        ignored_paths=["/api/v1/admin/metrics/"],
+    ),
+    profiles_sample_rate=float(os.getenv("SENTRY_PROFILES_SAMPLE_RATE", 0.1)),
 )
@@ -0,0 +1,165 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from quizes.models import Answer, AnswerList, Question
+
+# Ключ общего кэша с текущей версией ключей ответов.
+VERSION_CACHE_KEY = "answer-keys-version"
+
+# Скомпилированные ключи ответов процесса:
+# {quiz_id: (версия, ключ, время компиляции)}.
+_compiled = {}
+
+
+def compile_answer_key(quiz_id):
+    """
+    Собирает ключ ответов квиза из БД.
+
+    Возвращает словарь {question_id: {...}} с типом вопроса, id всех
+    и правильных ответов, текстом первого ответа для открытого вопроса
+    и соответствием элементов списка ответам.
+    """
+    key = {
+        question_id: {
+            "type": question_type,
+            "answers": set(),
+            "right": set(),
+            "text": None,
+            "lists": {},
+        }
+        for question_id, question_type in Question.objects.filter(
+            quiz_id=quiz_id
+        ).values_list("id", "question_type")
+    }
+    answers = (
+        Answer.objects.filter(question__quiz_id=quiz_id)
+        .order_by("id")
+        .values_list("id", "question_id", "text", "is_right")
+    )
+    for answer_id, question_id, text, is_right in answers:
+        entry = key[question_id]
+        entry["answers"].add(answer_id)
+        if entry["text"] is None:
+            entry["text"] = text
+        if is_right:
+            entry["right"].add(answer_id)
+    answers_lists = AnswerList.objects.filter(
+        answer__question__quiz_id=quiz_id
+    ).values_list("id", "answer_id", "answer__question_id")
+    for answer_list_id, answer_id, question_id in answers_lists:
+        key[question_id]["lists"][answer_list_id] = answer_id
+    return key
+
+
+def get_answer_key(quiz_id, refresh=False):
+    """
+    Возвращает ключ ответов квиза.
+
+    Ключ хранится в памяти процесса и в общем кэше под текущей версией,
+    поэтому БД запрашивается только после изменения вопросов. Копия
+    в памяти процесса живет не дольше ANSWER_KEY_CACHE_TIMEOUT: без общего
+    кэша версия, измененная другим процессом, сюда не доходит.
+    """
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_CACHE_KEY)
+    now = time.monotonic()
+    compiled = _compiled.get(quiz_id)
+    if (
+        compiled
+        and compiled[0] == version
+        and now - compiled[2] < settings.ANSWER_KEY_CACHE_TIMEOUT
+        and not refresh
+    ):
+        return compiled[1]
+    cache_key = f"answer-key-{quiz_id}-{version}"
+    key = None if refresh else cache.get(cache_key)
+    if key is None:
+        key = compile_answer_key(quiz_id)
+        cache.set(cache_key, key, settings.ANSWER_KEY_CACHE_TIMEOUT)
+    _compiled[quiz_id] = (version, key, now)
+    return key
+
+
+def get_question_keys(quiz_id, question_ids):
+    """
+    Возвращает ключи ответов для вопросов квиза по их id.
+
+    Если каких-то вопросов квиза нет в ключе, он один раз компилируется
+    заново: вопросы могли быть добавлены после компиляции. Несуществующие
+    вопросы и вопросы другого квиза ключ не обновляют и в результат
+    не попадают.
+    """
+    key = get_answer_key(quiz_id)
+    missing = set(question_ids) - key.keys()
+    if missing and Question.objects.filter(quiz_id=quiz_id, id__in=missing).exists():
+        key = get_answer_key(quiz_id, refresh=True)
+    return {
+        question_id: key[question_id]
+        for question_id in question_ids
+        if question_id in key
+    }
+
+
+def invalidate_answer_keys():
+    """Сбрасывает ключи ответов после фиксации транзакции."""
+    transaction.on_commit(lambda: cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, None))
+
+
+def check_answer(question, answers):
+    """
+    Проверяет ответ пользователя на вопрос по ключу ответов квиза.
+
+    answers - список ответов в формате запроса: id ответа в answer,
+    текст в answer_text и элементы списка в answer_list.
+    """
+    entry = get_question_keys(question.quiz_id, [question.id]).get(question.id)
+    return grade(entry, answers)
+
+
+def has_answers(entry, answers):
+    """Проверяет, что ответы и элементы их списков относятся к вопросу entry."""
+    return all(
+        _id(answer.get("answer")) in entry["answers"]
+        and all(
+            _id(item.get("answer_list")) in entry["lists"]
+            for item in answer.get("answer_list", [])
+        )
+        for answer in answers
+    )
+
+
+def grade(entry, answers):
+    """Проверяет ответы по ключу вопроса entry без обращений к БД."""
+    if entry is None or not answers:
+        return False
+    if entry["type"] == Question.TypeChoices.ONE:
+        return _id(answers[0].get("answer")) in entry["right"]
+    if entry["type"] == Question.TypeChoices.MANY:
+        chosen = [
+            answer for answer in answers if _id(answer.get("answer")) in entry["right"]
+        ]
+        return len(chosen) == len(entry["right"])
+    if entry["type"] == Question.TypeChoices.OPEN:
+        return answers[0].get("answer_text", "") == entry["text"]
+    if entry["type"] == Question.TypeChoices.LIST:
+        return all(
+            entry["lists"].get(_id(item.get("answer_list")))
+            == _id(answer.get("answer"))
+            for answer in answers
+            for item in answer.get("answer_list", [])
+        )
+    return False
+
+
+def _id(value):
+    """Приводит id из данных запроса к числу."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
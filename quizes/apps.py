@@ -6,3 +6,7 @@ class QuizesConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "quizes"
+
+    def ready(self):
+        """Подключает сигналы приложения."""
+        from . import signals  # noqa: F401
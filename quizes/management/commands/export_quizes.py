@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from quizes.models import Quiz
+from quizes.transfer import compress, export_quizes
+
+
+class Command(BaseCommand):
+    """Команда для выгрузки квизов со всеми вложенными объектами."""
+
+    help = "Выгружает квизы в формате NDJSON (с ключом --gzip - в сжатом виде)."
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы команды."""
+        parser.add_argument(
+            "ids", nargs="*", type=int, help="id квизов (по умолчанию все)."
+        )
+        parser.add_argument(
+            "--output", help="Путь к файлу выгрузки (по умолчанию stdout)."
+        )
+        parser.add_argument("--gzip", action="store_true", help="Сжать выгрузку gzip.")
+
+    def handle(self, *args, **options):
+        """Записывает выгрузку в файл или stdout."""
+        quizes = Quiz.objects.all()
+        if options["ids"]:
+            quizes = quizes.filter(id__in=options["ids"])
+        lines = export_quizes(quizes)
+        if options["gzip"]:
+            lines = compress(lines)
+        if options["output"]:
+            with open(options["output"], "wb") as output:
+                output.writelines(lines)
+        else:
+            sys.stdout.buffer.writelines(lines)
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from quizes.transfer import import_quizes, read_lines
+from user.models import Department
+
+
+class Command(BaseCommand):
+    """Команда для загрузки квизов из выгрузки."""
+
+    help = "Загружает квизы из файла NDJSON (в том числе сжатого gzip)."
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы команды."""
+        parser.add_argument("path", help="Путь к файлу выгрузки.")
+        parser.add_argument(
+            "--directory",
+            type=int,
+            default=None,
+            help="id отдела, в который копируются квизы.",
+        )
+
+    def handle(self, *args, **options):
+        """Загружает квизы и выводит количество созданных и пропущенных."""
+        directory = None
+        if options["directory"]:
+            directory = Department.objects.filter(id=options["directory"]).first()
+            if directory is None:
+                raise CommandError(f"Отдел {options['directory']} не найден.")
+        try:
+            with open(options["path"], "rb") as file:
+                report = import_quizes(read_lines(file), directory=directory)
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Создано квизов: {len(report['created'])}, "
+                f"пропущено: {len(report['skipped'])}"
+            )
+        )
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.2 on 2026-10-18 02:49
+
+from django.db import migrations, models
+
+
+def remove_duplicate_assignments(apps, schema_editor):
+    """Удаляет повторные назначения, оставляя самое раннее."""
+    AssignedQuiz = apps.get_model('quizes', 'AssignedQuiz')
+    duplicates = (
+        AssignedQuiz.objects.values('user', 'quiz')
+        .annotate(first_id=models.Min('id'), count=models.Count('id'))
+        .filter(count__gt=1)
+    )
+    for item in duplicates:
+        AssignedQuiz.objects.filter(user=item['user'], quiz=item['quiz']).exclude(
+            id=item['first_id']
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizes', '0016_quizimage_assignedquiz_pub_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_assignments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='assignedquiz',
+            constraint=models.UniqueConstraint(fields=('user', 'quiz'), name='unique_assigned_user_quiz'),
+        ),
+    ]
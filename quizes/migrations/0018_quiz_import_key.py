@@ -0,0 +1,18 @@
+# Generated by Django 4.2.2 on 2026-10-18 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizes', '0017_assignedquiz_unique_user_quiz'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='import_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, verbose_name='Ключ импорта'),
+        ),
+    ]
@@ -0,0 +1,133 @@
+# Generated by Django 4.2.2 on 2026-10-18 03:08
+
+from django.db import migrations, models
+
+
+def remove_duplicates(model, fields, order_by):
+    """
+    Удаляет записи, повторяющиеся по значениям fields.
+
+    В каждой группе остается первая запись по order_by.
+    Возвращает id оставленных записей.
+    """
+    kept = []
+    duplicates = (
+        model.objects.values(*fields)
+        .annotate(count=models.Count('id'))
+        .filter(count__gt=1)
+        .order_by()
+    )
+    for group in duplicates:
+        ids = list(
+            model.objects.filter(**{field: group[field] for field in fields})
+            .order_by(*order_by)
+            .values_list('id', flat=True)
+        )
+        kept.append(ids[0])
+        model.objects.filter(id__in=ids[1:]).delete()
+    return kept
+
+
+def recount_statistic(apps, statistic):
+    """Пересчитывает счетчики и статусы статистики по оставшимся ответам."""
+    AssignedQuiz = apps.get_model('quizes', 'AssignedQuiz')
+    UserQuestion = apps.get_model('quizes', 'UserQuestion')
+    user_questions = UserQuestion.objects.filter(statistic=statistic)
+    statistic.count_questions = statistic.quiz.questions.count()
+    statistic.count_answered = user_questions.count()
+    statistic.count_right = user_questions.filter(is_right=True).count()
+    statistic.count_wrong = statistic.count_answered - statistic.count_right
+    statistic.quiz_time = user_questions.aggregate(
+        quiz_time=models.Sum('response_time')
+    )['quiz_time']
+    to_passed = int(statistic.count_questions / 100 * statistic.quiz.threshold)
+    statistic.is_completed = statistic.count_answered == statistic.count_questions
+    statistic.is_passed = statistic.is_completed and statistic.count_right >= to_passed
+    statistic.is_failed = statistic.is_completed and statistic.count_right < to_passed
+    statistic.is_assigned = AssignedQuiz.objects.filter(
+        user=statistic.user_id, quiz=statistic.quiz_id
+    ).exists()
+    statistic.save()
+
+
+def recount_rating(apps, user_id):
+    """
+    Пересчитывает счетчики рейтинга пользователя по его статистике.
+
+    Уровень и достижения не пересчитываются: они только растут и остаются
+    полученными.
+    """
+    Rating = apps.get_model('ratings', 'Rating')
+    Statistic = apps.get_model('quizes', 'Statistic')
+    statistics = Statistic.objects.filter(user=user_id)
+    passed = statistics.filter(is_passed=True)
+    totals = passed.aggregate(
+        count_answered=models.Sum('count_answered'),
+        count_right=models.Sum('count_right'),
+        quiz_time=models.Sum('quiz_time'),
+    )
+    answered = totals['count_answered'] or 0
+    right = totals['count_right'] or 0
+    count_completed = statistics.filter(is_completed=True).count()
+    count_passed = passed.count()
+    Rating.objects.filter(user=user_id).update(
+        count_completed=count_completed,
+        count_passed=count_passed,
+        count_failed=count_completed - count_passed,
+        count_assigned=passed.filter(is_assigned=True).count(),
+        answered_questions=answered,
+        right_questions=right,
+        wrong_questions=answered - right,
+        passed_time=totals['quiz_time'] or 0,
+        user_rating=max(right - (answered - right), 0),
+    )
+
+
+def remove_duplicate_answers(apps, schema_editor):
+    """
+    Удаляет повторную статистику и повторные ответы на вопросы.
+
+    Остается статистика с наибольшим количеством ответов и последний ответ
+    на вопрос. Затронутая статистика и рейтинги ее пользователей
+    пересчитываются, чтобы удаленные записи не оставались в счетчиках.
+    """
+    Statistic = apps.get_model('quizes', 'Statistic')
+    UserQuestion = apps.get_model('quizes', 'UserQuestion')
+    statistic_ids = set(
+        remove_duplicates(Statistic, ('user', 'quiz'), ('-count_answered', 'id'))
+    )
+    kept = remove_duplicates(UserQuestion, ('statistic', 'question'), ('-id',))
+    statistic_ids.update(
+        UserQuestion.objects.filter(id__in=kept).values_list('statistic', flat=True)
+    )
+    statistics = Statistic.objects.filter(id__in=statistic_ids).select_related('quiz')
+    user_ids = set()
+    for statistic in statistics:
+        recount_statistic(apps, statistic)
+        user_ids.add(statistic.user_id)
+    for user_id in user_ids:
+        recount_rating(apps, user_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizes', '0018_quiz_import_key'),
+        ('ratings', '0003_rating_department'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_answers, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='assignedquiz',
+            index=models.Index(fields=['pub_date'], name='assigned_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='statistic',
+            constraint=models.UniqueConstraint(fields=('user', 'quiz'), name='unique_statistic_user_quiz'),
+        ),
+        migrations.AddConstraint(
+            model_name='userquestion',
+            constraint=models.UniqueConstraint(fields=('statistic', 'question'), name='unique_user_question'),
+        ),
+    ]
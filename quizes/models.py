@@ -1,7 +1,12 @@
+from collections import defaultdict
+from copy import copy
+
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 
+from api.cache import bump
 from ratings.models import Rating
 from user.models import Department
 
@@ -36,6 +41,55 @@ class QuizLevel(models.Model):
         return f"{self.name}"
 
 
+class QuizQuerySet(models.QuerySet):
+    """QuerySet квизов."""
+
+    def for_catalog(self, user):
+        """
+        Возвращает квизы для каталога пользователя.
+
+        Статус прохождения, количество вопросов и признак ответа на каждый
+        вопрос вычисляются аннотациями, поэтому количество запросов не зависит
+        от числа квизов и вопросов, а запись в БД не производится.
+        """
+        questions = Question.objects.annotate(
+            is_answered=models.Exists(
+                UserQuestion.objects.filter(
+                    statistic__user=user, question=models.OuterRef("pk")
+                )
+            )
+        )
+        return (
+            self.select_related("directory", "level")
+            .prefetch_related(
+                "tags",
+                "volumes",
+                models.Prefetch("questions", queryset=questions),
+                "questions__answers__answers_list",
+            )
+            .annotate(
+                appointed=models.Exists(
+                    AssignedQuiz.objects.filter(quiz=models.OuterRef("pk"), user=user)
+                ),
+                is_passed=models.Exists(
+                    Statistic.objects.filter(
+                        quiz=models.OuterRef("pk"), user=user, is_passed=True
+                    )
+                ),
+                questions_count=Coalesce(
+                    models.Subquery(
+                        Question.objects.filter(quiz=models.OuterRef("pk"))
+                        .order_by()
+                        .values("quiz")
+                        .annotate(count=models.Count("pk"))
+                        .values("count")
+                    ),
+                    0,
+                ),
+            )
+        )
+
+
 class Quiz(models.Model):
     """Модель квизов."""
 
@@ -72,6 +126,15 @@ class Quiz(models.Model):
         default=70,
         validators=[MinValueValidator(0), MaxValueValidator(100)],
     )
+    import_key = models.CharField(
+        verbose_name="Ключ импорта",
+        max_length=64,
+        blank=True,
+        db_index=True,
+        editable=False,
+    )
+
+    objects = QuizQuerySet.as_manager()
 
     @property
     def question_amount(self):
@@ -91,6 +154,64 @@ class Quiz(models.Model):
         return f"{self.name}"
 
 
+class QuestionQuerySet(models.QuerySet):
+    """QuerySet вопросов."""
+
+    def create_tree(self, quiz_id, questions_data):
+        """
+        Создает вопросы квиза вместе с ответами и элементами списков.
+
+        Каждый уровень вложенности создается одним bulk_create в общей
+        транзакции, поэтому количество запросов зависит от глубины
+        вложенности, а не от количества элементов. bulk_create не отправляет
+        сигналы, поэтому кэш каталога сбрасывается здесь. Возвращает
+        созданные вопросы с заполненными id.
+        """
+        answers, answers_lists = [], []
+        with transaction.atomic():
+            questions = self.bulk_create(
+                [
+                    Question(quiz_id=quiz_id, **_model_fields(data, "answers"))
+                    for data in questions_data
+                ]
+            )
+            for question, data in zip(questions, questions_data):
+                for answer_data in data.get("answers", []):
+                    answer = Answer(
+                        question=question,
+                        is_right=answer_data.get("is_right", False),
+                        **_model_fields(answer_data, "answers_list", "is_right"),
+                    )
+                    answers.append(answer)
+                    answers_lists.extend(
+                        AnswerList(answer=answer, **_model_fields(item))
+                        for item in answer_data.get("answers_list", [])
+                    )
+            Answer.objects.bulk_create(answers)
+            AnswerList.objects.bulk_create(answers_lists)
+            bump("quizes")
+        return questions
+
+
+def _model_fields(data, *nested):
+    """Возвращает данные без id и вложенных полей для создания объекта."""
+    return {
+        field: value
+        for field, value in data.items()
+        if field not in ("id", "quiz", *nested)
+    }
+
+
+def _assign(instance, data):
+    """Записывает значения в объект и возвращает список измененных полей."""
+    changed = []
+    for field, value in data.items():
+        if getattr(instance, field) != value:
+            setattr(instance, field, value)
+            changed.append(field)
+    return changed
+
+
 class Question(models.Model):
     """Модель вопросов."""
 
@@ -119,6 +240,8 @@ class Question(models.Model):
 
     explanation = models.TextField(verbose_name="Объяснение", blank=True)
 
+    objects = QuestionQuerySet.as_manager()
+
     @property
     def right_answer(self):
         """Возвращает текст правильного ответа на вопрос."""
@@ -129,6 +252,71 @@ class Question(models.Model):
         """Возвращает количество правильных ответов на вопрос."""
         return self.answers.filter(is_right=True).count()
 
+    def update_answers(self, answers_data):
+        """
+        Приводит ответы вопроса в соответствие с переданными данными.
+
+        Текущее дерево ответов загружается одним запросом и сравнивается
+        с данными: элементы с известным id обновляются, без id - создаются,
+        отсутствующие в данных - удаляются. Элементы списка ответа
+        затрагиваются, только если для ответа передан answers_list.
+        Изменения применяются через bulk_create, bulk_update и delete
+        в одной транзакции, после которой сбрасывается кэш каталога.
+        """
+        current = {
+            answer.id: answer
+            for answer in self.answers.prefetch_related("answers_list")
+        }
+        new_answers, new_items = [], []
+        changed_answers, changed_items = {}, {}
+        answer_fields, item_fields = set(), set()
+        kept_answers, removed_items = set(), []
+        for answer_data in answers_data:
+            answer = current.get(answer_data.get("id"))
+            if answer is None:
+                answer = Answer(
+                    question=self,
+                    is_right=answer_data.get("is_right", False),
+                    **_model_fields(answer_data, "answers_list", "is_right"),
+                )
+                new_answers.append(answer)
+                items = {}
+            else:
+                kept_answers.add(answer.id)
+                fields = _assign(answer, _model_fields(answer_data, "answers_list"))
+                if fields:
+                    changed_answers[answer.id] = answer
+                    answer_fields.update(fields)
+                items = {item.id: item for item in answer.answers_list.all()}
+            if "answers_list" not in answer_data:
+                continue
+            for item_data in answer_data["answers_list"]:
+                item = items.pop(item_data.get("id"), None)
+                if item is None:
+                    new_items.append(
+                        AnswerList(answer=answer, **_model_fields(item_data))
+                    )
+                    continue
+                fields = _assign(item, _model_fields(item_data))
+                if fields:
+                    changed_items[item.id] = item
+                    item_fields.update(fields)
+            removed_items.extend(items)
+
+        with transaction.atomic():
+            removed_answers = current.keys() - kept_answers
+            if removed_answers:
+                Answer.objects.filter(id__in=removed_answers).delete()
+            if removed_items:
+                AnswerList.objects.filter(id__in=removed_items).delete()
+            if changed_answers:
+                Answer.objects.bulk_update(changed_answers.values(), answer_fields)
+            if changed_items:
+                AnswerList.objects.bulk_update(changed_items.values(), item_fields)
+            Answer.objects.bulk_create(new_answers)
+            AnswerList.objects.bulk_create(new_items)
+            bump("quizes")
+
     class Meta:
         verbose_name = "Вопрос"
         verbose_name_plural = "Вопросы"
@@ -197,6 +385,12 @@ class AssignedQuiz(models.Model):
     class Meta:
         verbose_name = "Назначенный квиз"
         verbose_name_plural = "Назначенные квизы"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "quiz"], name="unique_assigned_user_quiz"
+            )
+        ]
+        indexes = [models.Index(fields=["pub_date"], name="assigned_pub_date_idx")]
 
     def __str__(self):
         return f"{self.user.email} - {self.quiz.name}"
@@ -282,12 +476,7 @@ class Statistic(models.Model):
         self.count_answered = self.user_questions.count()
         self.count_right = self.user_questions.filter(is_right=True).count()
         self.count_wrong = self.count_answered - self.count_right
-        self.is_completed = self.count_answered == self.count_questions
-        self.is_passed = self.count_right >= to_passed and self.is_completed
-        self.is_failed = self.count_right < to_passed and self.is_completed
-        self.is_assigned = AssignedQuiz.objects.filter(
-            user=self.user, quiz=self.quiz
-        ).exists()
+        self._set_statuses(to_passed)
         quiz_time = self.user_questions.aggregate(quiz_time=models.Sum("response_time"))
         self.quiz_time = quiz_time["quiz_time"]
         self.save()
@@ -295,9 +484,157 @@ class Statistic(models.Model):
             rating, _ = Rating.objects.get_or_create(user=self.user)
             rating.set_ratings()
 
+    def _set_statuses(self, to_passed):
+        """Устанавливает статусы завершения, прохождения и провала квиза."""
+        self.is_completed = self.count_answered == self.count_questions
+        self.is_passed = self.count_right >= to_passed and self.is_completed
+        self.is_failed = self.count_right < to_passed and self.is_completed
+        self.is_assigned = AssignedQuiz.objects.filter(
+            user=self.user_id, quiz=self.quiz_id
+        ).exists()
+
+    def rating_contribution(self):
+        """
+        Возвращает вклад статистики в счетчики рейтинга пользователя.
+
+        Соответствует тому, как статистика учитывается в Rating.set_ratings:
+        вопросы и время считаются только для пройденных квизов.
+        """
+        answered = (self.count_answered or 0) if self.is_passed else 0
+        right = (self.count_right or 0) if self.is_passed else 0
+        return {
+            "count_completed": int(self.is_completed),
+            "count_passed": int(self.is_passed),
+            "count_failed": int(self.is_completed and not self.is_passed),
+            "count_assigned": int(self.is_passed and self.is_assigned),
+            "answered_questions": answered,
+            "right_questions": right,
+            "wrong_questions": answered - right,
+            "passed_time": (self.quiz_time or 0) if self.is_passed else 0,
+        }
+
+    def apply_answer(self, user_question, previous=None):
+        """
+        Учитывает в статистике ответ на один вопрос.
+
+        Вместо пересчета всех ответов пользователя счетчики изменяются на
+        разницу между новым ответом и предыдущим ответом на тот же вопрос
+        (previous), после чего эта же разница переносится в рейтинг.
+        """
+        self.apply_answers([user_question], [previous] if previous else [])
+
+    def apply_answers(self, user_questions, previous=()):
+        """
+        Учитывает в статистике ответы на несколько вопросов.
+
+        previous - замененные ответы на те же вопросы. Статистика и рейтинг
+        обновляются один раз для всей пачки.
+        """
+        answered = len(user_questions) - len(previous)
+        right = sum(user_question.is_right for user_question in user_questions)
+        right -= sum(user_question.is_right for user_question in previous)
+        response_time = sum(
+            user_question.response_time for user_question in user_questions
+        )
+        response_time -= sum(user_question.response_time for user_question in previous)
+        counters = (
+            "count_questions",
+            "count_answered",
+            "count_right",
+            "count_wrong",
+            "quiz_time",
+        )
+        with transaction.atomic():
+            before = (
+                Statistic.objects.select_for_update().get(pk=self.pk)
+            ).rating_contribution()
+            Statistic.objects.filter(pk=self.pk).update(
+                count_answered=Coalesce("count_answered", 0) + answered,
+                count_right=Coalesce("count_right", 0) + right,
+                count_wrong=Coalesce("count_wrong", 0) + answered - right,
+                quiz_time=Coalesce("quiz_time", 0) + response_time,
+            )
+            self.refresh_from_db(fields=counters)
+            self.count_questions = self.quiz.question_amount
+            self._set_statuses(int(self.count_questions / 100 * self.quiz.threshold))
+            self.save(
+                update_fields=[
+                    "count_questions",
+                    "is_completed",
+                    "is_passed",
+                    "is_failed",
+                    "is_assigned",
+                    "mod_date",
+                ]
+            )
+            after = self.rating_contribution()
+            delta = {field: value - before[field] for field, value in after.items()}
+            Rating.apply_delta(self.user, delta)
+
+    def save_answers(self, answers_data):
+        """
+        Сохраняет ответы пользователя сразу на несколько вопросов квиза.
+
+        answers_data - проверенные ответы с результатом в is_right.
+        Повторные ответы обновляют существующие UserQuestion на месте, как
+        и ответ на один вопрос (UserQuestion.update_answers). Новые вопросы,
+        ответы и элементы списков создаются через bulk_create, изменения
+        всех вопросов сохраняются одними запросами, а статистика и рейтинг
+        пересчитываются один раз для всей пачки.
+        """
+        changes = defaultdict(list)
+        with transaction.atomic():
+            # Параллельные пачки ответов одного пользователя выполняются по очереди.
+            Statistic.objects.select_for_update().get(pk=self.pk)
+            existing = {
+                user_question.question_id: user_question
+                for user_question in UserQuestion.objects.filter(
+                    statistic=self,
+                    question_id__in=[data["id"] for data in answers_data],
+                ).prefetch_related(
+                    models.Prefetch(
+                        "user_answers",
+                        queryset=UserAnswer.objects.order_by("id").prefetch_related(
+                            "user_answers_list"
+                        ),
+                    )
+                )
+            }
+            # Прежние значения нужны для пересчета статистики на разницу.
+            previous = [copy(user_question) for user_question in existing.values()]
+            user_questions = [
+                existing.get(data["id"])
+                or UserQuestion(statistic=self, question_id=data["id"])
+                for data in answers_data
+            ]
+            for user_question, data in zip(user_questions, answers_data):
+                user_question.response_time = data["response_time"]
+                user_question.is_right = data["is_right"]
+            UserQuestion.objects.bulk_update(
+                existing.values(), ["response_time", "is_right"]
+            )
+            UserQuestion.objects.bulk_create(
+                user_question
+                for user_question in user_questions
+                if user_question.question_id not in existing
+            )
+            for user_question, data in zip(user_questions, answers_data):
+                current = []
+                if user_question.question_id in existing:
+                    current = list(user_question.user_answers.all())
+                user_question.collect_answer_changes(current, data["answers"], changes)
+            UserQuestion.save_answer_changes(changes)
+            self.apply_answers(user_questions, previous)
+        return user_questions
+
     class Meta:
         verbose_name = "Статистика прохождения квиза"
         verbose_name_plural = "Статистика прохождения квизов"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "quiz"], name="unique_statistic_user_quiz"
+            )
+        ]
 
     def __str__(self):
         return f"{self.user} {self.quiz}"
@@ -329,42 +666,120 @@ class UserQuestion(models.Model):
 
         Проверяет правильность ответа и обновляет значение is_right.
         """
+        self.is_right = self.check_answer()
+        self.save()
+        self.statistic.set_statistic
+
+    def check_answer(self, answers=None):
+        """
+        Проверяет правильность ответа пользователя по ключу ответов квиза.
+
+        Ответы передаются в формате запроса; если они не переданы,
+        загружаются из БД.
+        """
+        # answer_keys импортирует модели, поэтому импорт выполняется здесь.
+        from quizes.answer_keys import check_answer
+
+        if answers is None:
+            answers = [
+                {
+                    "answer": user_answer.answer_id,
+                    "answer_text": user_answer.answer_text,
+                    "answer_list": [
+                        {"answer_list": item.answer_list_id}
+                        for item in user_answer.user_answers_list.all()
+                    ],
+                }
+                for user_answer in self.user_answers.prefetch_related(
+                    "user_answers_list"
+                ).order_by("id")
+            ]
+        return check_answer(self.question, answers)
+
+    def update_answers(self, answers_data):
+        """
+        Приводит ответы пользователя на вопрос в соответствие с данными.
 
-        def _set_is_right(question_type):
-            """
-            Вспомогательная функция для set_is_right.
-
-            Проверяет правильность ответа пользователя в зависимости от типа вопроса.
-            """
-            if question_type == "ONE":
-                return self.user_answers.first().answer.is_right
-            if question_type == "MNY":
-                return (
-                    self.user_answers.filter(answer__is_right=True).count()
-                    == self.question.right_answers
+        Изменения ищутся collect_answer_changes и применяются через
+        bulk_create, bulk_update и delete.
+        """
+        current = list(
+            self.user_answers.prefetch_related("user_answers_list").order_by("id")
+        )
+        changes = defaultdict(list)
+        self.collect_answer_changes(current, answers_data, changes)
+        UserQuestion.save_answer_changes(changes)
+
+    def collect_answer_changes(self, current, answers_data, changes):
+        """
+        Добавляет в changes изменения ответов пользователя на вопрос.
+
+        current - сохраненные ответы по возрастанию id с загруженными
+        элементами списков. Они сравниваются с данными по порядку: пока id
+        ответов совпадают, записи остаются на месте, начиная с первого
+        расхождения заменяются. Так порядок ответов в БД совпадает
+        с порядком в запросе, от которого зависит проверка вопросов с одним
+        и открытым ответом. Элементы списков сравниваются без учета порядка.
+        """
+        kept = 0
+        while (
+            kept < min(len(current), len(answers_data))
+            and current[kept].answer_id == answers_data[kept]["answer"]
+        ):
+            kept += 1
+        for position, answer_data in enumerate(answers_data):
+            items = {}
+            if position < kept:
+                user_answer = current[position]
+                if user_answer.answer_text != answer_data["answer_text"]:
+                    user_answer.answer_text = answer_data["answer_text"]
+                    changes["changed"].append(user_answer)
+                for item in user_answer.user_answers_list.all():
+                    items.setdefault(item.answer_list_id, []).append(item)
+            else:
+                user_answer = UserAnswer(
+                    user_question=self,
+                    answer_id=answer_data["answer"],
+                    answer_text=answer_data["answer_text"],
                 )
-            if question_type == "OPN":
-                return (
-                    self.user_answers.first().answer_text
-                    == self.question.answers.first().text
+                changes["new_answers"].append(user_answer)
+            for item_data in answer_data["answer_list"]:
+                if items.get(item_data["answer_list"]):
+                    items[item_data["answer_list"]].pop(0)
+                    continue
+                changes["new_items"].append(
+                    UserAnswerList(
+                        user_answer=user_answer, answer_list_id=item_data["answer_list"]
+                    )
                 )
-            if question_type == "LST":
-                user_answers = self.user_answers.all()
-                for answer in user_answers:
-                    for ans_lst in answer.user_answers_list.all():
-                        if ans_lst.answer_list.answer != ans_lst.user_answer.answer:
-                            return False
-                return True
-            return False
-
-        question_type = self.question.question_type
-        self.is_right = _set_is_right(question_type)
-        self.save()
-        self.statistic.set_statistic
+            changes["removed_items"].extend(
+                item.id for rest in items.values() for item in rest
+            )
+        changes["removed_answers"].extend(
+            user_answer.id for user_answer in current[kept:]
+        )
+
+    @staticmethod
+    def save_answer_changes(changes):
+        """Сохраняет изменения ответов, собранные collect_answer_changes."""
+        with transaction.atomic():
+            if changes["removed_answers"]:
+                UserAnswer.objects.filter(id__in=changes["removed_answers"]).delete()
+            if changes["removed_items"]:
+                UserAnswerList.objects.filter(id__in=changes["removed_items"]).delete()
+            if changes["changed"]:
+                UserAnswer.objects.bulk_update(changes["changed"], ["answer_text"])
+            UserAnswer.objects.bulk_create(changes["new_answers"])
+            UserAnswerList.objects.bulk_create(changes["new_items"])
 
     class Meta:
         verbose_name = "Вопрос пользователя"
         verbose_name_plural = "Вопросы пользователя"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["statistic", "question"], name="unique_user_question"
+            )
+        ]
 
     def __str__(self):
         return f"{self.statistic} {self.question}"
@@ -1,7 +1,15 @@
+from copy import copy
+
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
+from django.db import transaction
 from rest_framework import serializers
 
+from quizes.answer_keys import (
+    get_question_keys,
+    grade,
+    has_answers,
+    invalidate_answer_keys,
+)
 from quizes.models import (
     Answer,
     AnswerList,
@@ -12,8 +20,6 @@ from quizes.models import (
     QuizLevel,
     Statistic,
     Tag,
-    UserAnswer,
-    UserAnswerList,
     UserQuestion,
     Volume,
 )
@@ -57,6 +63,9 @@ class TagSerializer(serializers.ModelSerializer):
 class AnswerListSerializer(serializers.ModelSerializer):
     """Сериализатор для модели AnswerList."""
 
+    # id передается при редактировании вопроса, чтобы сопоставить элементы
+    id = serializers.IntegerField(required=False)
+
     class Meta:
         model = AnswerList
         fields = [
@@ -68,7 +77,8 @@ class AnswerListSerializer(serializers.ModelSerializer):
 class AnswerSerializer(serializers.ModelSerializer):
     """Сериализатор для модели Answer."""
 
-    answers_list = AnswerListSerializer(many=True)
+    id = serializers.IntegerField(required=False)
+    answers_list = AnswerListSerializer(many=True, required=False)
 
     class Meta:
         model = Answer
@@ -80,9 +90,11 @@ class AnswerSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         """Метод для создания объекта Answer с вложенными данными."""
+        validated_data.pop("id", None)
         answers_list_data = validated_data.pop("answers_list", [])
         answer = Answer.objects.create(**validated_data)
         for answer_list_data in answers_list_data:
+            answer_list_data.pop("id", None)
             AnswerList.objects.create(answer=answer, **answer_list_data)
         return answer
 
@@ -91,16 +103,8 @@ class QuestionSerializer(serializers.ModelSerializer):
     """Сериализатор для модели Question."""
 
     answers = AnswerSerializer(many=True, read_only=True)
-    is_answered = serializers.SerializerMethodField()
-
-    def get_is_answered(self, obj):
-        """Метод для определения, был ли дан ответ на вопрос."""
-        user = self.context["request"].user
-        stat, _ = Statistic.objects.get_or_create(user=user, quiz=obj.quiz)
-        user_question = UserQuestion.objects.filter(
-            statistic=stat.id, question=obj
-        ).first()
-        return True if user_question else False
+    # Значение вычисляется в QuizQuerySet.for_catalog.
+    is_answered = serializers.BooleanField(read_only=True)
 
     class Meta:
         model = Question
@@ -115,18 +119,11 @@ class QuizSerializer(serializers.ModelSerializer):
     level = serializers.StringRelatedField()
     tags = TagSerializer(many=True, read_only=True)
     volumes = VolumeSerializer(many=True, read_only=True)
-    isPassed = serializers.SerializerMethodField()
+    # Значения вычисляются в QuizQuerySet.for_catalog.
+    question_amount = serializers.IntegerField(source="questions_count", read_only=True)
+    isPassed = serializers.BooleanField(source="is_passed", read_only=True)
     appointed = serializers.BooleanField()
 
-    def get_isPassed(self, obj):
-        """Метод для определения, пройден ли квиз."""
-        user = self.context["request"].user
-        stat, _ = Statistic.objects.get_or_create(
-            user=user,
-            quiz=obj,
-        )
-        return stat.is_passed
-
     class Meta:
         model = Quiz
         fields = [
@@ -154,83 +151,127 @@ class QuizLevelSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class UserAnswerListSerializer(serializers.ModelSerializer):
-    """Сериализатор для модели UserAnswerList."""
+class UserAnswerListSerializer(serializers.Serializer):
+    """Сериализатор элемента списка в ответе пользователя."""
+
+    answer_list = serializers.IntegerField()
 
-    class Meta:
-        model = UserAnswerList
-        fields = [
-            "answer_list",
-        ]
 
+class UserAnswerSerializer(serializers.Serializer):
+    """
+    Сериализатор ответа пользователя.
 
-class UserAnswerSerializer(serializers.ModelSerializer):
-    """Сериализатор для модели UserAnswer."""
+    id ответов и элементов списков проверяются по ключу ответов квиза,
+    поэтому здесь проверяется только формат данных.
+    """
 
-    answer_list = UserAnswerListSerializer(many=True)
+    answer = serializers.IntegerField()
+    answer_text = serializers.CharField(
+        max_length=240, required=False, allow_blank=True, default=""
+    )
+    answer_list = UserAnswerListSerializer(many=True, required=False, default=list)
 
-    class Meta:
-        model = UserAnswer
-        fields = ["answer", "answer_text", "answer_list"]
+
+class UserQuestionListSerializer(serializers.ListSerializer):
+    """
+    Сериализатор для сохранения ответов на несколько вопросов квиза.
+
+    Вопросы, ответы и элементы списков проверяются и оцениваются по ключу
+    ответов квиза без запросов к БД.
+    """
+
+    def validate(self, attrs):
+        """Проверяет, что ответы относятся к вопросам квиза, и оценивает их."""
+        statistic = self.context["statistic"]
+        question_ids = [data["id"] for data in attrs]
+        if len(set(question_ids)) != len(question_ids):
+            raise serializers.ValidationError(
+                {"error": "Ответ на каждый вопрос передается один раз."}
+            )
+        keys = get_question_keys(statistic.quiz_id, question_ids)
+        for data in attrs:
+            entry = keys.get(data["id"])
+            if entry is None:
+                raise serializers.ValidationError(
+                    {"error": f"Вопрос {data['id']} не принадлежит данному квизу."}
+                )
+            if not has_answers(entry, data["answers"]):
+                raise serializers.ValidationError(
+                    {"error": f"Ответ не принадлежит вопросу {data['id']}."}
+                )
+            data["is_right"] = grade(entry, data["answers"])
+        return attrs
+
+    def create(self, validated_data):
+        """Метод для сохранения ответов пачкой."""
+        return self.context["statistic"].save_answers(validated_data)
 
 
-class UserQuestionSerializer(serializers.ModelSerializer):
-    """Сериализатор для модели UserQuestion."""
+class UserQuestionSerializer(serializers.Serializer):
+    """Сериализатор ответа пользователя на вопрос."""
 
+    id = serializers.IntegerField()
+    question_type = serializers.CharField()
+    response_time = serializers.IntegerField(min_value=0)
     answers = UserAnswerSerializer(many=True)
-    id = serializers.IntegerField(source="question.id", required=True)
-    question_type = serializers.CharField(
-        source="question.question_type", required=True
-    )
-    response_time = serializers.IntegerField(required=True)
 
     class Meta:
-        model = UserQuestion
-        fields = ["id", "question_type", "response_time", "answers"]
+        list_serializer_class = UserQuestionListSerializer
 
 
 class UserQuestionSaveSerializer(serializers.ModelSerializer):
     """Сериализатор для сохранения ответов пользователя."""
 
     def validate(self, attrs):
-        """Метод для валидации данных."""
-        # TODO подумать над валиидацией
+        """
+        Метод для валидации данных.
+
+        id ответов и элементов списков проверяются и ответ оценивается
+        по ключу ответов квиза без запросов к БД.
+        """
         statistic = attrs["statistic"]
         question = attrs["question"]
-        if question.quiz != statistic.quiz:
+        if question.quiz_id != statistic.quiz_id:
             raise serializers.ValidationError(
                 {"error": "Ответ не принадлежит данному квизу."}
             )
-        answers = self.initial_data.pop("answers")
-        attrs["answers"] = answers
+        answers = UserAnswerSerializer(data=self.initial_data.pop("answers"), many=True)
+        answers.is_valid(raise_exception=True)
+        entry = get_question_keys(question.quiz_id, [question.id]).get(question.id)
+        if entry is None or not has_answers(entry, answers.validated_data):
+            raise serializers.ValidationError(
+                {"error": "Ответ не принадлежит данному вопросу."}
+            )
+        attrs["answers"] = answers.validated_data
+        attrs["is_right"] = grade(entry, attrs["answers"])
         return attrs
 
     def create(self, validated_data):
-        """Метод для создания объекта UserQuestion с вложенными данными."""
+        """
+        Метод для создания объекта UserQuestion с вложенными данными.
+
+        Повторный ответ на вопрос обновляет существующий UserQuestion
+        и изменяет только отличающиеся ответы.
+        """
         answers = validated_data.pop("answers")
-        data = {
-            "statistic": validated_data.get("statistic"),
-            "question": validated_data.get("question"),
-        }
-        # TODO продумать обновление а не удаление
-        user_question = UserQuestion.objects.filter(**data).first()
-        if user_question:
-            user_question.delete()
-        user_question = UserQuestion.objects.create(**validated_data)
-        for ans in answers:
-            answers_list = ans.pop("answer_list")
-            answer = get_object_or_404(Answer, id=ans.pop("answer"))
-            user_answer = UserAnswer.objects.create(
-                user_question=user_question, answer=answer, **ans
-            )
-            for ans_list in answers_list:
-                answer_list = get_object_or_404(
-                    AnswerList, id=ans_list.pop("answer_list")
-                )
-                UserAnswerList.objects.create(
-                    user_answer=user_answer, answer_list=answer_list
-                )
-        user_question.set_is_right
+        with transaction.atomic():
+            # Одновременные ответы пользователя выполняются по очереди, иначе
+            # оба читают один и тот же прежний ответ.
+            Statistic.objects.select_for_update().get(pk=validated_data["statistic"].pk)
+            user_question = UserQuestion.objects.filter(
+                statistic=validated_data["statistic"],
+                question=validated_data["question"],
+            ).first()
+            # Прежние значения нужны для пересчета статистики на разницу.
+            previous = copy(user_question)
+            if user_question is None:
+                user_question = UserQuestion.objects.create(**validated_data)
+            else:
+                user_question.response_time = validated_data["response_time"]
+                user_question.is_right = validated_data["is_right"]
+                user_question.save(update_fields=["response_time", "is_right"])
+            user_question.update_answers(answers)
+            validated_data["statistic"].apply_answer(user_question, previous)
         # TODO удаление квизов из назначенных
         return user_question
 
@@ -244,6 +285,81 @@ class UserQuestionSaveSerializer(serializers.ModelSerializer):
         ]
 
 
+class UserQuestionResultSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор результата ответа пользователя на вопрос.
+
+    Ожидает, что вопрос, его ответы и ответы пользователя загружены
+    заранее через select_related/prefetch_related.
+    """
+
+    question_type = serializers.CharField(source="question.question_type")
+    question = serializers.CharField(source="question.text")
+    explanation = serializers.CharField(source="question.explanation")
+
+    class Meta:
+        model = UserQuestion
+        fields = ["question_type", "question", "explanation", "is_right"]
+
+    def to_representation(self, instance):
+        """Добавляет ответы в зависимости от типа вопроса."""
+        data = super().to_representation(instance)
+        question_type = instance.question.question_type
+        if question_type in ("ONE", "MNY"):
+            data["answers"] = self._get_choice_answers(instance)
+        elif question_type == "LST":
+            data["answers"] = self._get_list_answers(instance)
+        elif question_type == "OPN":
+            answers = instance.question.answers.all()
+            user_answers = instance.user_answers.all()
+            data["answer"] = answers[0].text if answers else None
+            data["user_answer"] = user_answers[0].answer_text if user_answers else None
+        return data
+
+    def _get_choice_answers(self, instance):
+        """Возвращает варианты ответа с отметкой выбранных пользователем."""
+        answered = {
+            user_answer.answer_id for user_answer in instance.user_answers.all()
+        }
+        return [
+            {
+                "answer_text": answer.text,
+                "answered": answer.id in answered,
+                "answer_right": answer.is_right if answer.id in answered else None,
+                "is_right": answer.is_right,
+            }
+            for answer in instance.question.answers.all()
+        ]
+
+    def _get_list_answers(self, instance):
+        """Возвращает ответы пользователя с сопоставленными элементами списка."""
+        return [
+            {
+                "answer_text": user_answer.answer.text,
+                "answer_list": [
+                    {
+                        "text": user_answer_list.answer_list.text,
+                        "answer_right": (
+                            user_answer_list.answer_list.answer_id
+                            == user_answer.answer_id
+                        ),
+                    }
+                    for user_answer_list in user_answer.user_answers_list.all()
+                ],
+            }
+            for user_answer in instance.user_answers.all()
+        ]
+
+
+class QuestionAdminListSerializer(serializers.ListSerializer):
+    """Сериализатор для пакетного создания вопросов квиза."""
+
+    def create(self, validated_data):
+        """Метод для создания вопросов, ответов и списков ответов пачкой."""
+        invalidate_answer_keys()
+        return Question.objects.create_tree(self.context["quiz_id"], validated_data)
+
+
 class QuestionAdminSerializer(serializers.ModelSerializer):
     """
     Сериализатор для обработки вложенных данных.
@@ -256,63 +372,32 @@ class QuestionAdminSerializer(serializers.ModelSerializer):
     class Meta:
         model = Question
         fields = ["id", "question_type", "text", "answers"]
+        list_serializer_class = QuestionAdminListSerializer
 
     def create(self, validated_data):
-        """Метод для создания объекта Question с вложенными данными."""
-        answers_data = validated_data.pop("answers", [])
-        quiz_id = self.context["quiz_id"]
-        question = Question.objects.create(quiz_id=quiz_id, **validated_data)
-        for answer_data in answers_data:
-            answers_list_data = answer_data.pop("answers_list", [])
-            # Получаем значение is_right или False, если не передано.
-            # Т.к. в моделях это поле необходимо, без такой проверки не
-            # получится выполнить POST-запрос. Либо так, либо в модели Answer,
-            # поле is_right сделать null=True.
-            # В данный момент is_right можем передавать, а можем и не
-            # передавать.
-            is_right = answer_data.pop("is_right", False)
-            answer = Answer.objects.create(
-                question=question, is_right=is_right, **answer_data
-            )
-            for answer_list_data in answers_list_data:
-                AnswerList.objects.create(answer=answer, **answer_list_data)
+        """
+        Метод для создания объекта Question с вложенными данными.
 
-        return question
+        Значение is_right ответа необязательно, по умолчанию False.
+        """
+        quiz_id = self.context["quiz_id"]
+        invalidate_answer_keys()
+        return Question.objects.create_tree(quiz_id, [validated_data])[0]
 
     def update(self, instance, validated_data):
-        """Метод для обновления объекта Question с вложенными данными."""
-        answers_data = validated_data.pop("answers", [])
-        instance.question_type = validated_data.get(
-            "question_type", instance.question_type
-        )
-        instance.text = validated_data.get("text", instance.text)
-        instance.image = validated_data.get("image", instance.image)
-        instance.save()
-
-        # Обновляем данные ответов
-        for answer_data in answers_data:
-            answer_id = answer_data.get("id", None)
-            if answer_id is None:
-                # Если id ответа не передан, значит это новый ответ,
-                # создаем его
-                answers_list_data = answer_data.pop("answers_list", [])
-                is_right = answer_data.pop("is_right", False)
-                answer = Answer.objects.create(
-                    question=instance, is_right=is_right, **answer_data
-                )
-                for answer_list_data in answers_list_data:
-                    AnswerList.objects.create(answer=answer, **answer_list_data)
-            else:
-                # Если id ответа передан, значит это существующий ответ,
-                # обновляем его
-                try:
-                    answer = Answer.objects.get(id=answer_id, question=instance)
-                except Answer.DoesNotExist:
-                    continue
-                answer.text = answer_data.get("text", answer.text)
-                answer.image = answer_data.get("image", answer.image)
-                answer.save()
-
+        """
+        Метод для обновления объекта Question с вложенными данными.
+
+        Ответы без id создаются, с id - обновляются, не переданные - удаляются.
+        """
+        answers_data = validated_data.pop("answers", None)
+        with transaction.atomic():
+            for field, value in validated_data.items():
+                setattr(instance, field, value)
+            instance.save()
+            if answers_data is not None:
+                instance.update_answers(answers_data)
+            invalidate_answer_keys()
         return instance
 
 
@@ -398,6 +483,38 @@ class AssignedSerializer(serializers.ModelSerializer):
         ]
 
 
+class AssignedIdSerializer(serializers.Serializer):
+    """Сериализатор идентификатора пользователя или квиза при назначении."""
+
+    id = serializers.IntegerField()
+
+
+class AssignedBulkSerializer(serializers.Serializer):
+    """
+    Сериализатор для массового назначения квизов.
+
+    Проверяет существование всех пользователей и квизов одним запросом
+    на модель и сообщает обо всех отсутствующих идентификаторах сразу.
+    """
+
+    users = AssignedIdSerializer(many=True)
+    quizes = AssignedIdSerializer(many=True)
+
+    def validate(self, attrs):
+        """Метод для проверки существования пользователей и квизов."""
+        errors = {}
+        for field, model in (("users", User), ("quizes", Quiz)):
+            ids = {item["id"] for item in attrs[field]}
+            found = set(model.objects.filter(id__in=ids).values_list("id", flat=True))
+            missing = sorted(ids - found)
+            if missing:
+                errors[field] = [f"Объекты с id {missing} не найдены."]
+            attrs[field] = found
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+
 class QuizImageSerializer(serializers.ModelSerializer):
     """Сериализатор для модели QuizImage."""
 
@@ -0,0 +1,76 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.cache import bump
+from quizes.answer_keys import invalidate_answer_keys
+from quizes.models import (
+    Answer,
+    AnswerList,
+    AssignedQuiz,
+    Question,
+    Quiz,
+    QuizImage,
+    QuizLevel,
+    Statistic,
+    Tag,
+    Volume,
+)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+@receiver(post_save, sender=AnswerList)
+@receiver(post_delete, sender=AnswerList)
+def reset_answer_keys(sender, **kwargs):
+    """Сбрасывает ключи ответов при изменении вопросов и ответов."""
+    invalidate_answer_keys()
+
+
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+@receiver(post_save, sender=AnswerList)
+@receiver(post_delete, sender=AnswerList)
+@receiver(post_save, sender=Volume)
+@receiver(post_delete, sender=Volume)
+@receiver(m2m_changed, sender=Quiz.tags.through)
+def reset_quizes_cache(sender, **kwargs):
+    """Сбрасывает кэш каталога квизов при изменении квизов."""
+    bump("quizes")
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def reset_tags_cache(sender, **kwargs):
+    """Сбрасывает кэш тегов и каталога квизов."""
+    bump("tags")
+    bump("quizes")
+
+
+@receiver(post_save, sender=QuizLevel)
+@receiver(post_delete, sender=QuizLevel)
+def reset_levels_cache(sender, **kwargs):
+    """Сбрасывает кэш уровней и каталога квизов."""
+    bump("levels")
+    bump("quizes")
+
+
+@receiver(post_save, sender=QuizImage)
+@receiver(post_delete, sender=QuizImage)
+def reset_images_cache(sender, **kwargs):
+    """Сбрасывает кэш изображений квизов."""
+    bump("images")
+
+
+@receiver(post_save, sender=Statistic)
+@receiver(post_delete, sender=Statistic)
+@receiver(post_save, sender=AssignedQuiz)
+@receiver(post_delete, sender=AssignedQuiz)
+def reset_user_quizes_cache(sender, instance, **kwargs):
+    """Сбрасывает кэш каталога пользователя при изменении его прохождений."""
+    bump("quizes", [f"user:{instance.user_id}"])
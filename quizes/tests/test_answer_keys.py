@@ -0,0 +1,164 @@
+from unittest.mock import patch
+
+import pytest
+
+from quizes import answer_keys
+from quizes.answer_keys import check_answer, get_question_keys, grade
+from quizes.models import Answer, Question
+
+ENTRIES = {
+    Question.TypeChoices.ONE: {
+        "type": Question.TypeChoices.ONE,
+        "answers": {1, 2},
+        "right": {1},
+        "text": "Первый",
+        "lists": {},
+    },
+    Question.TypeChoices.MANY: {
+        "type": Question.TypeChoices.MANY,
+        "answers": {1, 2, 3},
+        "right": {1, 2},
+        "text": "Первый",
+        "lists": {},
+    },
+    Question.TypeChoices.OPEN: {
+        "type": Question.TypeChoices.OPEN,
+        "answers": {1},
+        "right": set(),
+        "text": "Москва",
+        "lists": {},
+    },
+    Question.TypeChoices.LIST: {
+        "type": Question.TypeChoices.LIST,
+        "answers": {1, 2},
+        "right": set(),
+        "text": "Первый",
+        "lists": {10: 1, 11: 1, 20: 2},
+    },
+}
+
+
+def _answers(*ids, text="", lists=None):
+    """Возвращает ответы в формате запроса."""
+    lists = lists or {}
+    return [
+        {
+            "answer": answer_id,
+            "answer_text": text,
+            "answer_list": [{"answer_list": item} for item in lists.get(answer_id, [])],
+        }
+        for answer_id in ids
+    ]
+
+
+@pytest.mark.parametrize(
+    "question_type, answers, expected",
+    [
+        (Question.TypeChoices.ONE, _answers(1), True),
+        (Question.TypeChoices.ONE, _answers("1"), True),
+        (Question.TypeChoices.ONE, _answers(2), False),
+        (Question.TypeChoices.ONE, [], False),
+        (Question.TypeChoices.MANY, _answers(1, 2), True),
+        (Question.TypeChoices.MANY, _answers(2, 1), True),
+        (Question.TypeChoices.MANY, _answers(1), False),
+        (Question.TypeChoices.MANY, _answers(3), False),
+        (Question.TypeChoices.OPEN, _answers(1, text="Москва"), True),
+        (Question.TypeChoices.OPEN, _answers(1, text="москва"), False),
+        (
+            Question.TypeChoices.LIST,
+            _answers(1, 2, lists={1: [10, 11], 2: [20]}),
+            True,
+        ),
+        (
+            Question.TypeChoices.LIST,
+            _answers(1, 2, lists={1: [10, 20], 2: [11]}),
+            False,
+        ),
+        (Question.TypeChoices.LIST, _answers(1, lists={1: ["x"]}), False),
+    ],
+)
+def test_grade(question_type, answers, expected):
+    """Ответ оценивается по ключу вопроса с учетом его типа."""
+    assert grade(ENTRIES[question_type], answers) is expected
+
+
+def test_grade_unknown_question():
+    """Ответ на вопрос без ключа не засчитывается."""
+    assert grade(None, _answers(1)) is False
+
+
+@pytest.mark.django_db
+def test_changed_answer_regrades(quiz, django_capture_on_commit_callbacks):
+    """После изменения правильного ответа проверка использует новый ключ."""
+    question = quiz.questions.filter(question_type=Question.TypeChoices.ONE).first()
+    wrong = question.answers.filter(is_right=False).first()
+    assert check_answer(question, _answers(wrong.id)) is False
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Answer.objects.filter(question=question).exclude(id=wrong.id).update(
+            is_right=False
+        )
+        wrong.is_right = True
+        wrong.save()
+
+    assert check_answer(question, _answers(wrong.id)) is True
+
+
+@pytest.fixture
+def compiled(quiz):
+    """Подсчитывает компиляции ключей ответов из БД."""
+    answer_keys._compiled.clear()
+    with patch.object(
+        answer_keys, "compile_answer_key", wraps=answer_keys.compile_answer_key
+    ) as compile_key:
+        yield compile_key
+    answer_keys._compiled.clear()
+
+
+@pytest.mark.django_db
+def test_unknown_questions_do_not_recompile(quiz, compiled):
+    """Вопросы другого квиза и несуществующие вопросы не обновляют ключ."""
+    question = quiz.questions.first()
+    other = Question.objects.exclude(quiz=quiz).first()
+    get_question_keys(quiz.id, [question.id])
+
+    keys = get_question_keys(quiz.id, [question.id, other.id, 10**9])
+
+    assert list(keys) == [question.id]
+    assert compiled.call_count == 1
+
+
+@pytest.mark.django_db
+def test_new_question_recompiles(quiz, compiled):
+    """Вопрос, добавленный после компиляции ключа, находится в новом ключе."""
+    get_question_keys(quiz.id, [quiz.questions.first().id])
+    question = Question.objects.create_tree(
+        quiz.id, [{"text": "Новый вопрос", "answers": [{"text": "Ответ"}]}]
+    )[0]
+
+    assert question.id in get_question_keys(quiz.id, [question.id])
+    assert compiled.call_count == 2
+
+
+def _drop_shared_key(quiz):
+    """Удаляет ключ ответов квиза из общего кэша, оставляя копию процесса."""
+    version = answer_keys.cache.get(answer_keys.VERSION_CACHE_KEY)
+    answer_keys.cache.delete(f"answer-key-{quiz.id}-{version}")
+
+
+@pytest.mark.django_db
+def test_process_copy_expires(quiz, compiled, settings):
+    """Копия ключа в памяти процесса компилируется заново после таймаута."""
+    settings.ANSWER_KEY_CACHE_TIMEOUT = 60
+    question_ids = [quiz.questions.first().id]
+    with patch.object(answer_keys.time, "monotonic", return_value=1000.0):
+        get_question_keys(quiz.id, question_ids)
+    _drop_shared_key(quiz)
+    with patch.object(answer_keys.time, "monotonic", return_value=1030.0):
+        get_question_keys(quiz.id, question_ids)
+    assert compiled.call_count == 1
+
+    _drop_shared_key(quiz)
+    with patch.object(answer_keys.time, "monotonic", return_value=1061.0):
+        get_question_keys(quiz.id, question_ids)
+    assert compiled.call_count == 2
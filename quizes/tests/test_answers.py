@@ -0,0 +1,205 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+from django.db import connection, connections, transaction
+from django.db.models import QuerySet
+
+from api.benchmark import _answer_payload
+from quizes.models import Question, Statistic, UserAnswer
+from ratings.models import Rating
+
+RATING_FIELDS = [
+    "count_completed",
+    "count_passed",
+    "count_failed",
+    "count_assigned",
+    "answered_questions",
+    "right_questions",
+    "wrong_questions",
+    "passed_time",
+    "user_rating",
+]
+
+
+def _rating(user):
+    """Возвращает счетчики рейтинга пользователя."""
+    return Rating.objects.values(*RATING_FIELDS).get(user=user)
+
+
+def _recounted_rating(user):
+    """
+    Возвращает счетчики рейтинга, пересчитанные по всей статистике.
+
+    Пересчет откатывается, чтобы следующие ответы снова изменяли рейтинг
+    на разницу.
+    """
+    with transaction.atomic():
+        Rating.objects.get(user=user).set_ratings()
+        recounted = _rating(user)
+        transaction.set_rollback(True)
+    return recounted
+
+
+def _assert_consistent(user, quiz):
+    """Проверяет счетчики статистики и рейтинга по сохраненным ответам."""
+    statistic = Statistic.objects.get(user=user, quiz=quiz)
+    user_questions = statistic.user_questions.all()
+    right = user_questions.filter(is_right=True).count()
+    assert (statistic.count_answered, statistic.count_right) == (
+        user_questions.count(),
+        right,
+    )
+    assert statistic.count_wrong == statistic.count_answered - right
+    assert _rating(user) == _recounted_rating(user)
+
+
+def _saved_ids(statistic):
+    """Возвращает id сохраненных ответов пользователя на вопросы квиза."""
+    return (
+        set(statistic.user_questions.values_list("question", "id")),
+        set(
+            UserAnswer.objects.filter(user_question__statistic=statistic).values_list(
+                "id", flat=True
+            )
+        ),
+    )
+
+
+@pytest.mark.django_db
+def test_repeated_batch_updates_answers_in_place(employee, quiz, api_client):
+    """Повторная пачка ответов сохраняет id записей и не удваивает счетчики."""
+    client = api_client(employee)
+    url = f"/api/v1/quizes/{quiz.id}/answer/batch/"
+    payload = [_answer_payload(question) for question in quiz.questions.all()]
+    assert client.post(url, payload, format="json").status_code == 201
+    statistic = Statistic.objects.get(user=employee, quiz=quiz)
+    saved = _saved_ids(statistic)
+
+    for item in payload:
+        item["response_time"] = 20
+    assert client.post(url, payload, format="json").status_code == 201
+
+    statistic.refresh_from_db()
+    assert _saved_ids(statistic) == saved
+    assert statistic.count_answered == len(payload)
+    assert statistic.quiz_time == 20 * len(payload)
+    _assert_consistent(employee, quiz)
+
+
+def _wrong_payload(question):
+    """Возвращает неверный ответ на вопрос с одним ответом."""
+    payload = _answer_payload(question)
+    wrong = question.answers.filter(is_right=False).first()
+    payload["answers"] = [{"answer": wrong.id, "answer_text": "", "answer_list": []}]
+    return payload
+
+
+@pytest.mark.django_db
+def test_answer_deltas_match_full_recount(employee, quiz, api_client):
+    """Рейтинг, измененный на разницу ответов, совпадает с полным пересчетом."""
+    client = api_client(employee)
+    url = f"/api/v1/quizes/{quiz.id}/answer/"
+    questions = list(quiz.questions.order_by("id"))
+    single = [
+        question
+        for question in questions
+        if question.question_type == Question.TypeChoices.ONE
+    ]
+    assert single
+
+    for question in questions:
+        payload = (
+            _wrong_payload(question)
+            if question in single
+            else _answer_payload(question)
+        )
+        assert client.post(url, payload, format="json").status_code == 201
+        _assert_consistent(employee, quiz)
+
+    # Исправление ответов после завершения квиза и обратно.
+    for make_payload in (_answer_payload, _wrong_payload):
+        for question in single:
+            payload = make_payload(question)
+            assert client.post(url, payload, format="json").status_code == 201
+            _assert_consistent(employee, quiz)
+
+
+@pytest.mark.django_db
+def test_repeated_answer_updates_user_question(employee, quiz, api_client):
+    """Повторный ответ на вопрос обновляет тот же UserQuestion."""
+    client = api_client(employee)
+    url = f"/api/v1/quizes/{quiz.id}/answer/"
+    question = quiz.questions.filter(question_type=Question.TypeChoices.ONE).first()
+    assert client.post(url, _wrong_payload(question), format="json").status_code == 201
+    statistic = Statistic.objects.get(user=employee, quiz=quiz)
+    (user_question,) = statistic.user_questions.all()
+
+    payload = _answer_payload(question)
+    assert client.post(url, payload, format="json").status_code == 201
+
+    (updated,) = statistic.user_questions.all()
+    assert updated.id == user_question.id
+    assert (user_question.is_right, updated.is_right) == (False, True)
+    assert list(updated.user_answers.values_list("answer", flat=True)) == [
+        answer["answer"] for answer in payload["answers"]
+    ]
+    _assert_consistent(employee, quiz)
+
+
+@pytest.mark.django_db
+def test_answer_locks_statistic_before_reading(employee, quiz, api_client):
+    """Ответ блокирует статистику до чтения прежнего ответа на вопрос."""
+    events, select_for_update = [], QuerySet.select_for_update
+
+    def lock(queryset, *args, **kwargs):
+        events.append(f"lock {queryset.model.__name__}")
+        return select_for_update(queryset, *args, **kwargs)
+
+    def record(execute, sql, params, many, context):
+        if sql.startswith("SELECT") and 'FROM "quizes_userquestion"' in sql:
+            events.append("read UserQuestion")
+        return execute(sql, params, many, context)
+
+    question = quiz.questions.order_by("id").first()
+    with patch.object(QuerySet, "select_for_update", lock):
+        with connection.execute_wrapper(record):
+            response = api_client(employee).post(
+                f"/api/v1/quizes/{quiz.id}/answer/",
+                _answer_payload(question),
+                format="json",
+            )
+
+    assert response.status_code == 201
+    assert events.index("lock Statistic") < events.index("read UserQuestion")
+
+
+@pytest.mark.skipif(
+    not connection.features.has_select_for_update,
+    reason="Блокировки строк не поддерживаются базой данных.",
+)
+@pytest.mark.django_db(transaction=True)
+def test_double_submit_counts_answer_once(employee, quiz, api_client):
+    """Два одновременных одинаковых ответа сохраняются и учитываются один раз."""
+    url = f"/api/v1/quizes/{quiz.id}/answer/"
+    payload = _answer_payload(quiz.questions.order_by("id").first())
+    barrier, statuses = threading.Barrier(2), []
+
+    def submit():
+        try:
+            barrier.wait()
+            response = api_client(employee).post(url, payload, format="json")
+            statuses.append(response.status_code)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=submit) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses == [201, 201]
+    statistic = Statistic.objects.get(user=employee, quiz=quiz)
+    assert statistic.user_questions.count() == 1
+    _assert_consistent(employee, quiz)
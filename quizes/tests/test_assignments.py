@@ -0,0 +1,68 @@
+import pytest
+
+from quizes.models import AssignedQuiz, Quiz
+
+URL = "/api/v1/admin/quizes/assigned_list/"
+
+
+def _payload(users, quizes):
+    """Возвращает тело запроса назначения квизов."""
+    return {
+        "users": [{"id": user} for user in users],
+        "quizes": [{"id": quiz} for quiz in quizes],
+    }
+
+
+@pytest.fixture
+def client(admin, api_client):
+    """Возвращает клиент администратора."""
+    return api_client(admin)
+
+
+@pytest.fixture
+def quizes(employee):
+    """Возвращает id двух квизов без назначений сотруднику."""
+    return list(
+        Quiz.objects.exclude(assigned__user=employee)
+        .order_by("id")
+        .values_list("id", flat=True)[:2]
+    )
+
+
+@pytest.mark.django_db
+def test_unknown_ids_are_rejected(client, employee, quizes):
+    """Неизвестные пользователи и квизы перечисляются в ошибке, ничего не создается."""
+    response = client.post(
+        URL, _payload([employee.id, 0], [quizes[0], 0, -1]), format="json"
+    )
+
+    assert response.status_code == 400
+    assert set(response.data) == {"users", "quizes"}
+    assert "[-1, 0]" in str(response.data["quizes"][0])
+    assert not AssignedQuiz.objects.filter(user=employee, quiz__in=quizes).exists()
+
+
+@pytest.mark.django_db
+def test_repeated_assignment_is_skipped(client, employee, quizes):
+    """Повторное назначение пропускается, новые пары создаются."""
+    first = client.post(URL, _payload([employee.id], quizes[:1]), format="json")
+    second = client.post(URL, _payload([employee.id], quizes), format="json")
+
+    assert first.status_code == second.status_code == 201
+    assert first.data == {"created": 1, "skipped": 0}
+    assert second.data == {"created": 1, "skipped": 1}
+    assert AssignedQuiz.objects.filter(user=employee, quiz__in=quizes).count() == 2
+
+
+@pytest.mark.django_db
+def test_duplicate_pairs_in_payload_are_created_once(client, employee, quizes):
+    """Повторы пользователей и квизов в одном запросе создают одно назначение."""
+    response = client.post(
+        URL,
+        _payload([employee.id, employee.id], [quizes[0], quizes[0]]),
+        format="json",
+    )
+
+    assert response.status_code == 201
+    assert response.data == {"created": 1, "skipped": 0}
+    assert AssignedQuiz.objects.filter(user=employee, quiz=quizes[0]).count() == 1
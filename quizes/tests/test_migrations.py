@@ -0,0 +1,130 @@
+import pytest
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+
+from quizes.models import AssignedQuiz, Statistic, UserQuestion
+from ratings.models import Rating
+
+# Состояние до миграций, удаляющих дубли и добавляющих уникальные ограничения.
+BEFORE = [
+    ("quizes", "0016_quizimage_assignedquiz_pub_date"),
+    ("ratings", "0003_rating_department"),
+    ("user", "0005_outgoingmail_sending_status"),
+]
+RATING_FIELDS = (
+    "count_completed",
+    "count_passed",
+    "count_failed",
+    "count_assigned",
+    "answered_questions",
+    "right_questions",
+    "wrong_questions",
+    "passed_time",
+    "user_rating",
+)
+
+
+@pytest.fixture
+def old_apps():
+    """
+    Откатывает схему к состоянию BEFORE и возвращает ее модели.
+
+    После теста применяются все миграции.
+    """
+    executor = MigrationExecutor(connection)
+    executor.migrate(BEFORE)
+    yield executor.loader.project_state(BEFORE).apps
+    executor = MigrationExecutor(connection)
+    executor.migrate(executor.loader.graph.leaf_nodes())
+
+
+def _seed_duplicates(apps):
+    """
+    Создает повторные статистики, ответы на вопросы и назначения.
+
+    Рейтинг пользователя учитывает обе статистики, как до ограничений.
+    Возвращает id пользователя.
+    """
+    User = apps.get_model("user", "CustomUser")
+    Quiz = apps.get_model("quizes", "Quiz")
+    Question = apps.get_model("quizes", "Question")
+    Statistic = apps.get_model("quizes", "Statistic")
+    UserQuestion = apps.get_model("quizes", "UserQuestion")
+    AssignedQuiz = apps.get_model("quizes", "AssignedQuiz")
+    Rating = apps.get_model("ratings", "Rating")
+    UserLevel = apps.get_model("ratings", "UserLevel")
+
+    user = User.objects.create(
+        email="user@corpquiz.test",
+        firstName="Имя",
+        lastName="Фамилия",
+        position="Сотрудник",
+        role="EMP",
+    )
+    quiz = Quiz.objects.create(
+        name="Квиз", description="Описание", threshold=50, duration=5
+    )
+    questions = [
+        Question.objects.create(quiz=quiz, text=f"Вопрос {number}")
+        for number in range(2)
+    ]
+    AssignedQuiz.objects.bulk_create(
+        [AssignedQuiz(user=user, quiz=quiz), AssignedQuiz(user=user, quiz=quiz)]
+    )
+    counts = {
+        "count_questions": 2,
+        "count_answered": 2,
+        "count_right": 2,
+        "count_wrong": 0,
+        "quiz_time": 4,
+        "is_completed": True,
+        "is_passed": True,
+    }
+    kept = Statistic.objects.create(user=user, quiz=quiz, **counts)
+    Statistic.objects.create(user=user, quiz=quiz, **{**counts, "count_answered": 1})
+    for question in questions:
+        UserQuestion.objects.create(
+            statistic=kept, question=question, is_right=True, response_time=2
+        )
+    # Повторный неверный ответ на первый вопрос остается последним.
+    UserQuestion.objects.create(
+        statistic=kept, question=questions[0], is_right=False, response_time=3
+    )
+    Rating.objects.create(
+        user=user,
+        user_level=UserLevel.objects.create(level=1),
+        count_completed=2,
+        count_passed=2,
+        answered_questions=3,
+        right_questions=3,
+        user_rating=3,
+    )
+    return user.id
+
+
+def _rating_counts(user_id):
+    """Возвращает счетчики рейтинга пользователя."""
+    return Rating.objects.filter(user=user_id).values(*RATING_FIELDS).get()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_migrations_remove_duplicates_and_recount(old_apps):
+    """Миграции оставляют по одной записи и пересчитывают статистику и рейтинг."""
+    user_id = _seed_duplicates(old_apps)
+
+    executor = MigrationExecutor(connection)
+    executor.migrate(executor.loader.graph.leaf_nodes())
+
+    assert AssignedQuiz.objects.filter(user=user_id).count() == 1
+    statistic = Statistic.objects.get(user=user_id)
+    assert UserQuestion.objects.filter(statistic=statistic).count() == 2
+    assert (statistic.count_answered, statistic.count_right) == (2, 1)
+    assert (statistic.is_completed, statistic.is_passed) == (True, True)
+    assert statistic.is_assigned
+    migrated = _rating_counts(user_id)
+    with transaction.atomic():
+        Rating.objects.get(user=user_id).set_ratings()
+        recounted = _rating_counts(user_id)
+        transaction.set_rollback(True)
+    assert migrated == recounted
+    assert migrated["count_passed"] == 1
@@ -0,0 +1,153 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from quizes.models import Answer, AnswerList, Question
+
+
+def _url(quiz, question=None):
+    """Возвращает адрес вопросов квиза или одного вопроса."""
+    url = f"/api/v1/admin/quizes/{quiz.id}/questions/"
+    return f"{url}{question.id}/" if question else url
+
+
+def _list_url(quiz):
+    """Возвращает адрес создания списка вопросов квиза."""
+    return f"/api/v1/admin/quizes/{quiz.id}/questions_list/"
+
+
+def _lst_question(number):
+    """Возвращает данные вопроса на сопоставление с вложенными списками."""
+    return {
+        "question_type": "LST",
+        "text": f"Сопоставьте {number}",
+        "answers": [
+            {
+                "text": f"Ответ {number}-{answer}",
+                "answers_list": [
+                    {"text": f"Элемент {number}-{answer}-{item}"} for item in range(2)
+                ],
+            }
+            for answer in range(2)
+        ],
+    }
+
+
+def _tree(question):
+    """Возвращает ответы вопроса и элементы их списков с id."""
+    return [
+        (
+            answer.id,
+            answer.text,
+            [(item.id, item.text) for item in answer.answers_list.order_by("id")],
+        )
+        for answer in question.answers.order_by("id")
+    ]
+
+
+@pytest.fixture
+def question(quiz):
+    """Возвращает вопрос на сопоставление с тремя ответами."""
+    return Question.objects.create_tree(
+        quiz.id,
+        [
+            {
+                "question_type": "LST",
+                "text": "Сопоставьте",
+                "answers": [
+                    {
+                        "text": f"Ответ {number}",
+                        "answers_list": [
+                            {"text": f"Элемент {number}-{item}"} for item in range(2)
+                        ],
+                    }
+                    for number in range(3)
+                ],
+            }
+        ],
+    )[0]
+
+
+@pytest.mark.django_db
+def test_create_questions_list(admin, api_client, quiz):
+    """Список вопросов создается с ответами и элементами списков."""
+    payload = [_lst_question(number) for number in range(2)]
+
+    response = api_client(admin).post(_list_url(quiz), payload, format="json")
+
+    assert response.status_code == 201
+    questions = Question.objects.filter(id__in=[item["id"] for item in response.data])
+    assert [
+        {
+            "question_type": question.question_type,
+            "text": question.text,
+            "answers": [
+                {"text": text, "answers_list": [{"text": item} for _, item in items]}
+                for _, text, items in _tree(question)
+            ],
+        }
+        for question in questions.order_by("id")
+    ] == payload
+    assert [
+        [item["text"] for item in answer["answers_list"]]
+        for answer in response.data[1]["answers"]
+    ] == [[f"Элемент 1-{answer}-{item}" for item in range(2)] for answer in range(2)]
+
+
+@pytest.mark.django_db
+def test_create_questions_list_query_count(admin, api_client, quiz):
+    """Количество запросов не зависит от количества создаваемых вопросов."""
+    client, url = api_client(admin), _list_url(quiz)
+    counts = []
+    for size in (1, 5):
+        payload = [_lst_question(number) for number in range(size)]
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(url, payload, format="json")
+        assert response.status_code == 201
+        counts.append(len(queries))
+
+    assert counts[0] == counts[1]
+
+
+@pytest.mark.django_db
+def test_update_preserves_answer_ids(admin, api_client, quiz, question):
+    """PUT обновляет переданные ответы на месте, создает новые и удаляет лишние."""
+    (kept, kept_items), (renamed, renamed_items), (dropped, _) = [
+        (answer, [item for item, _ in items]) for answer, _, items in _tree(question)
+    ]
+    payload = {
+        "question_type": "LST",
+        "text": "Сопоставьте",
+        "answers": [
+            {
+                "id": kept,
+                "text": "Ответ 0",
+                "answers_list": [
+                    {"id": kept_items[0], "text": "Новый элемент 0-0"},
+                    {"text": "Элемент 0-2"},
+                ],
+            },
+            # Без answers_list элементы ответа не меняются.
+            {"id": renamed, "text": "Новый ответ 1"},
+            {"text": "Ответ 3", "answers_list": [{"text": "Элемент 3-0"}]},
+        ],
+    }
+
+    response = api_client(admin).put(_url(quiz, question), payload, format="json")
+
+    assert response.status_code == 200
+    (first, first_items), second, (added, added_items) = [
+        ((answer, text), items) for answer, text, items in _tree(question)
+    ]
+    assert first == (kept, "Ответ 0")
+    assert first_items[0] == (kept_items[0], "Новый элемент 0-0")
+    assert first_items[1][1] == "Элемент 0-2"
+    assert first_items[1][0] not in kept_items
+    assert second == (
+        (renamed, "Новый ответ 1"),
+        [(item, f"Элемент 1-{number}") for number, item in enumerate(renamed_items)],
+    )
+    assert added[0] > dropped
+    assert (added[1], [text for _, text in added_items]) == ("Ответ 3", ["Элемент 3-0"])
+    assert not Answer.objects.filter(id=dropped).exists()
+    assert not AnswerList.objects.filter(id=kept_items[1]).exists()
@@ -0,0 +1,119 @@
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DataError
+
+from quizes.models import Quiz
+from quizes.transfer import compress, export_quizes, import_quizes, read_lines
+from user.models import Department
+
+IMAGE = b"\x89PNG\r\n\x1a\n image"
+
+
+@pytest.fixture
+def media(settings, tmp_path):
+    """Сохраняет файлы тестов во временный каталог."""
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def target():
+    """Возвращает отдел, в который импортируются квизы."""
+    return Department.objects.create(name="Отдел импорта")
+
+
+def _tree(quiz):
+    """Возвращает содержимое квиза без id для сравнения."""
+    return {
+        "name": quiz.name,
+        "tags": sorted(quiz.tags.values_list("name", flat=True)),
+        "volumes": sorted(quiz.volumes.values_list("name", "description")),
+        "questions": [
+            (
+                question.question_type,
+                question.text,
+                [
+                    (
+                        answer.text,
+                        answer.is_right,
+                        [item.text for item in answer.answers_list.order_by("id")],
+                    )
+                    for answer in question.answers.order_by("id")
+                ],
+            )
+            for question in quiz.questions.order_by("id")
+        ],
+    }
+
+
+@pytest.mark.django_db
+def test_export_import_roundtrip(quiz, target, media):
+    """Импорт выгрузки создает в отделе такой же квиз с изображением."""
+    quiz.image.save("cover.png", ContentFile(IMAGE))
+    lines = b"".join(compress(export_quizes(Quiz.objects.filter(id=quiz.id))))
+
+    report = import_quizes(read_lines(io.BytesIO(lines)), directory=target)
+
+    copy = Quiz.objects.get(id__in=report["created"])
+    assert copy.directory == target
+    assert _tree(copy) == _tree(quiz)
+    assert copy.image.read() == IMAGE
+
+
+@pytest.mark.django_db
+def test_repeated_import_is_skipped(quiz, target, media):
+    """Повторный импорт той же выгрузки в отдел не создает копию."""
+    lines = list(export_quizes(Quiz.objects.filter(id=quiz.id)))
+    created = import_quizes(lines, directory=target)["created"]
+
+    assert import_quizes(lines, directory=target) == {
+        "created": [],
+        "skipped": created,
+    }
+
+
+@pytest.mark.django_db
+def test_failed_import_removes_images(quiz, target, media):
+    """При ошибке импорта не остаются ни квизы, ни файлы изображений."""
+    quiz.image.save("cover.png", ContentFile(IMAGE))
+    lines = list(export_quizes(Quiz.objects.filter(id=quiz.id)))
+    lines.append(b'{"type": "unknown"}\n')
+    stored = set(default_storage.listdir("quizes/image")[1])
+
+    with pytest.raises(ValueError):
+        import_quizes(lines, directory=target)
+
+    assert not Quiz.objects.filter(directory=target).exists()
+    assert default_storage.listdir("imports") == ([], [])
+    assert set(default_storage.listdir("quizes/image")[1]) == stored
+
+
+@pytest.mark.django_db
+def test_too_long_answer_is_rejected(quiz, target, media):
+    """Текст ответа длиннее поля модели отклоняется до сохранения."""
+    records = [
+        json.loads(line) for line in export_quizes(Quiz.objects.filter(id=quiz.id))
+    ]
+    question = next(record for record in records if record["type"] == "question")
+    question["answers"][0]["text"] = "ы" * 241
+    lines = [json.dumps(record) for record in records]
+
+    with pytest.raises(ValueError, match="240"):
+        import_quizes(lines, directory=target)
+
+    assert not Quiz.objects.filter(directory=target).exists()
+
+
+@pytest.mark.django_db
+def test_database_error_is_value_error(quiz, target, media):
+    """Ошибки данных, отклоненных БД, возвращаются как ValueError."""
+    lines = list(export_quizes(Quiz.objects.filter(id=quiz.id)))
+
+    with patch.object(Quiz.objects, "create", side_effect=DataError("too long")):
+        with pytest.raises(ValueError, match="too long"):
+            import_quizes(lines, directory=target)
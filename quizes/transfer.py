@@ -0,0 +1,332 @@
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+import zlib
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DataError, IntegrityError, transaction
+
+from api.cache import bump
+from quizes.models import Answer, AnswerList, Question, Quiz, QuizLevel, Tag, Volume
+from user.models import Department
+
+# Версия формата выгрузки, записывается в каждую запись квиза.
+FORMAT_VERSION = 1
+# Количество квизов, загружаемых из БД за один запрос при выгрузке.
+EXPORT_CHUNK_SIZE = 100
+# Каталог хранилища для изображений, загруженных при импорте.
+IMAGES_DIR = "imports"
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def export_quizes(quizes):
+    """
+    Выгружает квизы построчно в формате NDJSON.
+
+    Для каждого квиза выводятся записи изображений, затем запись квиза,
+    его учебные материалы и вопросы с ответами. Изображения передаются
+    один раз и указываются в остальных записях по хэшу содержимого.
+    Возвращает генератор строк в байтах.
+    """
+    quizes = quizes.select_related("directory", "level").prefetch_related(
+        "tags", "volumes", "questions__answers__answers_list"
+    )
+    hashes, exported = {}, set()
+    for quiz in quizes.order_by("id").iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        questions = list(quiz.questions.all())
+        answers = [
+            answer for question in questions for answer in question.answers.all()
+        ]
+        for field in [quiz.image, *(item.image for item in questions + answers)]:
+            record = _image_record(field, hashes, exported)
+            if record:
+                yield _dump(record)
+
+        yield _dump(
+            {
+                "type": "quiz",
+                "version": FORMAT_VERSION,
+                "name": quiz.name,
+                "description": quiz.description,
+                "duration": quiz.duration,
+                "threshold": quiz.threshold,
+                "image": hashes.get(quiz.image.name),
+                "directory": quiz.directory.name if quiz.directory else None,
+                "level": quiz.level
+                and {"name": quiz.level.name, "description": quiz.level.description},
+                "tags": [
+                    {"name": tag.name, "color": tag.color} for tag in quiz.tags.all()
+                ],
+            }
+        )
+        for volume in quiz.volumes.all():
+            yield _dump(
+                {
+                    "type": "volume",
+                    "name": volume.name,
+                    "description": volume.description,
+                }
+            )
+        for question in questions:
+            yield _dump(
+                {
+                    "type": "question",
+                    "question_type": question.question_type,
+                    "text": question.text,
+                    "explanation": question.explanation,
+                    "image": hashes.get(question.image.name),
+                    "answers": [
+                        {
+                            "text": answer.text,
+                            "is_right": answer.is_right,
+                            "image": hashes.get(answer.image.name),
+                            "answers_list": [
+                                {"text": item.text}
+                                for item in answer.answers_list.all()
+                            ],
+                        }
+                        for answer in question.answers.all()
+                    ],
+                }
+            )
+
+
+def compress(lines):
+    """Сжимает поток строк в gzip, не собирая его целиком в памяти."""
+    compressor = zlib.compressobj(wbits=31)
+    for line in lines:
+        chunk = compressor.compress(line)
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+def read_lines(fileobj):
+    """Возвращает строки файла выгрузки, распаковывая его при необходимости."""
+    if fileobj.read(2) == GZIP_MAGIC:
+        fileobj.seek(0)
+        return gzip.GzipFile(fileobj=fileobj)
+    fileobj.seek(0)
+    return fileobj
+
+
+def import_quizes(lines, directory=None):
+    """
+    Загружает квизы из строк выгрузки в одной транзакции.
+
+    Если передан directory, квизы создаются в этом отделе, иначе отдел
+    ищется по названию из выгрузки. Квиз, уже импортированный в тот же
+    отдел с тем же содержимым, повторно не создается. Возвращает отчет
+    вида {"created": [...], "skipped": [...]} с id квизов.
+
+    Файлы изображений не откатываются вместе с транзакцией, поэтому при
+    ошибке сохраненные импортом изображения удаляются. Ошибки данных
+    выгрузки, в том числе отклоненные БД, возвращаются как ValueError.
+    """
+    report, stored = {"created": [], "skipped": []}, []
+    try:
+        with transaction.atomic():
+            _import_records(lines, directory, report, stored)
+    except Exception as error:
+        for name in stored:
+            default_storage.delete(name)
+        if isinstance(error, (KeyError, TypeError, DataError, IntegrityError)):
+            raise ValueError(f"Некорректная запись выгрузки: {error}.")
+        raise
+    return report
+
+
+def _import_records(lines, directory, report, stored):
+    """
+    Создает квизы по мере чтения записей выгрузки.
+
+    Имена новых файлов изображений добавляются в stored.
+    """
+    images, bundle = {}, None
+    for number, record in _read_records(lines):
+        kind = record.get("type")
+        if kind == "image":
+            images[record["hash"]] = _store_image(record, stored)
+        elif kind == "quiz":
+            if bundle:
+                _import_bundle(bundle, images, directory, report)
+            bundle = {"quiz": record, "volumes": [], "questions": []}
+        elif kind in ("volume", "question") and bundle:
+            bundle[f"{kind}s"].append(record)
+        else:
+            raise ValueError(f"Строка {number}: неожиданная запись {kind}.")
+    if bundle:
+        _import_bundle(bundle, images, directory, report)
+
+
+def _dump(record):
+    """Сериализует запись в строку NDJSON."""
+    return json.dumps(record, ensure_ascii=False).encode() + b"\n"
+
+
+def _image_record(field, hashes, exported):
+    """
+    Возвращает запись изображения, если оно еще не выгружалось.
+
+    Хэши прочитанных файлов хранятся в hashes по имени файла, хэши
+    выгруженных изображений - в exported.
+    """
+    if not field or field.name in hashes:
+        return None
+    try:
+        with field.storage.open(field.name) as image:
+            content = image.read()
+    except OSError:
+        hashes[field.name] = None
+        return None
+    digest = hashlib.sha256(content).hexdigest()
+    hashes[field.name] = digest
+    if digest in exported:
+        return None
+    exported.add(digest)
+    return {
+        "type": "image",
+        "hash": digest,
+        "ext": os.path.splitext(field.name)[1],
+        "data": base64.b64encode(content).decode(),
+    }
+
+
+def _read_records(lines):
+    """Разбирает строки NDJSON, пропуская пустые."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise ValueError(f"Строка {number}: некорректный JSON.")
+        if not isinstance(record, dict):
+            raise ValueError(f"Строка {number}: ожидается объект.")
+        yield number, record
+
+
+def _store_image(record, stored):
+    """
+    Сохраняет изображение из выгрузки и возвращает его имя в хранилище.
+
+    Имя файла строится по хэшу содержимого, поэтому одинаковые изображения
+    хранятся в одном экземпляре. Имя нового файла добавляется в stored.
+    """
+    content = base64.b64decode(record["data"])
+    if hashlib.sha256(content).hexdigest() != record["hash"]:
+        raise ValueError(f"Хэш изображения {record['hash']} не совпадает.")
+    ext = record.get("ext", "")
+    if not re.fullmatch(r"(\.\w{1,10})?", ext):
+        raise ValueError(f"Некорректное расширение изображения: {ext}.")
+    name = f"{IMAGES_DIR}/{record['hash']}{ext}"
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(content))
+        stored.append(name)
+    return name
+
+
+def _import_bundle(bundle, images, directory, report):
+    """Создает квиз со всеми вложенными объектами, если его еще нет."""
+    data = bundle["quiz"]
+    if data.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Неподдерживаемая версия формата: {data.get('version')}.")
+    key = hashlib.sha256(
+        json.dumps(
+            {**bundle, "quiz": {**data, "directory": None}}, sort_keys=True
+        ).encode()
+    ).hexdigest()
+    if directory is None and data.get("directory"):
+        directory = Department.objects.filter(name=data["directory"]).first()
+    existing = Quiz.objects.filter(import_key=key, directory=directory).first()
+    if existing:
+        report["skipped"].append(existing.id)
+        return
+
+    questions = [
+        {
+            "question_type": question["question_type"],
+            "text": question["text"],
+            "explanation": question.get("explanation", ""),
+            "image": images.get(question.get("image"), ""),
+            "answers": [
+                {
+                    "text": answer["text"],
+                    "is_right": answer["is_right"],
+                    "image": images.get(answer.get("image"), ""),
+                    "answers_list": [
+                        {"text": item["text"]}
+                        for item in answer.get("answers_list", [])
+                    ],
+                }
+                for answer in question["answers"]
+            ],
+        }
+        for question in bundle["questions"]
+    ]
+    for question in questions:
+        _check_lengths(Question, question)
+        for answer in question["answers"]:
+            _check_lengths(Answer, answer)
+            for item in answer["answers_list"]:
+                _check_lengths(AnswerList, item)
+    for volume in bundle["volumes"]:
+        _check_lengths(Volume, volume)
+
+    level = None
+    if data.get("level"):
+        _check_lengths(QuizLevel, data["level"])
+        level = QuizLevel.objects.filter(name=data["level"]["name"]).first()
+        level = level or QuizLevel.objects.create(**data["level"])
+    fields = {
+        "name": data["name"],
+        "description": data["description"],
+        "duration": data["duration"],
+        "threshold": data["threshold"],
+        "image": images.get(data.get("image"), ""),
+    }
+    _check_lengths(Quiz, fields)
+    quiz = Quiz.objects.create(
+        **fields, directory=directory, level=level, import_key=key
+    )
+    quiz.tags.add(*_get_tags(data.get("tags", [])))
+    Volume.objects.bulk_create(
+        Volume(quiz=quiz, name=volume["name"], description=volume["description"])
+        for volume in bundle["volumes"]
+    )
+    Question.objects.create_tree(quiz.id, questions)
+    report["created"].append(quiz.id)
+
+
+def _get_tags(tags_data):
+    """Возвращает теги по названиям, создавая недостающие."""
+    for tag in tags_data:
+        _check_lengths(Tag, tag)
+    tags = Tag.objects.in_bulk([tag["name"] for tag in tags_data], field_name="name")
+    missing = [Tag(**tag) for tag in tags_data if tag["name"] not in tags]
+    if missing:
+        # bulk_create не отправляет сигналы, сбрасывающие кэш тегов.
+        bump("tags")
+    return [*tags.values(), *Tag.objects.bulk_create(missing)]
+
+
+def _check_lengths(model, data):
+    """
+    Проверяет, что строки записи помещаются в поля модели.
+
+    Не все БД ограничивают длину строк, поэтому длина проверяется до
+    сохранения, а ошибка указывает на поле.
+    """
+    fields = {field.name: field for field in model._meta.concrete_fields}
+    for name, value in data.items():
+        max_length = getattr(fields.get(name), "max_length", None)
+        if isinstance(value, str) and max_length and len(value) > max_length:
+            raise ValueError(
+                f"{model._meta.verbose_name}: значение поля {name} длиннее "
+                f"{max_length} символов."
+            )
@@ -1,54 +1,58 @@
 from datetime import datetime, timedelta
 
 from django.contrib.auth import get_user_model
-from django.db.models import Exists, F, OuterRef
+from django.db.models import Case, Exists, F, OuterRef, Prefetch, Value, When
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, mixins, permissions, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.response import Response
 
-from quizes import models, serializers
+from api.cache import CachedResponseMixin, bump
+from quizes import models, serializers, transfer
+from user.models import Department
 
 User = get_user_model()
 
 
-class QuizViewSet(viewsets.ReadOnlyModelViewSet):
+class QuizViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет для просмотра квизов."""
 
     serializer_class = serializers.QuizSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_scope = "quizes"
+    cache_vary_on = "user"
 
     def get_queryset(self):
         """
         Возвращает квизы, соответствующие отделу текущего пользователя.
 
-        Каждый квиз аннотирован информацией о том, был ли он назначен пользователю.
+        Каждый квиз аннотирован информацией о том, был ли он назначен
+        и пройден пользователем, а также количеством вопросов.
         """
         if not self.request.user.is_authenticated:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
         directory = self.request.user.department
         user = self.request.user
-        new_queryset = (
-            models.Quiz.objects.select_related("directory", "level")
-            .prefetch_related("tags")
-            .filter(directory=directory)
-            .annotate(
-                appointed=Exists(
-                    models.AssignedQuiz.objects.filter(
-                        quiz__id=OuterRef("id"), user__id=user.id
-                    )
-                )
-            )
-        )
-        return new_queryset
+        return models.Quiz.objects.for_catalog(user).filter(directory=directory)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Возвращает квиз из кэша."""
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
 
 
 # TODO перенести в QuizViewSet
-class NotComplitedQuizViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class NotComplitedQuizViewSet(
+    CachedResponseMixin, mixins.ListModelMixin, viewsets.GenericViewSet
+):
     """Вьюсет для просмотра незавершенных квизов."""
 
     serializer_class = serializers.QuizSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_scope = "quizes"
+    cache_vary_on = "user"
 
     def get_queryset(self):
         """Возвращает все незавершенные квизы для текущего пользователя."""
@@ -57,16 +61,8 @@ class NotComplitedQuizViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
         directory = self.request.user.department
         user = self.request.user
         new_queryset = (
-            models.Quiz.objects.select_related("directory", "level")
-            .prefetch_related("tags")
+            models.Quiz.objects.for_catalog(user)
             .filter(directory=directory)
-            .annotate(
-                appointed=Exists(
-                    models.AssignedQuiz.objects.filter(
-                        quiz__id=OuterRef("id"), user__id=user.id
-                    )
-                )
-            )
             .filter(
                 statistics__user=user,
                 statistics__count_answered__gt=0,
@@ -104,13 +100,37 @@ class UserQuestionViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
 
         return Response(status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=["post"])
+    def batch(self, request, *args, **kwargs):
+        """
+        Сохраняет ответы сразу на несколько вопросов квиза.
+
+        Принимает массив ответов в том же формате, что и для одного вопроса,
+        и возвращает обновленную статистику прохождения квиза.
+        """
+        quiz = get_object_or_404(models.Quiz, id=self.kwargs.get("quiz_id"))
+        statistic, _ = models.Statistic.objects.get_or_create(
+            user=self.request.user,
+            quiz=quiz,
+        )
+        serializer = self.get_serializer(
+            data=request.data, many=True, context={"statistic": statistic}
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(
+            serializers.StatisticSerializer(statistic).data,
+            status=status.HTTP_201_CREATED,
+        )
+
 
-class QuizLevelViewSet(viewsets.ModelViewSet):
+class QuizLevelViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """Вьюсет для управления уровнями квиза."""
 
     queryset = models.QuizLevel.objects.all()
     serializer_class = serializers.QuizLevelSerializer
     permission_classes = [permissions.IsAdminUser]
+    cache_scope = "levels"
 
     def create(self, request, *args, **kwargs):
         """Создает новый уровень квиза."""
@@ -134,12 +154,13 @@ class QuizLevelViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """Вьюсет для работы с тегами со стороны администратора."""
 
     queryset = models.Tag.objects.all()
     serializer_class = serializers.TagSerializer
     permission_classes = [permissions.IsAdminUser]
+    cache_scope = "tags"
 
     def create(self, request, *args, **kwargs):
         """Создает новый тег."""
@@ -167,7 +188,7 @@ class AssignedQuizViewSet(generics.CreateAPIView):
     """Вьюсет для создания назначенных квизов."""
 
     queryset = models.AssignedQuiz.objects.all()
-    serializer_class = serializers.AssignedSerializer
+    serializer_class = serializers.AssignedBulkSerializer
     permission_classes = [permissions.IsAdminUser]
 
     def post(self, request):
@@ -175,17 +196,29 @@ class AssignedQuizViewSet(generics.CreateAPIView):
         Метод для обработки POST-запросов.
 
         Создает назначенные квизы для указанных пользователей и квизов.
+        Уже существующие назначения пропускаются.
         """
-        users = request.data.get("users")
-        quizes = request.data.get("quizes")
-        for user in users:
-            for quiz in quizes:
-                # TODO использовать сериализатор для получения объектов
-                #  и что-то вроде bulk_update для создания записей
-                q = get_object_or_404(models.Quiz, id=quiz["id"])
-                u = get_object_or_404(User, id=user["id"])
-                _, _ = models.AssignedQuiz.objects.get_or_create(user=u, quiz=q)
-        return Response(status=status.HTTP_201_CREATED)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        users = serializer.validated_data["users"]
+        quizes = serializer.validated_data["quizes"]
+        existing = set(
+            models.AssignedQuiz.objects.filter(
+                user__in=users, quiz__in=quizes
+            ).values_list("user", "quiz")
+        )
+        assigned = [
+            models.AssignedQuiz(user_id=user, quiz_id=quiz)
+            for user in users
+            for quiz in quizes
+            if (user, quiz) not in existing
+        ]
+        models.AssignedQuiz.objects.bulk_create(
+            assigned, batch_size=1000, ignore_conflicts=True
+        )
+        bump("quizes", {f"user:{item.user_id}" for item in assigned})
+        data = {"created": len(assigned), "skipped": len(existing)}
+        return Response(data=data, status=status.HTTP_201_CREATED)
 
 
 class QuestionAdminViewSet(viewsets.ModelViewSet):
@@ -204,7 +237,9 @@ class QuestionAdminViewSet(viewsets.ModelViewSet):
         if getattr(self, "swagger_fake_view", False):
             return self.queryset
         quiz_id = self.kwargs["quiz_id"]
-        return models.Question.objects.filter(quiz_id=quiz_id)
+        return models.Question.objects.filter(quiz_id=quiz_id).prefetch_related(
+            "answers__answers_list"
+        )
 
     def create(self, request, *args, **kwargs):
         """Создает новые вопросы для указанного квиза."""
@@ -223,11 +258,13 @@ class QuestionAdminViewSet(viewsets.ModelViewSet):
 
     def perform_update(self, serializer):
         """Обновляет существующий вопрос указанного квиза."""
-        quiz_id = self.kwargs["quiz_id"]
-        question_id = self.kwargs["pk"]
-        quiz = get_object_or_404(models.Quiz, pk=quiz_id)
-        question = get_object_or_404(models.Question, pk=question_id, quiz=quiz)
-        serializer.save(quiz=quiz)
+        quiz = get_object_or_404(models.Quiz, pk=self.kwargs["quiz_id"])
+        question = serializer.save(quiz=quiz)
+        # Для ответа дерево вопроса перечитывается с предварительной выборкой,
+        # иначе элементы списков загружаются отдельным запросом на каждый ответ.
+        serializer.instance = models.Question.objects.prefetch_related(
+            "answers__answers_list"
+        ).get(pk=question.pk)
 
     def perform_destroy(self, instance):
         """Удаляет существующий вопрос указанного квиза."""
@@ -253,7 +290,13 @@ class QuestionListAdminViewSet(viewsets.ModelViewSet):
             data=request.data, many=True, context={"quiz_id": quiz_id}
         )
         serializer.is_valid(raise_exception=True)
-        created_questions = serializer.save()
+        created_questions = (
+            models.Question.objects.filter(
+                id__in=[question.id for question in serializer.save()]
+            )
+            .prefetch_related("answers__answers_list")
+            .order_by("id")
+        )
 
         serialized_questions = serializers.QuestionAdminSerializer(
             created_questions, many=True, context={"quiz_id": quiz_id}
@@ -269,11 +312,13 @@ class QuizAdminViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAdminUser]
 
     def get_queryset(self):
-        """Возвращает квизы с предварительной выборкой тегов."""
+        """Возвращает квизы с предварительной выборкой вложенных объектов."""
         # для оптимизации запросов к БД, чтобы избежать N+1 проблемы,
         # используем prefetch_related вместо all()
         # return models.Quiz.objects.all()
-        return models.Quiz.objects.prefetch_related("tags").all()
+        return models.Quiz.objects.prefetch_related(
+            "tags", "volumes", "questions__answers__answers_list"
+        ).all()
 
     def perform_create(self, serializer):
         """Создает новый объект Quiz и добавляет к нему тег, указанный в запросе."""
@@ -305,6 +350,50 @@ class QuizAdminViewSet(viewsets.ModelViewSet):
         """Удаляет существующий объект Quiz."""
         instance.delete()
 
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Выгружает квизы в формате NDJSON.
+
+        Параметр ids ограничивает выгрузку списком квизов через запятую,
+        параметр compress=1 включает сжатие gzip.
+        """
+        quizes = models.Quiz.objects.all()
+        if request.query_params.get("ids"):
+            try:
+                ids = [int(id) for id in request.query_params["ids"].split(",")]
+            except ValueError:
+                raise ValidationError({"ids": ["Ожидается список id через запятую."]})
+            quizes = quizes.filter(id__in=ids)
+        lines = transfer.export_quizes(quizes)
+        filename = "quizes.ndjson"
+        if request.query_params.get("compress") == "1":
+            lines, filename = transfer.compress(lines), f"{filename}.gz"
+        response = StreamingHttpResponse(lines, content_type="application/x-ndjson")
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(detail=False, methods=["post"], url_path="import")
+    def import_quizes(self, request):
+        """
+        Загружает квизы из файла выгрузки в поле file.
+
+        Параметр directory задает отдел, в который копируются квизы.
+        """
+        upload = request.FILES.get("file")
+        if not upload:
+            raise ValidationError({"file": ["Передайте файл выгрузки."]})
+        directory = None
+        if request.data.get("directory"):
+            directory = get_object_or_404(Department, pk=request.data["directory"])
+        try:
+            report = transfer.import_quizes(
+                transfer.read_lines(upload), directory=directory
+            )
+        except (ValueError, OSError) as error:
+            raise ValidationError({"file": [str(error)]})
+        return Response(status=status.HTTP_201_CREATED, data=report)
+
 
 class QuizVolumeViewSet(viewsets.ModelViewSet):
     """
@@ -339,7 +428,6 @@ class QuizVolumeViewSet(viewsets.ModelViewSet):
 class StatisticApiView(generics.RetrieveAPIView):
     """Вьюсет для получения статистики по квизу."""
 
-    # TODO сделать сериализатор
     serializer_class = serializers.StatisticSerializer
     queryset = models.Statistic.objects.all()
     permission_classes = [permissions.IsAuthenticated]
@@ -350,56 +438,11 @@ class StatisticApiView(generics.RetrieveAPIView):
 
         Возвращает статистику по квизу для текущего пользователя.
         """
-
-        def _get_one(user_question, data):
-            data["answers"] = []
-            for answer in user_question.question.answers.all():
-                user_answer = models.UserAnswer.objects.filter(
-                    answer=answer, user_question=user_question
-                ).first()
-                answered = False
-                is_right = None
-                if user_answer:
-                    answered = True
-                    is_right = answer.is_right
-                data["answers"].append(
-                    {
-                        "answer_text": answer.text,
-                        "answered": answered,
-                        "answer_right": is_right,
-                        "is_right": answer.is_right,
-                    }
-                )
-            return data
-
-        def _get_lst(user_question, data):
-            data["answers"] = []
-            for user_answer in user_question.user_answers.all():
-                data_answer = {"answer_text": user_answer.answer.text}
-                data_answer["answer_list"] = []
-                for user_answer_list in user_answer.user_answers_list.all():
-                    is_right = (
-                        user_answer_list.user_answer.answer
-                        == user_answer_list.answer_list.answer
-                    )
-                    answer_list = {
-                        "text": user_answer_list.answer_list.text,
-                        "answer_right": is_right,
-                    }
-                    data_answer["answer_list"].append(answer_list)
-                data["answers"].append(data_answer)
-            return data
-
-        def _get_opn(user_question, data):
-            data["answer"] = user_question.question.answers.first().text
-            data["user_answer"] = user_question.user_answers.first().answer_text
-            data["is_right"] = user_question.is_right
-            return data
-
         quiz = self.kwargs.get("quiz_id")
         user = request.user
-        # TODO запросы с джойнами
-        stat = get_object_or_404(models.Statistic, quiz=quiz, user=user)
+        stat = get_object_or_404(
+            models.Statistic.objects.select_related("quiz"), quiz=quiz, user=user
+        )
         data = []
         info = "квиз не пройден"
         if stat.is_completed and not stat.is_passed:
@@ -411,34 +454,46 @@ class StatisticApiView(generics.RetrieveAPIView):
                 f"Вы ответили правильно на {stat.count_right}"
                 f" вопросов из {stat.count_questions}"
             )
-            for user_question in stat.user_questions.all():
-                question_type = user_question.question.question_type
-                question = {
-                    "question_type": question_type,
-                    "question": user_question.question.text,
-                    "explanation": user_question.question.explanation,
-                    "is_right": user_question.is_right,
-                }
-                if question_type in ("ONE", "MNY"):
-                    question = _get_one(user_question, question)
-                elif question_type == "LST":
-                    question = _get_lst(user_question, question)
-                elif question_type == "OPN":
-                    question = _get_opn(user_question, question)
-                else:
-                    # TODO подумать над обработкой ошибки
-                    continue
-                data.append(question)
+            user_questions = (
+                stat.user_questions.filter(
+                    question__question_type__in=models.Question.TypeChoices.values
+                )
+                .select_related("question")
+                .prefetch_related(
+                    Prefetch(
+                        "question__answers",
+                        queryset=models.Answer.objects.order_by("id"),
+                    ),
+                    Prefetch(
+                        "user_answers",
+                        queryset=models.UserAnswer.objects.select_related(
+                            "answer"
+                        ).order_by("id"),
+                    ),
+                    Prefetch(
+                        "user_answers__user_answers_list",
+                        queryset=models.UserAnswerList.objects.select_related(
+                            "answer_list"
+                        ),
+                    ),
+                )
+            )
+            data = serializers.UserQuestionResultSerializer(
+                user_questions, many=True
+            ).data
         result = {"result": stat.is_passed, "info": info, "statistics": data}
         return Response(data=result, status=status.HTTP_200_OK)
 
 
-class QuizImageViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class QuizImageViewSet(
+    CachedResponseMixin, mixins.ListModelMixin, viewsets.GenericViewSet
+):
     """Представление для просмотра изображений квизов."""
 
     serializer_class = serializers.QuizImageSerializer
     permission_classes = [permissions.IsAdminUser]
     queryset = models.QuizImage.objects.all()
+    cache_scope = "images"
 
 
 class AssignedAPIView(generics.ListAPIView):
@@ -447,6 +502,53 @@ class AssignedAPIView(generics.ListAPIView):
     serializer_class = serializers.AssignedSerializer
     permission_classes = [permissions.IsAdminUser]
     queryset = models.AssignedQuiz.objects.all()
+    # Пагинация включается только при передаче параметра limit.
+    pagination_class = LimitOffsetPagination
+    # Давность назначения в днях (не включительно) для каждого статуса.
+    statuses = {"3 дня": 4, "1 неделя": 8, "2 недели": 15, "более 2-х недель": 9999}
+
+    def get_queryset(self):
+        """
+        Возвращает назначения одним запросом.
+
+        Статус вычисляется в БД по дате назначения, признак прохождения -
+        по наличию пройденной статистики, данные квиза и пользователя
+        выбираются через JOIN.
+        """
+        now = datetime.today().date()
+        buckets = [
+            When(pub_date__gt=now - timedelta(days=value), then=Value(key))
+            for key, value in self.statuses.items()
+        ]
+        return (
+            models.AssignedQuiz.objects.filter(
+                pub_date__gt=now - timedelta(days=max(self.statuses.values())),
+                pub_date__lte=now,
+            )
+            .annotate(
+                status=Case(*buckets),
+                is_passed=Exists(
+                    models.Statistic.objects.filter(
+                        user=OuterRef("user"), quiz=OuterRef("quiz"), is_passed=True
+                    )
+                ),
+            )
+            .order_by("-pub_date", "quiz", "user")
+            .values(
+                "status",
+                "is_passed",
+                "pub_date",
+                "quiz",
+                "quiz__name",
+                "quiz__directory__name",
+                "user",
+                "user__lastName",
+                "user__firstName",
+                "user__patronymic",
+                "user__department__name",
+                "user__position",
+            )
+        )
 
     def get(self, request, *args, **kwargs):
         """
@@ -454,46 +556,32 @@ class AssignedAPIView(generics.ListAPIView):
 
         Возвращает список назначенных квизов, сгруппированных по статусу.
         """
-
-        def create_list(queryset, quizes, status):
-            for item in queryset:
-                if item.quiz.id not in quizes:
-                    quizes[item.quiz.id] = {}
-                    quizes[item.quiz.id]["name"] = item.quiz.name
-                    quizes[item.quiz.id]["department"] = (
-                        item.quiz.directory.name if item.quiz.directory else None
-                    )
-                    quizes[item.quiz.id]["status"] = status
-                    quizes[item.quiz.id]["users"] = []
-                stat, _ = models.Statistic.objects.get_or_create(
-                    user=item.user, quiz=item.quiz
-                )
-                user = {
-                    "id": item.user.id,
-                    "name": item.user.full_name,
-                    "department": (
-                        item.user.department.name if item.user.department else None
-                    ),
-                    "position": item.user.position,
-                    "date": item.pub_date,
-                    "is_passed": stat.is_passed,
-                }
-                quizes[item.quiz.id]["users"].append(user)
-            return quizes
-
-        now = datetime.today().date()
-        statuses = {"3 дня": 4, "1 неделя": 8, "2 недели": 15, "более 2-х недель": 9999}
+        queryset = self.get_queryset()
+        page = self.paginate_queryset(queryset)
         data = {}
-        old_value = 0
-        for key, value in statuses.items():
-            qs = models.AssignedQuiz.objects.filter(
-                pub_date__gt=now - timedelta(days=value),
-                pub_date__lte=now - timedelta(days=old_value),
-            )
-            old_value = value
-            if qs:
-                data[key] = {}
-                data[key] = create_list(qs, data[key], key)
+        for item in queryset.iterator(chunk_size=2000) if page is None else page:
+            quizes = data.setdefault(item["status"], {})
+            if item["quiz"] not in quizes:
+                quizes[item["quiz"]] = {
+                    "name": item["quiz__name"],
+                    "department": item["quiz__directory__name"],
+                    "status": item["status"],
+                    "users": [],
+                }
+            user = {
+                "id": item["user"],
+                "name": (
+                    f"{item['user__lastName']} {item['user__firstName']} "
+                    f"{item['user__patronymic']}"
+                ),
+                "department": item["user__department__name"],
+                "position": item["user__position"],
+                "date": item["pub_date"],
+                "is_passed": item["is_passed"],
+            }
+            quizes[item["quiz"]]["users"].append(user)
+        if page is not None:
+            return self.get_paginated_response(data)
         return Response(data=data)
 
 
@@ -501,22 +589,19 @@ class AssignedQuizUpdateAPIView(generics.CreateAPIView):
     """Вьюсет для обновления назначенных квизов."""
 
     queryset = models.AssignedQuiz.objects.all()
-    serializer_class = serializers.AssignedSerializer
+    serializer_class = serializers.AssignedBulkSerializer
     permission_classes = [permissions.IsAdminUser]
 
     def post(self, request):
         """Метод для обработки POST-запросов."""
-        users = request.data.get("users")
-        quizes = request.data.get("quizes")
-        for user in users:
-            for quiz in quizes:
-                # TODO использовать сериализатор для получения объектов
-                #  и что-то вроде bulk_update для создания записей
-                q = get_object_or_404(models.Quiz, id=quiz["id"])
-                u = get_object_or_404(User, id=user["id"])
-                assigned = models.AssignedQuiz.objects.filter(user=u, quiz=q).first()
-                if assigned:
-                    assigned.save()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        users = serializer.validated_data["users"]
+        models.AssignedQuiz.objects.filter(
+            user__in=users,
+            quiz__in=serializer.validated_data["quizes"],
+        ).update(pub_date=datetime.today().date())
+        bump("quizes", [f"user:{user}" for user in users])
         return Response(status=status.HTTP_201_CREATED)
 
 
@@ -524,20 +609,17 @@ class AssignedQuizDeleteAPIView(generics.CreateAPIView):
     """Вьюсет для удаления назначенных квизов."""
 
     queryset = models.AssignedQuiz.objects.all()
-    serializer_class = serializers.AssignedSerializer
+    serializer_class = serializers.AssignedBulkSerializer
     permission_classes = [permissions.IsAdminUser]
 
     def post(self, request):
         """Метод для обработки POST-запросов."""
-        users = request.data.get("users")
-        quizes = request.data.get("quizes")
-        for user in users:
-            for quiz in quizes:
-                # TODO использовать сериализатор для получения объектов
-                #  и что-то вроде bulk_update для создания записей
-                q = get_object_or_404(models.Quiz, id=quiz["id"])
-                u = get_object_or_404(User, id=user["id"])
-                assigned = models.AssignedQuiz.objects.filter(user=u, quiz=q).first()
-                if assigned:
-                    assigned.delete()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        users = serializer.validated_data["users"]
+        models.AssignedQuiz.objects.filter(
+            user__in=users,
+            quiz__in=serializer.validated_data["quizes"],
+        ).delete()
+        bump("quizes", [f"user:{user}" for user in users])
         return Response(status=status.HTTP_201_CREATED)
@@ -6,3 +6,7 @@ class RatingsConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "ratings"
+
+    def ready(self):
+        """Подключает сигналы приложения."""
+        from . import signals  # noqa: F401
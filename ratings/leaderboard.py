@@ -0,0 +1,161 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .models import Rating
+
+ORDERING = ("-user_rating", "passed_time", "id")
+
+
+def get_department_ratings(department):
+    """
+    Возвращает рейтинги отдела в порядке таблицы лидеров.
+
+    Рейтинги хранят копию отдела пользователя и покрыты индексом
+    (department, -user_rating, passed_time, id), поэтому выборка читается
+    диапазоном индекса без сортировки всего отдела.
+    """
+    return (
+        Rating.objects.filter(department=department)
+        .select_related("user")
+        .order_by(*ORDERING)
+    )
+
+
+def _position(rating):
+    """Возвращает позицию рейтинга в порядке сортировки таблицы."""
+    return rating.user_rating, rating.passed_time, rating.id
+
+
+def ranked_above(user_rating, passed_time, pk):
+    """Условие для рейтингов, стоящих в таблице выше заданной позиции."""
+    return (
+        Q(user_rating__gt=user_rating)
+        | Q(user_rating=user_rating, passed_time__lt=passed_time)
+        | Q(user_rating=user_rating, passed_time=passed_time, id__lt=pk)
+    )
+
+
+def ranked_below(user_rating, passed_time, pk):
+    """Условие для рейтингов, стоящих в таблице ниже заданной позиции."""
+    return (
+        Q(user_rating__lt=user_rating)
+        | Q(user_rating=user_rating, passed_time__gt=passed_time)
+        | Q(user_rating=user_rating, passed_time=passed_time, id__gt=pk)
+    )
+
+
+def get_rank(rating):
+    """Возвращает место пользователя в таблице лидеров его отдела."""
+    return (
+        Rating.objects.filter(department=rating.department_id)
+        .filter(ranked_above(*_position(rating)))
+        .count()
+        + 1
+    )
+
+
+def get_window(rating, size):
+    """
+    Возвращает рейтинги вокруг пользователя.
+
+    Результат содержит до size мест выше и ниже пользователя и его собственный
+    рейтинг в виде списка пар (место, рейтинг).
+    """
+    ratings = get_department_ratings(rating.department_id)
+    above = list(
+        ratings.filter(ranked_above(*_position(rating))).order_by(
+            "user_rating", "-passed_time", "-id"
+        )[:size]
+    )
+    below = list(ratings.filter(ranked_below(*_position(rating)))[:size])
+    rank = get_rank(rating)
+    window = above[::-1] + [rating] + below
+    first = rank - len(above)
+    return [(first + index, item) for index, item in enumerate(window)]
+
+
+class LeaderboardPagination(BasePagination):
+    """
+    Постраничный вывод таблицы лидеров по ключу (keyset).
+
+    Курсор содержит позицию последнего рейтинга страницы, поэтому следующая
+    страница читается с этой позиции индекса без OFFSET. Пагинация
+    включается только при передаче параметров limit или after.
+    """
+
+    cursor_query_param = "after"
+    limit_query_param = "limit"
+    default_limit = 50
+    max_limit = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Возвращает страницу рейтингов после позиции из курсора."""
+        params = request.query_params
+        if (
+            self.limit_query_param not in params
+            and self.cursor_query_param not in params
+        ):
+            return None
+        self.request = request
+        self.limit = self.get_limit(request)
+        cursor = params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(ranked_below(*self.decode_cursor(cursor)))
+        page = list(queryset[: self.limit + 1])
+        self.has_next = len(page) > self.limit
+        self.page = page[: self.limit]
+        return self.page
+
+    def get_limit(self, request):
+        """Возвращает размер страницы из параметров запроса."""
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def encode_cursor(self, rating):
+        """Кодирует позицию рейтинга в курсор."""
+        position = json.dumps(_position(rating)).encode()
+        return base64.urlsafe_b64encode(position).decode()
+
+    def decode_cursor(self, cursor):
+        """Декодирует курсор в позицию рейтинга."""
+        try:
+            user_rating, passed_time, pk = json.loads(
+                base64.urlsafe_b64decode(cursor.encode())
+            )
+            return int(user_rating), int(passed_time), int(pk)
+        except (binascii.Error, TypeError, ValueError):
+            raise NotFound("Неверный курсор.")
+
+    def get_next_link(self):
+        """Возвращает ссылку на следующую страницу."""
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.page[-1])
+        )
+
+    def get_paginated_response(self, data):
+        """Возвращает страницу со ссылкой на следующую."""
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        """Возвращает схему постраничного ответа."""
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from ratings.models import Achivement, Rating, UserAchivement
+
+
+class Command(BaseCommand):
+    """
+    Команда для пересчета достижений всех пользователей.
+
+    Используется после изменения достижений в админке.
+    """
+
+    help = "Пересчитывает достижения всех пользователей пачками."
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы команды."""
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Количество пользователей, обрабатываемых за один проход.",
+        )
+
+    def handle(self, *args, **options):
+        """Пересчитывает достижения, перебирая рейтинги по первичному ключу."""
+        chunk_size = options["chunk_size"]
+        achivements = list(Achivement.objects.all())
+        ratings = Rating.objects.select_related("user_level").order_by("pk")
+        last_pk, total = 0, 0
+        while True:
+            chunk = list(ratings.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                break
+            UserAchivement.evaluate(chunk, achivements)
+            last_pk = chunk[-1].pk
+            total += len(chunk)
+            self.stdout.write(f"Обработано пользователей: {total}")
+        self.stdout.write(self.style.SUCCESS("Достижения пересчитаны."))
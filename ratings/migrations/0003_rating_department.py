@@ -0,0 +1,36 @@
+# Generated by Django 4.2.2 on 2026-10-18 02:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_department(apps, schema_editor):
+    """Копирует отдел пользователя в его рейтинг."""
+    Rating = apps.get_model('ratings', 'Rating')
+    User = apps.get_model('user', 'CustomUser')
+    Rating.objects.update(
+        department=models.Subquery(
+            User.objects.filter(id=models.OuterRef('user')).values('department')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0002_default_avatar'),
+        ('ratings', '0002_achivement_userachivement_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rating',
+            name='department',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ratings', to='user.department', verbose_name='Отдел'),
+        ),
+        migrations.RunPython(fill_department, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['department', '-user_rating', 'passed_time', 'id'], name='rating_leaderboard_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.2 on 2026-10-18 03:08
+
+from django.db import migrations, models
+
+
+def remove_duplicate_achivements(apps, schema_editor):
+    """Удаляет повторные достижения, оставляя достижение с наибольшим прогрессом."""
+    UserAchivement = apps.get_model('ratings', 'UserAchivement')
+    duplicates = (
+        UserAchivement.objects.values('user', 'achivement')
+        .annotate(count=models.Count('id'))
+        .filter(count__gt=1)
+        .order_by()
+    )
+    for item in duplicates:
+        ids = list(
+            UserAchivement.objects.filter(
+                user=item['user'], achivement=item['achivement']
+            )
+            .order_by('-achived', '-points_now', 'id')
+            .values_list('id', flat=True)
+        )
+        UserAchivement.objects.filter(id__in=ids[1:]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ratings', '0003_rating_department'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_achivements, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='userachivement',
+            index=models.Index(fields=['user', 'achived', 'get_date'], name='user_achivement_progress_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='userachivement',
+            constraint=models.UniqueConstraint(fields=('user', 'achivement'), name='unique_user_achivement'),
+        ),
+    ]
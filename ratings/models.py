@@ -2,7 +2,12 @@ from datetime import datetime
 
 from django.contrib.auth import get_user_model
 from django.db import models
-from django.db.models import Sum
+from django.db.models import F, Sum
+from django.db.models.functions import Greatest
+
+from api.cache import bump
+from user.models import Department
+from user.utils import invalidate_profile
 
 User = get_user_model()
 
@@ -99,13 +104,27 @@ class Rating(models.Model):
         default=UserLevel.get_default,
         verbose_name="Уровень пользователя",
     )
+    # Копия отдела пользователя для индекса таблицы лидеров,
+    # синхронизируется сигналами в ratings.signals.
+    department = models.ForeignKey(
+        Department,
+        related_name="ratings",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        verbose_name="Отдел",
+    )
 
     @property
     def pass_progress(self):
         """Прогресс прохождения квизов в процентах."""
-        if self.user.department.quizes.count() == 0:
+        return self.get_pass_progress(self.user.department.quizes.count())
+
+    def get_pass_progress(self, quizes_count):
+        """Прогресс прохождения квизов в процентах от указанного количества."""
+        if quizes_count == 0:
             return 0
-        return int(self.count_passed / (self.user.department.quizes.count() / 100))
+        return int(self.count_passed / (quizes_count / 100))
 
     @property
     def to_next_level(self):
@@ -154,25 +173,69 @@ class Rating(models.Model):
             count_right=Sum("count_right"),
             quiz_time=Sum("quiz_time"),
         )
-        self.answered_questions = statistics["count_answered"]
-        self.right_questions = statistics["count_right"]
+        # Без пройденных квизов суммы равны None.
+        self.answered_questions = statistics["count_answered"] or 0
+        self.right_questions = statistics["count_right"] or 0
         self.wrong_questions = self.answered_questions - self.right_questions
-        self.passed_time = statistics["quiz_time"]
+        self.passed_time = statistics["quiz_time"] or 0
         diff = self.right_questions - self.wrong_questions
         self.user_rating = diff if diff > 0 else 0
+        self.set_level()
+        self.save()
+        invalidate_profile(self.user_id)
+        self.set_achivements()
+
+    def set_level(self):
+        """Переводит пользователя на следующий уровень, если он его достиг."""
         if self.user_level.not_last_level and (
             self.user_level.to_level_up >= self.count_passed
         ):
             self.user_level = self.user_level.next_level.first()
-        self.save()
-        self.user.achivements.set(Achivement.objects.all())
-        for achivement in self.user.user_achivements.all():
-            achivement.set_achivement()
+
+    def set_achivements(self):
+        """Пересчитывает достижения пользователя по текущему рейтингу."""
+        UserAchivement.evaluate([self])
+
+    @classmethod
+    def apply_delta(cls, user, delta):
+        """
+        Изменяет счетчики рейтинга пользователя на заданные величины.
+
+        delta - словарь {поле: приращение}. Счетчики и рейтинг обновляются
+        одним атомарным UPDATE с F-выражениями, без пересчета всей статистики
+        пользователя. Возвращает рейтинг или None, если изменений нет.
+        """
+        delta = {field: value for field, value in delta.items() if value}
+        if not delta:
+            return None
+        rating, _ = cls.objects.get_or_create(user=user)
+        right = F("right_questions") + delta.get("right_questions", 0)
+        wrong = F("wrong_questions") + delta.get("wrong_questions", 0)
+        cls.objects.filter(pk=rating.pk).update(
+            user_rating=Greatest(right - wrong, 0),
+            **{field: F(field) + value for field, value in delta.items()},
+        )
+        rating.refresh_from_db()
+        user_level = rating.user_level_id
+        rating.set_level()
+        if rating.user_level_id != user_level:
+            rating.save(update_fields=["user_level"])
+        invalidate_profile(rating.user_id)
+        # UPDATE выше не отправляет post_save, кэш рейтинга сбрасывается явно.
+        bump("ratings", [f"department:{rating.department_id}"])
+        rating.set_achivements()
+        return rating
 
     class Meta:
         verbose_name = "Рейтинг пользователя"
         verbose_name_plural = "Рейтинги пользователей"
         ordering = ["-user_rating", "passed_time"]
+        indexes = [
+            models.Index(
+                fields=["department", "-user_rating", "passed_time", "id"],
+                name="rating_leaderboard_idx",
+            )
+        ]
 
     def __str__(self):
         return f"Рейтинг пользователя {self.user}"
@@ -241,6 +304,20 @@ class Achivement(models.Model):
             + self.level
         )
 
+    def count_points(self, rating):
+        """Подсчет очков, набранных пользователем с данным рейтингом."""
+        return (
+            min(rating.count_completed, self.num_of_completed)
+            + min(rating.count_passed, self.num_of_passed)
+            + min(rating.count_failed, self.num_of_failed)
+            + min(rating.count_assigned, self.num_of_assigned)
+            + min(rating.answered_questions, self.num_of_questions)
+            + min(rating.right_questions, self.num_of_right_questions)
+            + min(rating.wrong_questions, self.num_of_wrong_questions)
+            + min(rating.passed_time, self.time_in_quizes)
+            + min(rating.user_level.level, self.level)
+        )
+
     class Meta:
         verbose_name = "Достижение"
         verbose_name_plural = "Достижения"
@@ -291,43 +368,74 @@ class UserAchivement(models.Model):
         Если пользователь набрал достаточное количество очков,
         достижение считается полученным, и устанавливается дата получения достижения.
         """
-        if not self.achived:
-            self.points_to_get = self.achivement.count_fields()
-            self.points_now = min(
-                self.user.rating.count_completed, self.achivement.num_of_completed
-            )
-            self.points_now += min(
-                self.user.rating.count_passed, self.achivement.num_of_passed
-            )
-            self.points_now += min(
-                self.user.rating.count_failed, self.achivement.num_of_failed
-            )
-            self.points_now += min(
-                self.user.rating.count_assigned, self.achivement.num_of_assigned
-            )
-            self.points_now += min(
-                self.user.rating.answered_questions, self.achivement.num_of_questions
-            )
-            self.points_now += min(
-                self.user.rating.right_questions, self.achivement.num_of_right_questions
-            )
-            self.points_now += min(
-                self.user.rating.wrong_questions, self.achivement.num_of_wrong_questions
-            )
-            self.points_now += min(
-                self.user.rating.passed_time, self.achivement.time_in_quizes
-            )
-            self.points_now += min(
-                self.user.rating.user_level.level, self.achivement.level
-            )
-            if self.points_now == self.points_to_get:
-                self.achived = True
-                self.get_date = datetime.now().date()
+        if not self.achived and self.calculate(self.user.rating):
             self.save()
 
+    def calculate(self, rating):
+        """
+        Пересчитывает очки достижения по рейтингу пользователя.
+
+        Возвращает True, если значения полей изменились.
+        """
+        old = (self.points_to_get, self.points_now, self.achived)
+        self.points_to_get = self.achivement.count_fields()
+        self.points_now = self.achivement.count_points(rating)
+        if self.points_now == self.points_to_get:
+            self.achived = True
+            self.get_date = datetime.now().date()
+        return old != (self.points_to_get, self.points_now, self.achived)
+
+    @classmethod
+    def evaluate(cls, ratings, achivements=None):
+        """
+        Пересчитывает достижения для набора рейтингов.
+
+        Пороги достижений и существующие достижения пользователей загружаются
+        по одному разу, недостающие записи создаются через bulk_create,
+        а в БД записываются только изменившиеся строки через bulk_update.
+        """
+        if achivements is None:
+            achivements = list(Achivement.objects.all())
+        ratings = {rating.user_id: rating for rating in ratings}
+        existing = {
+            (item.user_id, item.achivement_id): item
+            for item in cls.objects.filter(user__in=ratings.keys())
+        }
+        to_create, to_update = [], []
+        for user, rating in ratings.items():
+            for achivement in achivements:
+                user_achivement = existing.get((user, achivement.id))
+                if user_achivement is None:
+                    user_achivement = cls(user_id=user, achivement=achivement)
+                    user_achivement.calculate(rating)
+                    to_create.append(user_achivement)
+                    continue
+                if user_achivement.achived:
+                    continue
+                user_achivement.achivement = achivement
+                if user_achivement.calculate(rating):
+                    to_update.append(user_achivement)
+        cls.objects.bulk_create(to_create, batch_size=1000)
+        cls.objects.bulk_update(
+            to_update,
+            ["points_to_get", "points_now", "achived", "get_date"],
+            batch_size=1000,
+        )
+
     class Meta:
         verbose_name = "Достижение пользователя"
         verbose_name_plural = "Достижения пользователей"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "achivement"], name="unique_user_achivement"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "achived", "get_date"],
+                name="user_achivement_progress_idx",
+            )
+        ]
 
     def __str__(self):
         return (
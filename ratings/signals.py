@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from api.cache import bump
+
+from .models import Rating, UserLevel
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=Rating)
+def set_rating_department(sender, instance, **kwargs):
+    """Заполняет отдел нового рейтинга отделом пользователя."""
+    if instance._state.adding and instance.department_id is None:
+        instance.department_id = instance.user.department_id
+
+
+@receiver(post_save, sender=User)
+def sync_rating_department(sender, instance, created, update_fields, **kwargs):
+    """Переносит рейтинг пользователя в таблицу лидеров его нового отдела."""
+    if created or (update_fields and "department" not in update_fields):
+        return
+    Rating.objects.filter(user=instance).exclude(
+        department=instance.department_id
+    ).update(department=instance.department_id)
+
+
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+def reset_department_ratings_cache(sender, instance, **kwargs):
+    """Сбрасывает кэш таблицы лидеров отдела."""
+    bump("ratings", [f"department:{instance.department_id}"])
+
+
+@receiver(post_save, sender=User)
+def reset_ratings_cache(sender, instance, created, update_fields, **kwargs):
+    """
+    Сбрасывает кэш таблиц лидеров при изменении данных пользователя.
+
+    Пользователь мог сменить отдел, поэтому сбрасываются все отделы.
+    """
+    if created or (update_fields and set(update_fields) <= {"last_login"}):
+        return
+    bump("ratings")
+
+
+@receiver(post_save, sender=UserLevel)
+@receiver(post_delete, sender=UserLevel)
+def reset_levels_cache(sender, **kwargs):
+    """Сбрасывает кэш уровней, в том числе профили пользователей."""
+    bump("levels")
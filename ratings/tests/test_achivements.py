@@ -0,0 +1,90 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+
+from ratings.models import Achivement, Rating, UserAchivement
+
+FIELDS = ("user_id", "achivement_id", "points_to_get", "points_now", "achived")
+
+
+@pytest.fixture
+def achivement(organization):
+    """Возвращает достижение, которое набирается за несколько квизов."""
+    return Achivement.objects.create(
+        name="Марафон", description="Марафон", num_of_passed=3, num_of_failed=1
+    )
+
+
+def _rows():
+    """Возвращает достижения пользователей для сравнения."""
+    return sorted(UserAchivement.objects.values_list(*FIELDS, "get_date").order_by())
+
+
+def _ratings():
+    """Возвращает все рейтинги с уровнями."""
+    return list(Rating.objects.select_related("user_level").order_by("pk"))
+
+
+def _per_user_rows(ratings):
+    """
+    Возвращает строки, которые дал бы прежний пересчет по одному пользователю.
+
+    Пересчет выполняется через UserAchivement.set_achivement и откатывается.
+    """
+    with transaction.atomic():
+        for rating in ratings:
+            for achivement in Achivement.objects.all():
+                user_achivement, _ = UserAchivement.objects.get_or_create(
+                    user_id=rating.user_id, achivement=achivement
+                )
+                user_achivement.set_achivement()
+        rows = _rows()
+        transaction.set_rollback(True)
+    return rows
+
+
+def _set_counts(ratings, **counts):
+    """Изменяет счетчики рейтингов в БД и в переданных объектах."""
+    for rating in ratings:
+        for field, value in counts.items():
+            setattr(rating, field, value)
+        Rating.objects.filter(pk=rating.pk).update(**counts)
+
+
+@pytest.mark.django_db
+def test_evaluate_matches_per_user_calculate(achivement):
+    """Пакетный пересчет дает те же строки, что и пересчет по пользователям."""
+    ratings = _ratings()
+    earning, losing = ratings[::2], ratings[1::2]
+    _set_counts(earning, count_passed=3, count_failed=1, count_completed=4)
+    _set_counts(losing, count_passed=2)
+    expected = _per_user_rows(ratings)
+
+    UserAchivement.evaluate(ratings)
+
+    assert _rows() == expected
+    assert any(row[4] for row in expected)
+    assert any(not row[4] and row[3] for row in expected)
+
+    # Очки уменьшаются, полученные достижения остаются.
+    _set_counts(ratings, count_passed=1, count_failed=0, count_completed=1)
+    expected = _per_user_rows(ratings)
+
+    UserAchivement.evaluate(ratings)
+
+    assert _rows() == expected
+
+
+@pytest.mark.django_db
+def test_recalculate_command_is_idempotent(achivement):
+    """Повторный запуск команды не создает дубликатов и не меняет строки."""
+    _set_counts(_ratings()[::2], count_passed=3, count_failed=1)
+
+    call_command("recalculate_achivements", chunk_size=3, stdout=StringIO())
+    first = _rows()
+    call_command("recalculate_achivements", chunk_size=3, stdout=StringIO())
+
+    assert _rows() == first
+    assert len(first) == Rating.objects.count() * Achivement.objects.count()
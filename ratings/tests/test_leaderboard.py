@@ -0,0 +1,73 @@
+from urllib.parse import urlsplit
+
+import pytest
+from django.core.cache import cache
+
+from ratings.leaderboard import ORDERING
+from ratings.models import Rating
+
+RATINGS_URL = "/api/v1/users/ratings/"
+
+
+@pytest.fixture
+def leaderboard(employee):
+    """
+    Возвращает id рейтингов отдела сотрудника в порядке таблицы лидеров.
+
+    Рейтингам назначаются повторяющиеся значения, чтобы в таблице были
+    одинаковые баллы и одинаковое время.
+    """
+    ratings = Rating.objects.filter(department=employee.department_id)
+    for number, rating in enumerate(ratings.order_by("-id")):
+        Rating.objects.filter(pk=rating.pk).update(
+            user_rating=number % 3, passed_time=number % 2 * 100
+        )
+    cache.clear()
+    return list(ratings.order_by(*ORDERING).values_list("id", flat=True))
+
+
+def _get(client, url, **params):
+    """Выполняет запрос к таблице лидеров и возвращает данные ответа."""
+    response = client.get(url, params)
+    assert response.status_code == 200
+    return response.data
+
+
+@pytest.mark.django_db
+def test_pages_follow_leaderboard_order(employee, api_client, leaderboard):
+    """Страницы по курсору проходят таблицу без пропусков и повторов."""
+    client = api_client(employee)
+    ids, url, params = [], RATINGS_URL, {"limit": 3}
+    while url:
+        data = _get(client, url, **params)
+        ids.extend(item["id"] for item in data["results"])
+        url, params = data["next"], {}
+        if url:
+            parts = urlsplit(url)
+            url = f"{parts.path}?{parts.query}"
+
+    assert len(leaderboard) > 3
+    assert ids == leaderboard
+
+
+@pytest.mark.django_db
+def test_rank_and_window_match_leaderboard(employee, api_client, leaderboard):
+    """Место и окружение пользователя совпадают с его позицией в таблице."""
+    client = api_client(employee)
+    rating = Rating.objects.get(user=employee)
+    index = leaderboard.index(rating.id)
+
+    assert _get(client, f"{RATINGS_URL}me/")["rank"] == index + 1
+    window = _get(client, f"{RATINGS_URL}around/", size=2)
+    first, last = max(index - 2, 0), index + 3
+    assert [item["id"] for item in window] == leaderboard[first:last]
+    assert [item["rank"] for item in window] == list(
+        range(first + 1, first + 1 + len(window))
+    )
+
+
+@pytest.mark.django_db
+def test_invalid_cursor(employee, api_client):
+    """Поврежденный курсор отклоняется."""
+    response = api_client(employee).get(RATINGS_URL, {"after": "not-a-cursor"})
+    assert response.status_code == 404
@@ -1,6 +1,15 @@
+from django.shortcuts import get_object_or_404
 from rest_framework import mixins, permissions, response, status, viewsets
 from rest_framework.decorators import action
 
+from api.cache import CachedResponseMixin
+
+from .leaderboard import (
+    LeaderboardPagination,
+    get_department_ratings,
+    get_rank,
+    get_window,
+)
 from .models import Rating, UserAchivement
 from .serializers import (
     RatingSerializer,
@@ -31,21 +40,59 @@ class UserAchivementViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
         return response.Response(status=status.HTTP_200_OK, data=serializer.data)
 
 
-class RatingViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class RatingViewSet(
+    CachedResponseMixin, mixins.ListModelMixin, viewsets.GenericViewSet
+):
     """Вьюсет для рейтинга пользователя."""
 
     serializer_class = RatingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = LeaderboardPagination
+    cache_scope = "ratings"
+    cache_vary_on = "department"
 
     def get_queryset(self):
         """Возвращает рейтинг пользователей в том же отделе, что и пользователь."""
-        departament = self.request.user.department.id
-        return Rating.objects.filter(user__department=departament)
+        return get_department_ratings(self.request.user.department_id)
 
     @action(detail=False, methods=["get"])
     def short(self, request):
         """Возвращает рейтинг первых трех пользователей в отделе."""
-        department = request.user.department.id
-        queryset = Rating.objects.filter(user__department=department)[:3]
+        return self.cached_response(request, self._short)
+
+    def _short(self, request):
+        """Собирает рейтинг первых трех пользователей в отделе."""
+        queryset = self.get_queryset()[:3]
         serializer = RatingShortSerializer(queryset, many=True)
         return response.Response(status=status.HTTP_200_OK, data=serializer.data)
+
+    @action(detail=False, methods=["get"])
+    def me(self, request):
+        """Возвращает рейтинг и место текущего пользователя в отделе."""
+        rating = get_object_or_404(
+            Rating.objects.select_related("user"), user=request.user
+        )
+        data = RatingSerializer(rating).data
+        data["rank"] = get_rank(rating)
+        return response.Response(status=status.HTTP_200_OK, data=data)
+
+    @action(detail=False, methods=["get"])
+    def around(self, request):
+        """
+        Возвращает рейтинги вокруг текущего пользователя.
+
+        Параметр size задает количество мест выше и ниже пользователя.
+        """
+        try:
+            size = min(max(int(request.query_params.get("size", 2)), 0), 50)
+        except ValueError:
+            size = 2
+        rating = get_object_or_404(
+            Rating.objects.select_related("user"), user=request.user
+        )
+        data = []
+        for rank, item in get_window(rating, size):
+            item_data = RatingSerializer(item).data
+            item_data["rank"] = rank
+            data.append(item_data)
+        return response.Response(status=status.HTTP_200_OK, data=data)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from user.models import DefaultAvatar, Department, User
+from user.models import DefaultAvatar, Department, OutgoingMail, User
 
 
 @admin.register(User)
@@ -49,3 +49,17 @@ class DefaultAvatarAdmin(admin.ModelAdmin):
     """
 
     list_display = ("avatar", "description")
+
+
+@admin.register(OutgoingMail)
+class OutgoingMailAdmin(admin.ModelAdmin):
+    """
+    Административный класс для модели OutgoingMail.
+
+    Отображает получателя, тему и состояние отправки письма.
+    """
+
+    list_display = ("recipient", "subject", "status", "attempts", "created_at")
+    list_filter = ("status",)
+    search_fields = ("recipient",)
+    exclude = ("body",)
@@ -6,3 +6,7 @@ class UserConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "user"
+
+    def ready(self):
+        """Подключает сигналы приложения."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,45 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from user.onboarding import import_users, parse_users
+
+
+class Command(BaseCommand):
+    """Команда для массового импорта сотрудников из CSV или JSON."""
+
+    help = "Импортирует сотрудников из файла CSV или JSON."
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы команды."""
+        parser.add_argument("path", help="Путь к файлу с сотрудниками.")
+        parser.add_argument(
+            "--format",
+            choices=("csv", "json"),
+            help="Формат файла (по умолчанию определяется по расширению).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Количество процессов для хэширования паролей.",
+        )
+
+    def handle(self, *args, **options):
+        """Импортирует сотрудников и выводит ошибки по строкам."""
+        path = Path(options["path"])
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        try:
+            rows = parse_users(path.read_bytes(), file_format)
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        report = import_users(rows, workers=options["workers"])
+        for error in report["errors"]:
+            self.stderr.write(
+                f"Строка {error['row']}: "
+                f"{json.dumps(error['errors'], ensure_ascii=False)}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Создано сотрудников: {report['created']}")
+        )
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from user.utils import send_mail_queue
+
+
+class Command(BaseCommand):
+    """Команда для отправки писем из очереди исходящих писем."""
+
+    help = "Отправляет письма из очереди пачками через одно SMTP-соединение."
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы команды."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Количество писем в пачке (по умолчанию MAIL_QUEUE_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Работать постоянно, опрашивая очередь.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Пауза между опросами пустой очереди в секундах.",
+        )
+
+    def handle(self, *args, **options):
+        """Отправляет письма, пока очередь не опустеет."""
+        while True:
+            sent, failed = send_mail_queue(options["batch_size"])
+            if sent or failed:
+                self.stdout.write(f"Отправлено: {sent}, с ошибкой: {failed}")
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
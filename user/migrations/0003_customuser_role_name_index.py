@@ -0,0 +1,17 @@
+# Generated by Django 4.2.2 on 2026-10-18 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0002_default_avatar'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['role', 'lastName', 'firstName'], name='user_role_name_idx'),
+        ),
+    ]
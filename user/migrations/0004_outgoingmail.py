@@ -0,0 +1,35 @@
+# Generated by Django 4.2.2 on 2026-10-18 02:55
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0003_customuser_role_name_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingMail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255, verbose_name='subject')),
+                ('body', models.TextField(blank=True, verbose_name='body')),
+                ('from_email', models.CharField(max_length=254, verbose_name='from')),
+                ('recipient', models.EmailField(max_length=254, verbose_name='recipient')),
+                ('status', models.CharField(choices=[('PEN', 'Pending'), ('SNT', 'Sent'), ('FLD', 'Failed')], default='PEN', max_length=3, verbose_name='status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='attempts')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='next attempt')),
+                ('last_error', models.TextField(blank=True, verbose_name='last error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='sent')),
+            ],
+            options={
+                'verbose_name': 'outgoing mail',
+                'verbose_name_plural': 'outgoing mails',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='outgoing_mail_queue_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0004_outgoingmail'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outgoingmail',
+            name='status',
+            field=models.CharField(choices=[('PEN', 'Pending'), ('SND', 'Sending'), ('SNT', 'Sent'), ('FLD', 'Failed')], default='PEN', max_length=3, verbose_name='status'),
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -96,6 +97,13 @@ class CustomUser(AbstractUser):
 
     objects = CustomUserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(
+                fields=["role", "lastName", "firstName"], name="user_role_name_idx"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.lastName} {self.firstName}"
 
@@ -128,4 +136,49 @@ class DefaultAvatar(models.Model):
         return self.description
 
 
+class OutgoingMail(models.Model):
+    """
+    Модель исходящего письма.
+
+    Письма ставятся в очередь в рамках запроса и отправляются отдельным
+    обработчиком (команда send_mail_queue).
+    """
+
+    class StatusChoice(models.TextChoices):
+        """Статусы отправки письма."""
+
+        PENDING = "PEN", _("Pending")
+        SENDING = "SND", _("Sending")
+        SENT = "SNT", _("Sent")
+        FAILED = "FLD", _("Failed")
+
+    subject = models.CharField(_("subject"), max_length=255)
+    body = models.TextField(_("body"), blank=True)
+    from_email = models.CharField(_("from"), max_length=254)
+    recipient = models.EmailField(_("recipient"), max_length=254)
+    status = models.CharField(
+        _("status"),
+        max_length=3,
+        choices=StatusChoice.choices,
+        default=StatusChoice.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(_("attempts"), default=0)
+    next_attempt_at = models.DateTimeField(_("next attempt"), default=timezone.now)
+    last_error = models.TextField(_("last error"), blank=True)
+    created_at = models.DateTimeField(_("created"), auto_now_add=True)
+    sent_at = models.DateTimeField(_("sent"), blank=True, null=True)
+
+    class Meta:
+        verbose_name = _("outgoing mail")
+        verbose_name_plural = _("outgoing mails")
+        indexes = [
+            models.Index(
+                fields=["status", "next_attempt_at"], name="outgoing_mail_queue_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient}: {self.subject}"
+
+
 User = get_user_model()
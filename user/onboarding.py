@@ -0,0 +1,156 @@
+import csv
+import io
+import json
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from api.cache import bump
+from ratings.models import Rating, UserLevel
+from user.models import Department, OutgoingMail, User
+from user.serializers import UserImportSerializer
+from user.utils import build_password_mail, generate_password
+
+# Меньше этого количества паролей пул процессов не используется.
+MIN_POOL_PASSWORDS = 50
+
+# Общий пул процессов для хэширования: (количество процессов, пул).
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def parse_users(content, file_format):
+    """Разбирает список сотрудников из CSV или JSON."""
+    if isinstance(content, bytes):
+        content = content.decode("utf-8-sig")
+    if file_format == "json":
+        rows = json.loads(content)
+        if not isinstance(rows, list):
+            raise ValueError("Ожидается JSON-массив сотрудников.")
+        return rows
+    if file_format == "csv":
+        return list(csv.DictReader(io.StringIO(content)))
+    raise ValueError(f"Неизвестный формат: {file_format}.")
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Хэширует пароли, распределяя работу по пулу процессов.
+
+    Хэширование - самая затратная по CPU часть импорта, поэтому при большом
+    количестве паролей оно выполняется в USER_IMPORT_WORKERS процессах.
+    Пул создается при первом таком импорте и используется повторно, чтобы
+    запросы к API не запускали процессы заново. Если процесс пула
+    завершился аварийно, пароли хэшируются в текущем процессе.
+    """
+    workers = workers or settings.USER_IMPORT_WORKERS
+    if workers <= 1 or len(passwords) < MIN_POOL_PASSWORDS:
+        return [make_password(password) for password in passwords]
+    chunksize = max(1, len(passwords) // (workers * 4))
+    pool = _get_pool(workers)
+    try:
+        return list(pool.map(make_password, passwords, chunksize=chunksize))
+    except BrokenProcessPool:
+        _drop_pool(pool)
+        return [make_password(password) for password in passwords]
+
+
+def _get_pool(workers):
+    """Возвращает общий пул из workers процессов, создавая его при необходимости."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool[0] != workers:
+            if _pool is not None:
+                _pool[1].shutdown(wait=False)
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+            _pool = (workers, pool)
+        return _pool[1]
+
+
+def _drop_pool(pool):
+    """Забывает неработающий пул, следующий импорт создаст новый."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool[1] is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def import_users(rows, workers=None):
+    """
+    Создает сотрудников пачкой.
+
+    Каждая строка проверяется отдельно, ошибочные строки попадают в отчет
+    и не прерывают импорт остальных. Отделы и занятые email проверяются
+    одним запросом на всю пачку, пользователи, их рейтинги и письма
+    с паролями создаются через bulk_create в одной транзакции.
+    Возвращает отчет вида {"created": ..., "errors": [...]}.
+    """
+    errors, valid = [], []
+    for number, row in enumerate(rows, start=1):
+        serializer = UserImportSerializer(data=row)
+        if serializer.is_valid():
+            data = serializer.validated_data
+            data["email"] = User.objects.normalize_email(data["email"])
+            valid.append((number, data))
+        else:
+            errors.append({"row": number, "errors": serializer.errors})
+
+    departments = set(
+        Department.objects.filter(
+            id__in={data["department"] for _, data in valid}
+        ).values_list("id", flat=True)
+    )
+    taken = set(
+        User.objects.filter(email__in=[data["email"] for _, data in valid]).values_list(
+            "email", flat=True
+        )
+    )
+    users = []
+    for number, data in valid:
+        if data["department"] not in departments:
+            errors.append(
+                {"row": number, "errors": {"department": ["Отдел не найден."]}}
+            )
+            continue
+        if data["email"] in taken:
+            errors.append(
+                {"row": number, "errors": {"email": ["Email уже используется."]}}
+            )
+            continue
+        taken.add(data["email"])
+        data["department_id"] = data.pop("department")
+        users.append(User(**data))
+
+    passwords = [generate_password() for _ in users]
+    for user, password in zip(users, hash_passwords(passwords, workers)):
+        user.password = password
+    with transaction.atomic():
+        users = User.objects.bulk_create(users, batch_size=500)
+        user_level = UserLevel.get_default()
+        Rating.objects.bulk_create(
+            [
+                Rating(
+                    user=user,
+                    user_level_id=user_level,
+                    department_id=user.department_id,
+                )
+                for user in users
+            ],
+            batch_size=500,
+        )
+        bump("ratings", {f"department:{user.department_id}" for user in users})
+        OutgoingMail.objects.bulk_create(
+            [
+                build_password_mail(user.email, password)
+                for user, password in zip(users, passwords)
+            ],
+            batch_size=500,
+        )
+    errors.sort(key=lambda error: error["row"])
+    return {"created": len(users), "errors": errors}
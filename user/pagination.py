@@ -0,0 +1,34 @@
+from rest_framework.pagination import CursorPagination
+
+
+class OptionalCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация, включаемая по запросу.
+
+    Страницы отдаются только при передаче параметров cursor или limit,
+    иначе список возвращается целиком, как и раньше. К сортировке всегда
+    добавляется id: записи с одинаковым значением поля сортировки должны
+    идти в одном порядке, иначе курсор пропускает или повторяет их.
+    """
+
+    page_size = 50
+    page_size_query_param = "limit"
+    max_page_size = 500
+    ordering = "id"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Возвращает страницу, если клиент запросил пагинацию."""
+        params = request.query_params
+        if (
+            self.cursor_query_param not in params
+            and self.page_size_query_param not in params
+        ):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        """Возвращает сортировку запроса, дополненную уникальным id."""
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if not {"id", "-id", "pk", "-pk"} & set(ordering):
+            ordering += ("id",)
+        return ordering
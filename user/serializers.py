@@ -7,10 +7,9 @@ from django.utils.translation import gettext_lazy as _
 from rest_framework import exceptions, serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
-from quizes.models import AssignedQuiz
 from ratings.models import Rating
 from user.models import CustomUser, DefaultAvatar, Department, User
-from user.utils import password_mail
+from user.utils import generate_password, password_mail
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -84,7 +83,7 @@ class UserCreateSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         """Создает и сохраняет нового пользователя с заданными данными."""
-        password = str(uuid.uuid1())[:8]
+        password = generate_password()
         user = User.objects.create(**validated_data)
         user.set_password(password)
         user.save()
@@ -93,6 +92,24 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return user
 
 
+class UserImportSerializer(UserCreateSerializer):
+    """
+    Сериализатор строки массового импорта сотрудников.
+
+    Поля совпадают с UserCreateSerializer, кроме id. Проверяется только
+    формат полей: существование отделов и уникальность email проверяются
+    для всей пачки сразу, поэтому отдел передается числом.
+    """
+
+    role = serializers.ChoiceField(choices=("EMP", "AD"), default="EMP")
+    department = serializers.IntegerField()
+
+    class Meta(UserCreateSerializer.Meta):
+        fields = tuple(
+            field for field in UserCreateSerializer.Meta.fields if field != "id"
+        )
+
+
 class AdminMeSerializer(serializers.ModelSerializer):
     """Сериализатор для представления информации об администраторе."""
 
@@ -107,15 +124,11 @@ class UserAdminSerializer(serializers.ModelSerializer):
     department = serializers.SlugRelatedField(
         slug_field="name", queryset=Department.objects.all()
     )
-    assigned = serializers.SerializerMethodField()
+    # Значение вычисляется в UserAdminViewSet.get_queryset.
+    assigned = serializers.IntegerField(source="assigned_count", read_only=True)
     count_passed = serializers.IntegerField(source="rating.count_passed")
     rating = serializers.IntegerField(source="rating.user_rating")
 
-    # TODO annotate
-    def get_assigned(self, obj):
-        """Возвращает количество квизов, назначенных пользователю."""
-        return AssignedQuiz.objects.filter(user=obj).count()
-
     class Meta:
         model = User
         fields = [
@@ -136,7 +149,7 @@ class UserSerializer(serializers.ModelSerializer):
     """Сериализатор для представления информации о пользователе."""
 
     departament = serializers.CharField(source="department.name")
-    pass_progress = serializers.IntegerField(source="rating.pass_progress")
+    pass_progress = serializers.SerializerMethodField()
     count_assigned = serializers.IntegerField(source="rating.count_assigned")
     count_passed = serializers.IntegerField(source="rating.count_passed")
     right_precent = serializers.IntegerField(source="rating.right_precent")
@@ -171,6 +184,18 @@ class UserSerializer(serializers.ModelSerializer):
             "earned_in_level",
         ]
 
+    def get_pass_progress(self, obj):
+        """
+        Возвращает прогресс прохождения квизов.
+
+        Использует количество квизов отдела из аннотации department_quizes,
+        если она есть.
+        """
+        quizes_count = getattr(obj, "department_quizes", None)
+        if quizes_count is None:
+            return obj.rating.pass_progress
+        return obj.rating.get_pass_progress(quizes_count)
+
 
 class UserResetPasswordSerializer(serializers.ModelSerializer):
     """Сериализатор для сброса пароля пользователя."""
@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.cache import bump
+from user.models import DefaultAvatar, Department, User
+from user.utils import invalidate_profile
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_profile(sender, instance, created, **kwargs):
+    """Сбрасывает кэш профиля при изменении данных пользователя."""
+    if not created:
+        invalidate_profile(instance.id)
+
+
+@receiver(post_save, sender=User)
+def reset_user_catalog_cache(sender, instance, created, update_fields, **kwargs):
+    """Сбрасывает кэш каталога пользователя: он зависит от его отдела."""
+    if created or (update_fields and set(update_fields) <= {"last_login"}):
+        return
+    bump("quizes", [f"user:{instance.id}"])
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def reset_departments_cache(sender, **kwargs):
+    """Сбрасывает кэш отделов и каталога квизов, где выводится отдел."""
+    bump("departments")
+    bump("quizes")
+
+
+@receiver(post_save, sender=DefaultAvatar)
+@receiver(post_delete, sender=DefaultAvatar)
+def reset_avatars_cache(sender, **kwargs):
+    """Сбрасывает кэш предустановленных аватаров."""
+    bump("avatars")
@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail as outbox
+from django.core.mail.backends.locmem import EmailBackend
+from django.utils import timezone
+
+from user.models import OutgoingMail
+from user.utils import build_password_mail, send_mail_queue
+
+LOCMEM_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+
+
+class FailingBackend(EmailBackend):
+    """Почтовый бэкенд, который не может отправить ни одного письма."""
+
+    def send_messages(self, messages):
+        """Имитирует ошибку SMTP."""
+        raise ConnectionError("SMTP недоступен")
+
+
+@pytest.fixture
+def queued_mail(db):
+    """Возвращает письмо с паролем в очереди отправки."""
+    mail = build_password_mail("user@corpquiz.test", "secret-password")
+    mail.save()
+    return mail
+
+
+@pytest.mark.django_db
+def test_sent_mail_drops_password(queued_mail, settings):
+    """Отправленное письмо не хранит пароль."""
+    settings.EMAIL_BACKEND = LOCMEM_BACKEND
+
+    assert send_mail_queue() == (1, 0)
+
+    queued_mail.refresh_from_db()
+    assert queued_mail.status == OutgoingMail.StatusChoice.SENT
+    assert queued_mail.body == ""
+    assert "secret-password" in outbox.outbox[0].body
+
+
+@pytest.mark.django_db
+def test_failed_mail_drops_password(queued_mail, settings):
+    """Письмо, исчерпавшее попытки, помечается неотправленным без пароля."""
+    settings.EMAIL_BACKEND = f"{__name__}.FailingBackend"
+    settings.MAIL_QUEUE_MAX_ATTEMPTS = 1
+
+    assert send_mail_queue() == (0, 1)
+
+    queued_mail.refresh_from_db()
+    assert queued_mail.status == OutgoingMail.StatusChoice.FAILED
+    assert queued_mail.body == ""
+    assert queued_mail.last_error == "SMTP недоступен"
+
+
+@pytest.mark.django_db
+def test_failed_attempt_is_retried_later(queued_mail, settings):
+    """После неудачной попытки письмо возвращается в очередь с задержкой."""
+    settings.EMAIL_BACKEND = f"{__name__}.FailingBackend"
+
+    assert send_mail_queue() == (0, 1)
+
+    queued_mail.refresh_from_db()
+    assert queued_mail.status == OutgoingMail.StatusChoice.PENDING
+    assert queued_mail.body
+    assert queued_mail.next_attempt_at > timezone.now()
+    assert send_mail_queue() == (0, 0)
+
+
+@pytest.mark.django_db
+def test_claimed_mail_is_reclaimed_after_timeout(queued_mail, settings):
+    """Захваченное письмо не отправляется повторно, пока захват не истек."""
+    settings.EMAIL_BACKEND = LOCMEM_BACKEND
+    OutgoingMail.objects.filter(pk=queued_mail.pk).update(
+        status=OutgoingMail.StatusChoice.SENDING,
+        next_attempt_at=timezone.now() + timedelta(minutes=5),
+    )
+    assert send_mail_queue() == (0, 0)
+
+    OutgoingMail.objects.filter(pk=queued_mail.pk).update(
+        next_attempt_at=timezone.now() - timedelta(seconds=1)
+    )
+    assert send_mail_queue() == (1, 0)
@@ -0,0 +1,93 @@
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth.hashers import check_password
+
+from user import onboarding
+from user.models import Department, OutgoingMail, User
+from user.onboarding import MIN_POOL_PASSWORDS, hash_passwords, import_users
+from user.utils import PASSWORD_LENGTH
+
+
+@pytest.mark.django_db
+def test_import_users_generates_random_passwords():
+    """Пароли импортированных сотрудников случайны и не идут подряд."""
+    department = Department.objects.create(name="Отдел")
+    rows = [
+        {
+            "firstName": "Имя",
+            "lastName": f"Фамилия {number}",
+            "patronymic": "Отчество",
+            "email": f"user{number}@corpquiz.test",
+            "position": "Сотрудник",
+            "department": department.id,
+        }
+        for number in range(20)
+    ]
+
+    report = import_users(rows, workers=1)
+
+    assert report == {"created": 20, "errors": []}
+    passwords = {
+        mail.recipient: mail.body.rsplit(" ", 1)[-1]
+        for mail in OutgoingMail.objects.all()
+    }
+    assert all(len(password) == PASSWORD_LENGTH for password in passwords.values())
+    # uuid1 в цикле давал пароли с общим началом.
+    assert len({password[:4] for password in passwords.values()}) > 1
+    user = User.objects.get(email="user7@corpquiz.test")
+    assert user.check_password(passwords[user.email])
+
+
+@pytest.mark.django_db
+def test_import_users_validates_like_user_create():
+    """Строки импорта проверяются полями UserCreateSerializer, роль по умолчанию EMP."""
+    department = Department.objects.create(name="Отдел")
+    row = {
+        "firstName": "Имя",
+        "lastName": "Фамилия",
+        "patronymic": "Отчество",
+        "email": "user@corpquiz.test",
+        "position": "Сотрудник",
+        "department": department.id,
+    }
+    rows = [
+        {**row, "id": 1000},
+        {**row, "email": "second@corpquiz.test", "patronymic": ""},
+        {**row, "email": "third@corpquiz.test", "role": "ROOT"},
+    ]
+
+    report = import_users(rows, workers=1)
+
+    assert report["created"] == 1
+    assert [(error["row"], list(error["errors"])) for error in report["errors"]] == [
+        (2, ["patronymic"]),
+        (3, ["role"]),
+    ]
+    user = User.objects.get(email="user@corpquiz.test")
+    assert user.role == User.UserRoleChoice.EMPLOYEE
+    assert user.id != 1000
+
+
+@pytest.fixture
+def pool():
+    """Подсчитывает создание пулов хэширования и завершает общий пул."""
+    with patch.object(
+        onboarding, "ProcessPoolExecutor", wraps=ProcessPoolExecutor
+    ) as executor:
+        yield executor
+    if onboarding._pool is not None:
+        onboarding._drop_pool(onboarding._pool[1])
+
+
+def test_hash_passwords_reuses_pool(pool):
+    """Повторные импорты используют один пул процессов."""
+    passwords = [f"password{number}" for number in range(MIN_POOL_PASSWORDS)]
+
+    first = hash_passwords(passwords, workers=2)
+    second = hash_passwords(passwords, workers=2)
+
+    assert pool.call_count == 1
+    assert all(map(check_password, passwords, first))
+    assert all(map(check_password, passwords, second))
@@ -0,0 +1,50 @@
+from urllib.parse import urlsplit
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from user.models import User
+
+USERS_URL = "/api/v1/admin/users/"
+
+
+def _pages(client, url):
+    """Возвращает id пользователей со всех страниц, следуя ссылкам next."""
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        ids.extend(user["id"] for user in response.data["results"])
+        url = response.data["next"]
+        if url:
+            parts = urlsplit(url)
+            url = f"{parts.path}?{parts.query}"
+    return ids
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("ordering", ["lastName", "-lastName", "email"])
+def test_cursor_pages_have_no_gaps_or_repeats(admin, api_client, ordering):
+    """Постраничный обход возвращает каждого сотрудника ровно один раз."""
+    employees = User.objects.filter(role=User.UserRoleChoice.EMPLOYEE)
+    for number, user in enumerate(employees.order_by("-id")):
+        user.lastName = ("Иванов", "Петров")[number % 2]
+        user.save(update_fields=["lastName"])
+
+    ids = _pages(api_client(admin), f"{USERS_URL}?ordering={ordering}&limit=3")
+
+    assert sorted(ids) == sorted(employees.values_list("id", flat=True))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("ordering", ["lastName", "-lastName"])
+def test_cursor_ordering_ends_with_id(admin, api_client, ordering):
+    """При сортировке по неуникальному полю страницы упорядочены и по id."""
+    with CaptureQueriesContext(connection) as context:
+        api_client(admin).get(f"{USERS_URL}?ordering={ordering}&limit=3")
+
+    (query,) = [
+        item["sql"] for item in context.captured_queries if "LIMIT" in item["sql"]
+    ]
+    assert query.split("ORDER BY")[-1].split("LIMIT")[0].rstrip().endswith('"id" ASC')
@@ -0,0 +1,55 @@
+import pytest
+
+from quizes.models import Quiz
+from ratings.models import Rating
+
+URL = "/api/v1/users/me/"
+
+
+@pytest.fixture
+def profile(employee, api_client):
+    """Возвращает функцию, получающую профиль сотрудника."""
+    client = api_client(employee)
+
+    def get():
+        response = client.get(URL)
+        assert response.status_code == 200
+        return response.data
+
+    return get
+
+
+def test_profile_is_cached(employee, profile, django_assert_num_queries):
+    """Повторный запрос профиля не обращается к данным пользователя."""
+    first = profile()
+    with django_assert_num_queries(0):
+        assert profile() == first
+
+
+def test_new_department_quiz_resets_profile(
+    employee, quiz, profile, django_capture_on_commit_callbacks
+):
+    """Новый квиз отдела меняет прогресс в профиле."""
+    Rating.objects.filter(user=employee).update(count_passed=1)
+    before = profile()["pass_progress"]
+    with django_capture_on_commit_callbacks(execute=True):
+        Quiz.objects.create(
+            name="Новый квиз",
+            description="Описание",
+            directory=employee.department,
+            level=quiz.level,
+            duration=quiz.duration,
+        )
+    assert profile()["pass_progress"] != before
+
+
+def test_user_level_change_resets_profile(
+    employee, profile, django_capture_on_commit_callbacks
+):
+    """Изменение уровня пользователя администратором видно в профиле."""
+    profile()
+    level = employee.rating.user_level
+    with django_capture_on_commit_callbacks(execute=True):
+        level.description = "Новое описание"
+        level.save()
+    assert profile()["level_description"] == "Новое описание"
@@ -1,12 +1,163 @@
-from django.core.mail import send_mail
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from api.cache import get_versions
+from user.models import OutgoingMail
+
+# Длина пароля, который генерируется при создании пользователя и сбросе пароля.
+PASSWORD_LENGTH = 12
+
+
+def generate_password():
+    """Возвращает случайный пароль из криптографически стойкого генератора."""
+    return get_random_string(PASSWORD_LENGTH)
+
+
+def build_password_mail(email, password):
+    """Возвращает несохраненное письмо с паролем для очереди отправки."""
+    return OutgoingMail(
+        subject="Авторизационные данные",
+        body=f"Ваш пароль для входа: {password}",
+        from_email="corpquiz@yandex.ru",
+        recipient=email,
+    )
 
 
 def password_mail(email, password):
-    """Функция для отправки пароля по электронной почте."""
-    send_mail(
-        "Авторизационные данные",
-        f"Ваш пароль для входа: {password}",
-        "corpquiz@yandex.ru",
-        [email],
-        fail_silently=False,
+    """
+    Функция для отправки пароля по электронной почте.
+
+    Письмо только ставится в очередь, отправляет его команда send_mail_queue.
+    """
+    build_password_mail(email, password).save()
+
+
+def send_mail_queue(batch_size=None):
+    """
+    Отправляет пачку писем из очереди через одно SMTP-соединение.
+
+    Письма захватываются короткой транзакцией (статус SENDING), а
+    отправляются уже вне ее, поэтому SMTP не держит блокировки строк.
+    Захват действует MAIL_QUEUE_SENDING_TIMEOUT секунд: письма
+    обработчика, завершившегося во время отправки, затем захватываются
+    снова. Неотправленные письма получают повторную попытку
+    с экспоненциальной задержкой, после MAIL_QUEUE_MAX_ATTEMPTS попыток
+    письмо помечается как неотправленное. Возвращает количество
+    отправленных и неотправленных писем пачки.
+    """
+    mails = _claim_mails(batch_size or settings.MAIL_QUEUE_BATCH_SIZE)
+    sent, failed = 0, 0
+    if not mails:
+        return sent, failed
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as error:
+        for mail in mails:
+            _retry_mail(mail, error)
+        failed = len(mails)
+    else:
+        for mail in mails:
+            message = EmailMessage(
+                mail.subject,
+                mail.body,
+                mail.from_email,
+                [mail.recipient],
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as error:
+                _retry_mail(mail, error)
+                failed += 1
+                continue
+            mail.status = OutgoingMail.StatusChoice.SENT
+            mail.sent_at = timezone.now()
+            mail.attempts += 1
+            # Текст письма содержит пароль, после отправки он не нужен.
+            mail.body = ""
+            sent += 1
+        connection.close()
+    OutgoingMail.objects.bulk_update(
+        mails,
+        [
+            "status",
+            "sent_at",
+            "attempts",
+            "body",
+            "next_attempt_at",
+            "last_error",
+        ],
     )
+    return sent, failed
+
+
+def _claim_mails(batch_size):
+    """
+    Захватывает пачку писем, готовых к отправке.
+
+    Возвращаются ожидающие письма, чье время попытки наступило, и письма,
+    захват которых истек.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        mails = list(
+            OutgoingMail.objects.select_for_update(skip_locked=True)
+            .filter(
+                status__in=[
+                    OutgoingMail.StatusChoice.PENDING,
+                    OutgoingMail.StatusChoice.SENDING,
+                ],
+                next_attempt_at__lte=now,
+            )
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        for mail in mails:
+            mail.status = OutgoingMail.StatusChoice.SENDING
+            mail.next_attempt_at = now + timedelta(
+                seconds=settings.MAIL_QUEUE_SENDING_TIMEOUT
+            )
+        OutgoingMail.objects.bulk_update(mails, ["status", "next_attempt_at"])
+    return mails
+
+
+def _retry_mail(mail, error):
+    """Назначает повторную попытку отправки письма."""
+    mail.attempts += 1
+    mail.last_error = str(error)
+    if mail.attempts >= settings.MAIL_QUEUE_MAX_ATTEMPTS:
+        mail.status = OutgoingMail.StatusChoice.FAILED
+        # Текст письма содержит пароль, неотправленное письмо его не хранит.
+        mail.body = ""
+        return
+    mail.status = OutgoingMail.StatusChoice.PENDING
+    delay = settings.MAIL_QUEUE_RETRY_DELAY * 2 ** (mail.attempts - 1)
+    mail.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+
+
+def get_profile_cache_key(user_id):
+    """
+    Возвращает ключ кэша профиля пользователя.
+
+    Профиль зависит от количества квизов отдела и от уровней пользователей,
+    поэтому в ключ входят версии областей "quizes" и "levels".
+    """
+    (quizes,) = get_versions("quizes")
+    (levels,) = get_versions("levels")
+    return f"user-profile-{user_id}-{quizes}-{levels}"
+
+
+def invalidate_profile(user_id):
+    """
+    Удаляет профиль пользователя из кэша.
+
+    Удаление откладывается до фиксации транзакции, чтобы параллельный запрос
+    не сохранил в кэш еще не зафиксированные данные.
+    """
+    transaction.on_commit(lambda: cache.delete(get_profile_cache_key(user_id)))
@@ -1,10 +1,17 @@
-import uuid
-
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
-from rest_framework import generics, mixins, permissions, status, viewsets
+from rest_framework import filters, generics, mixins, permissions, status, viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
+from api.cache import CachedResponseMixin
+from quizes.models import AssignedQuiz, Quiz
 from user.models import DefaultAvatar, Department, User
+from user.onboarding import import_users, parse_users
+from user.pagination import OptionalCursorPagination
 from user.serializers import (
     AdminMeSerializer,
     DefaultAvatarReadSerializer,
@@ -12,10 +19,11 @@ from user.serializers import (
     DepartmentSerializer,
     UserAdminSerializer,
     UserCreateSerializer,
+    UserImportSerializer,
     UserResetPasswordSerializer,
     UserSerializer,
 )
-from user.utils import password_mail
+from user.utils import generate_password, get_profile_cache_key, password_mail
 
 
 class UserViewSet(
@@ -31,6 +39,33 @@ class UserViewSet(
     permission_classes = [permissions.IsAdminUser]
 
 
+class UserImportAPIView(generics.GenericAPIView):
+    """
+    Представление для массового импорта сотрудников.
+
+    Принимает JSON-массив сотрудников или файл CSV/JSON в поле file.
+    """
+
+    serializer_class = UserImportSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        """Импортирует сотрудников и возвращает отчет с ошибками по строкам."""
+        upload = request.FILES.get("file")
+        try:
+            if upload:
+                file_format = "json" if upload.name.endswith(".json") else "csv"
+                rows = parse_users(upload.read(), file_format)
+            elif isinstance(request.data, list):
+                rows = request.data
+            else:
+                raise ValueError("Передайте массив сотрудников или файл.")
+        except (ValueError, UnicodeDecodeError) as error:
+            raise ValidationError({"file": [str(error)]})
+        report = import_users(rows)
+        return Response(status=status.HTTP_201_CREATED, data=report)
+
+
 class UserResetPasswordViewSet(generics.CreateAPIView):
     """Вьюсет для сброса пароля пользователя."""
 
@@ -42,7 +77,7 @@ class UserResetPasswordViewSet(generics.CreateAPIView):
         """Переопределение метода POST для сброса пароля пользователя."""
         email = request.data.get("email")
         user = get_object_or_404(User, email=email)
-        password = str(uuid.uuid1())[:8]
+        password = generate_password()
         user.set_password(password)
         user.save()
         password_mail(email, password)
@@ -56,20 +91,49 @@ class UserGetViewSet(generics.RetrieveAPIView):
     queryset = User.objects.all()
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_queryset(self):
+        """
+        Возвращает пользователей со всеми данными профиля.
+
+        Рейтинг, уровни и отдел загружаются через JOIN, количество квизов
+        отдела - подзапросом, поэтому профиль собирается одним запросом.
+        """
+        quizes = (
+            Quiz.objects.filter(directory=OuterRef("department"))
+            .order_by()
+            .values("directory")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return User.objects.select_related(
+            "department", "rating__user_level__prev_level"
+        ).annotate(department_quizes=Coalesce(Subquery(quizes), 0))
+
     def get(self, request, *args, **kwargs):
-        """Проверка доступа пользователя для получения информации."""
+        """
+        Проверка доступа пользователя для получения информации.
+
+        Профиль отдается из кэша, который сбрасывается при изменении
+        рейтинга или данных пользователя, квизов или уровней.
+        """
         if not request.user.is_authenticated:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
-        serializer = UserSerializer(request.user)
-        return Response(status=status.HTTP_200_OK, data=serializer.data)
+        key = get_profile_cache_key(request.user.id)
+        data = cache.get(key)
+        if data is None:
+            user = self.get_queryset().get(pk=request.user.pk)
+            data = UserSerializer(user).data
+            cache.set(key, data, settings.PROFILE_CACHE_TIMEOUT)
+        return Response(status=status.HTTP_200_OK, data=data)
 
 
-class DepartmentViewSet(viewsets.ModelViewSet):
+class DepartmentViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """Вьюсет для работы с отделами."""
 
     serializer_class = DepartmentSerializer
     queryset = Department.objects.all()
     permission_classes = [permissions.IsAdminUser]
+    cache_scope = "departments"
 
 
 class UserAdminViewSet(
@@ -80,9 +144,31 @@ class UserAdminViewSet(
     serializer_class = UserAdminSerializer
     queryset = User.objects.filter(role="EMP").all()
     permission_classes = [permissions.IsAdminUser]
-
-
-class AvatarListView(generics.ListCreateAPIView):
+    pagination_class = OptionalCursorPagination
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    search_fields = ["lastName", "firstName", "patronymic", "email"]
+    # Сортировка только по индексированным полям, при пагинации
+    # к ней добавляется id (см. OptionalCursorPagination).
+    ordering_fields = ["id", "lastName", "email"]
+    ordering = ["id"]
+
+    def get_queryset(self):
+        """Возвращает сотрудников с количеством назначенных квизов."""
+        assigned = (
+            AssignedQuiz.objects.filter(user=OuterRef("pk"))
+            .order_by()
+            .values("user")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return (
+            User.objects.filter(role="EMP")
+            .select_related("rating", "department")
+            .annotate(assigned_count=Coalesce(Subquery(assigned), 0))
+        )
+
+
+class AvatarListView(CachedResponseMixin, generics.ListCreateAPIView):
     """
     Представление для получения списка предустановленных аватаров.
 
@@ -91,6 +177,7 @@ class AvatarListView(generics.ListCreateAPIView):
 
     queryset = DefaultAvatar.objects.all()
     permission_classes = [permissions.IsAuthenticated]
+    cache_scope = "avatars"
 
     def get_serializer_class(self):
         """Метод для определения класса сериализатора в зависимости от запроса."""